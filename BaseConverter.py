@@ -0,0 +1,166 @@
+"""
+Integer <-> text conversion in the programmer calculator's bases.
+
+``format_in_base`` and ``parse_in_base`` work for integers of any size. Python's
+own ``str(int)`` and ``int(str)`` take quadratic time and refuse values over
+4300 decimal digits, so large decimal conversions are split recursively:
+formatting goes through ``decimal`` (whose multiplication is subquadratic for
+big operands) and parsing joins halves with cached powers of ten. Hex, octal
+and binary are linear and go straight to ``format``/``int``.
+
+``BaseConverter`` keeps the strings of the last value in every base. When the
+next value is the previous one with a digit appended or removed (typing and
+backspace), only the affected digits are changed in the target bases the
+change aligns with, instead of converting the whole number again.
+"""
+import decimal
+from functools import lru_cache
+
+BASE_RADIX = {"HEX": 16, "DEC": 10, "OCT": 8, "BIN": 2}
+BASE_DIGITS = {"HEX": "0123456789ABCDEF", "DEC": "0123456789", "OCT": "01234567", "BIN": "01"}
+BASE_BITS = {"HEX": 4, "OCT": 3, "BIN": 1}  # Bits per digit of the power-of-two bases
+_FORMAT_SPECS = {"HEX": "X", "OCT": "o", "BIN": "b"}
+
+_DIRECT_BITS = 4096  # Below this size str()/int() are fast and within the digit limit
+_DIRECT_DIGITS = 1000
+_EXACT = decimal.Context(prec=decimal.MAX_PREC, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+
+@lru_cache(maxsize=64)
+def _decimal_pow2(bits):
+    return _EXACT.power(decimal.Decimal(2), bits)
+
+
+@lru_cache(maxsize=64)
+def _pow10(digits):
+    return 10 ** digits
+
+
+def _to_decimal(n, bits):
+    if bits <= _DIRECT_BITS:
+        return decimal.Decimal(n)
+    low_bits = 1 << ((bits - 1).bit_length() - 1)  # Power-of-two split keeps the pow2 cache small
+    high, low = n >> low_bits, n & ((1 << low_bits) - 1)
+    return _EXACT.add(_EXACT.multiply(_to_decimal(high, bits - low_bits), _decimal_pow2(low_bits)),
+                      _to_decimal(low, low_bits))
+
+
+def _decimal_string(n):
+    bits = n.bit_length()
+    if bits <= _DIRECT_BITS:
+        return str(n)
+    return str(_to_decimal(n, bits))
+
+
+def _parse_decimal(digits):
+    if len(digits) <= _DIRECT_DIGITS:
+        return int(digits)
+    low_digits = 1 << ((len(digits) - 1).bit_length() - 1)
+    return _parse_decimal(digits[:-low_digits]) * _pow10(low_digits) + _parse_decimal(digits[-low_digits:])
+
+
+def format_in_base(value, base):
+    """``value`` in ``base`` without a prefix, e.g. ``-1F`` for -31 in HEX."""
+    sign, magnitude = ("-", -value) if value < 0 else ("", value)
+    if base == "DEC":
+        return sign + _decimal_string(magnitude)
+    return sign + format(magnitude, _FORMAT_SPECS[base])
+
+
+def format_word(value, base, bits, pad=True):
+    """``value`` as a ``bits``-wide word: signed decimal in DEC, two's-complement
+    bit pattern (zero-padded to the full width if ``pad``) in the other bases."""
+    if base == "DEC":
+        return format_in_base(value, base)
+    text = format(value & ((1 << bits) - 1), _FORMAT_SPECS[base])
+    return text.zfill(-(-bits // BASE_BITS[base])) if pad else text
+
+
+def parse_in_base(text, base):
+    """Parse an optionally signed digit string in ``base``; raises ValueError like ``int``."""
+    text = text.strip()
+    if base == "DEC" and len(text) > _DIRECT_DIGITS:
+        sign, digits = (-1, text[1:]) if text[:1] == "-" else (1, text.lstrip("+"))
+        if not (digits.isascii() and digits.isdigit()):
+            raise ValueError(f"invalid literal for base {base}: {text[:20]!r}…")
+        return sign * _parse_decimal(digits)
+    return int(text, BASE_RADIX[base])
+
+
+def _aligned(source, target):
+    """Digits of ``target`` per digit of ``source``, if one source digit maps to whole target digits."""
+    if source == target:
+        return 1
+    if source in BASE_BITS and target in BASE_BITS and BASE_BITS[source] % BASE_BITS[target] == 0:
+        return BASE_BITS[source] // BASE_BITS[target]
+    return None
+
+
+class BaseConverter:
+    """Cached conversions of one changing value, updated digit-wise where possible."""
+
+    def __init__(self, bases=("HEX", "DEC", "OCT", "BIN")):
+        self.bases = bases
+        self._value = None
+        self._strings = {}
+        self._parsed = None  # (text, base, value) of the last parse
+
+    def convert(self, value, source_base="DEC"):
+        """``{base: text}`` for ``value``; ``source_base`` is the base being typed in."""
+        old = self._value
+        if value == old:
+            return dict(self._strings)
+        strings = None
+        if old is not None and old > 0 and value >= 0:
+            radix = BASE_RADIX[source_base]
+            quotient, remainder = divmod(value, radix)
+            if quotient == old:
+                strings = self._appended(value, remainder, source_base)
+            elif value == old // radix:
+                strings = self._removed(value, source_base)
+        if strings is None:
+            strings = {base: format_in_base(value, base) for base in self.bases}
+        self._value, self._strings = value, strings
+        return dict(strings)
+
+    def _appended(self, value, digit, source_base):
+        strings = {}
+        for base in self.bases:
+            width = _aligned(source_base, base)
+            if width is None:
+                strings[base] = format_in_base(value, base)
+            else:
+                strings[base] = self._strings[base] + format_in_base(digit, base).zfill(width)
+        return strings
+
+    def _removed(self, value, source_base):
+        strings = {}
+        for base in self.bases:
+            width = _aligned(source_base, base)
+            if width is None:
+                strings[base] = format_in_base(value, base)
+            else:
+                strings[base] = self._strings[base][:-width] or "0"
+        return strings
+
+    def parse(self, text, base):
+        """``parse_in_base``, extending the previous result when one digit was typed or erased."""
+        last = self._parsed
+        if last is not None and last[0] == text and last[1] == base:
+            return last[2]  # Redrawing without a keystroke in between
+        value = None
+        if last is not None and last[1] == base and text not in ("", "-"):
+            last_text, _, last_value = last
+            radix = BASE_RADIX[base]
+            if len(text) == len(last_text) + 1 and text.startswith(last_text) and last_text not in ("", "-"):
+                digit = BASE_DIGITS[base].find(text[-1].upper())
+                if digit < 0:
+                    raise ValueError(f"invalid digit {text[-1]!r} for base {base}")
+                value = last_value * radix + (-digit if last_text[0] == "-" else digit)
+            elif len(text) == len(last_text) - 1 and last_text.startswith(text):
+                magnitude = (-last_value if last_value < 0 else last_value) // radix
+                value = -magnitude if text[0] == "-" else magnitude
+        if value is None:
+            value = parse_in_base(text, base)
+        self._parsed = (text, base, value)
+        return value
@@ -0,0 +1,117 @@
+"""
+Batch evaluator: stream expressions from a file or stdin, one per line, and
+write one result per line to stdout without building the GUI.
+
+    python BatchEval.py expressions.txt
+    python BatchEval.py --mode prog --base HEX --jobs 8 < masks.txt
+    python BatchEval.py --mode prog --base HEX --bits 32 --unsigned < masks.txt
+
+Input is processed as a generator pipeline, so memory stays bounded no matter
+how large the input is. With ``--jobs N`` lines are fanned out to a
+``ParallelEvaluator`` of N workers in fixed-size windows, keeping results in
+input order.
+"""
+import argparse
+import sys
+from functools import partial
+from itertools import islice
+
+from BigNum import format_number
+from CalcEngine import BASE_RADIX, WORD_SIZES, ProgrammerEngine
+from Expression import compile_expression
+from ParallelEval import ParallelEvaluator
+
+
+def evaluate_scientific(line):
+    line = line.strip()
+    if not line:
+        return ""
+    try:
+        return format_number(compile_expression(line).evaluate())
+    except Exception as e:
+        return f"Error: {e}"
+
+
+def evaluate_programmer(line, base="DEC", bits=None, signed=True):
+    line = line.strip()
+    if not line:
+        return ""
+    engine = _programmer_engine(base, bits, signed)
+    try:
+        return engine.format_value(engine.evaluate_line(line), base)
+    except Exception as e:
+        return f"Error: {e}"
+
+
+_ENGINES = {}
+
+
+def _programmer_engine(base, bits=None, signed=True):
+    engine = _ENGINES.get((base, bits, signed))
+    if engine is None:
+        engine = _ENGINES[base, bits, signed] = ProgrammerEngine()
+        engine.set_word_size(bits, signed)
+        engine.change_base(base)
+    return engine
+
+
+def _windows(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        window = list(islice(iterator, size))
+        if not window:
+            return
+        yield window
+
+
+def evaluate_stream(lines, evaluator, jobs=1, chunksize=256):
+    """Yield one result per input line, in order."""
+    if jobs <= 1:
+        yield from map(evaluator, lines)
+        return
+    # submit() drains its input eagerly, so feed it bounded windows instead,
+    # keeping the next window queued while the current one is written out
+    with ParallelEvaluator(max_workers=jobs, chunksize=chunksize) as pool:
+        pending = None
+        for window in _windows(lines, jobs * chunksize * 4):
+            job = pool.submit(window, evaluator=evaluator)
+            if pending is not None:
+                yield from pending
+            pending = job
+        if pending is not None:
+            yield from pending
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Evaluate calculator expressions line by line.")
+    parser.add_argument("input", nargs="?", default="-", help="expression file (default: stdin)")
+    parser.add_argument("-m", "--mode", choices=["sci", "prog"], default="sci")
+    parser.add_argument("--base", choices=list(BASE_RADIX), default="DEC",
+                        help="operand and result base in prog mode")
+    parser.add_argument("--bits", type=int, choices=WORD_SIZES,
+                        help="fixed word size in prog mode (default: unbounded)")
+    parser.add_argument("--unsigned", action="store_true", help="unsigned words with --bits")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="worker processes")
+    parser.add_argument("--chunksize", type=int, default=256, help="lines per worker task")
+    args = parser.parse_args(argv)
+
+    if args.mode == "sci":
+        evaluator = evaluate_scientific
+    else:
+        evaluator = partial(evaluate_programmer, base=args.base, bits=args.bits, signed=not args.unsigned)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    try:
+        out = sys.stdout
+        for result in evaluate_stream(source, evaluator, args.jobs, args.chunksize):
+            out.write(result)
+            out.write("\n")
+    except BrokenPipeError:
+        pass
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+"""
+Benchmark suite for the calculator: startup, theme switching, keypress
+latency, history viewing, basic-mode numeric backends, scientific evaluation
+and base conversion.
+
+    QT_QPA_PLATFORM=offscreen python Benchmark.py --output results.json
+    python Benchmark.py --baseline baseline.json --threshold 0.2
+    python Benchmark.py --only sci_ --save-baseline baseline.json
+
+Each benchmark is timed ``--repeat`` times after one warm-up run and reported
+by its median. With ``--baseline`` the medians are compared against a stored
+result file and the run exits with status 1 when any benchmark is slower than
+its baseline by more than the threshold (``--threshold`` for all,
+``--threshold-for NAME=FRACTION`` per benchmark). Benchmarks that need Qt are
+skipped when PyQt6 is not installed; the offscreen platform is used unless
+``QT_QPA_PLATFORM`` is already set.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCHMARKS = {}  # name -> (setup function, needs Qt)
+
+
+def benchmark(name, qt=False):
+    """Register ``setup``; it returns ``(run, ops)`` where ``run`` is timed.
+
+    ``ops`` is the number of operations one ``run`` performs, used for the
+    per-operation figure. If ``run`` returns a number, that is taken as the
+    sample in seconds instead of the wall time around the call.
+    """
+    def register(setup):
+        BENCHMARKS[name] = (setup, qt)
+        return setup
+    return register
+
+
+_APP = None
+
+
+def _qt_app():
+    global _APP
+    if _APP is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        from PyQt6.QtWidgets import QApplication
+        _APP = QApplication.instance() or QApplication(sys.argv[:1])
+    return _APP
+
+
+def _window(tabs=()):
+    from Calculator import CalculatorApp
+    window = CalculatorApp()
+    for key in tabs:
+        window.calculator(key)
+    window.show()
+    _qt_app().processEvents()
+    return window
+
+
+_STARTUP_SCRIPT = """
+import sys, time
+from Calculator import CalculatorApp, QApplication
+app = QApplication(sys.argv[:1])
+window = CalculatorApp()
+window.show()
+deadline = time.monotonic() + 30
+while window.startup_time is None and time.monotonic() < deadline:
+    app.processEvents()
+print(window.startup_time)
+"""
+
+
+@benchmark("startup_first_paint", qt=True)
+def bench_startup():
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = {**os.environ, "QT_QPA_PLATFORM": os.environ.get("QT_QPA_PLATFORM", "offscreen")}
+
+    def run():
+        # A fresh interpreter each time: import and first-paint cost is only paid once per process
+        output = subprocess.run([sys.executable, "-c", _STARTUP_SCRIPT], cwd=here, env=env,
+                                capture_output=True, text=True, check=True).stdout
+        return float(output.split()[-1])
+    return run, 1
+
+
+@benchmark("theme_switch", qt=True)
+def bench_theme_switch():
+    window = _window(tabs=("basic", "scientific", "programmer"))
+    app = _qt_app()
+
+    def run():
+        window.change_theme("Dark")
+        app.processEvents()
+        window.change_theme("Light")
+        app.processEvents()
+    return run, 2
+
+
+def _keypress_benchmark(tab, keys):
+    def setup():
+        from PyQt6.QtCore import QEvent, Qt
+        from PyQt6.QtGui import QKeyEvent
+        window = _window()
+        window.tabs.setCurrentIndex([key for _, key in window.TABS].index(tab))
+        calculator = window.calculator(tab)
+        app = _qt_app()
+        events = [QKeyEvent(QEvent.Type.KeyPress, getattr(Qt.Key, key), Qt.KeyboardModifier.NoModifier, text)
+                  for key, text in keys]
+
+        def run():
+            for event in events:
+                app.sendEvent(calculator, event)
+                app.processEvents()  # Include the display repaint
+        return run, len(events)
+    return setup
+
+
+_ENTRY_KEYS = [("Key_1", "1"), ("Key_2", "2"), ("Key_Plus", "+"), ("Key_3", "3"), ("Key_4", "4"),
+               ("Key_Backspace", "")]
+benchmark("keypress_basic", qt=True)(_keypress_benchmark("basic", _ENTRY_KEYS + [("Key_Escape", "")]))
+benchmark("keypress_scientific", qt=True)(_keypress_benchmark("scientific", _ENTRY_KEYS + [("Key_Escape", "")]))
+benchmark("keypress_programmer", qt=True)(_keypress_benchmark("programmer", _ENTRY_KEYS + [("Key_Escape", "")]))
+
+
+def _history_dialog_benchmark(entries):
+    def setup():
+        from Calculator import HistoryDialog
+        from History import HistoryStore
+        app = _qt_app()
+        store = HistoryStore(max_records=entries, max_file_bytes=entries * 512)  # Byte cap never evicts
+        for i in range(entries):
+            store.add("basic", "+", (i, i + 1), 2 * i + 1)
+        view = store.view("basic")
+        assert len(view) == entries
+
+        def run():
+            dialog = HistoryDialog(view)
+            dialog.show()
+            app.processEvents()
+            dialog.done(0)
+        return run, 1
+    return setup
+
+
+benchmark("history_dialog_10k", qt=True)(_history_dialog_benchmark(10_000))
+benchmark("history_dialog_100k", qt=True)(_history_dialog_benchmark(100_000))
+
+_SCI_EXPRESSIONS = [f"sin({i % 360}) * {i} + sqrt({i}) / 3 - {i % 7}**2" for i in range(10_000)]
+
+
+@benchmark("sci_evaluate_compiled")
+def bench_sci_compiled():
+    from Expression import compile_expression
+    compiled = [compile_expression(text) for text in _SCI_EXPRESSIONS]
+
+    def run():
+        for expression in compiled:
+            expression.evaluate()
+    return run, len(compiled)
+
+
+@benchmark("sci_compile_and_evaluate")
+def bench_sci_compile():
+    from Expression import compile_expression
+
+    def run():
+        compile_expression.cache_clear()  # Every line tokenized and parsed again
+        for text in _SCI_EXPRESSIONS:
+            compile_expression(text).evaluate()
+    return run, len(_SCI_EXPRESSIONS)
+
+
+@benchmark("sci_preview_keystroke")
+def bench_sci_preview():
+    from CalcEngine import ScientificEngine
+    from History import HistoryStore
+    engine = ScientificEngine(HistoryStore(max_records=1).view("scientific"))
+    engine.expression = "+".join(f"sin({i})*{i}**2" for i in range(60))
+    engine.begin_preview()
+
+    def run():
+        for key in ("+", "7", "⌫", "⌫"):  # Live preview after every keystroke at the end of a long line
+            engine.press(key)
+            engine.begin_preview()
+    return run, 4
+
+
+def _big_result_benchmark(text):
+    def setup():
+        from BigNum import format_number
+        from Expression import compile_expression
+        compiled = compile_expression(text)
+
+        def run():
+            format_number(compiled.evaluate())  # Exact integer, then its display text
+        return run, 1
+    return setup
+
+
+benchmark("sci_big_factorial_200k")(_big_result_benchmark("factorial(200000)"))
+benchmark("sci_big_power_10m_bits")(_big_result_benchmark("2**10**7"))
+
+
+def _precise_benchmark(*digits):
+    def setup():
+        from Precision import clear_caches, evaluate_precise
+
+        def run():
+            clear_caches()
+            for n in digits:  # Later, wider requests refine the earlier ones
+                evaluate_precise("sin(1) + atan(2) * ln(3) / sqrt(5)", n)
+        return run, len(digits)
+    return setup
+
+
+benchmark("sci_precise_100_digits")(_precise_benchmark(100))
+benchmark("sci_precise_refine_to_2000_digits")(_precise_benchmark(250, 500, 1000, 2000))
+
+
+def _conversion_benchmark(bits):
+    def setup():
+        from BaseConverter import format_in_base
+        value = (1 << bits) - 12345
+
+        def run():
+            for base in ("HEX", "DEC", "OCT", "BIN"):
+                format_in_base(value, base)
+        return run, 4
+    return setup
+
+
+def _keystroke_conversion_benchmark(bits, base="HEX"):
+    def setup():
+        from BaseConverter import format_in_base
+        from CalcEngine import ProgrammerEngine
+        engine = ProgrammerEngine()
+        engine.change_base(base)
+        engine.input_str = format_in_base((1 << bits) - 12345, base)
+        engine.conversions()
+
+        def run():
+            engine.press("7")  # Type a digit and erase it, refreshing the labels each time
+            engine.conversions()
+            engine.press("⌫")
+            engine.conversions()
+        return run, 2
+    return setup
+
+
+benchmark("prog_conversion_1k_bits")(_conversion_benchmark(1024))
+benchmark("prog_conversion_8k_bits")(_conversion_benchmark(8192))
+benchmark("prog_conversion_64k_bits")(_conversion_benchmark(65536))
+benchmark("prog_keystroke_64k_bits")(_keystroke_conversion_benchmark(65536))
+benchmark("prog_keystroke_64k_bits_dec")(_keystroke_conversion_benchmark(65536, "DEC"))
+
+
+def _basic_chain_benchmark(backend, presses):
+    def setup():
+        from CalcEngine import BasicEngine
+        from History import HistoryStore
+        engine = BasicEngine(HistoryStore(max_records=presses).view("basic"))
+        engine.set_backend(backend)
+        keys = "+0.1" * presses + "="
+
+        def run():
+            engine.press("C")
+            for key in keys:  # A long running total: "+ 0.1" repeated, then "="
+                engine.press(key)
+        return run, presses
+    return setup
+
+
+benchmark("basic_chain_float")(_basic_chain_benchmark("float", 1000))
+benchmark("basic_chain_decimal")(_basic_chain_benchmark("decimal", 1000))
+benchmark("basic_chain_fraction")(_basic_chain_benchmark("fraction", 1000))
+
+
+def run_benchmark(name, repeat):
+    setup, _ = BENCHMARKS[name]
+    run, ops = setup()
+    run()  # Warm-up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        measured = run()
+        elapsed = time.perf_counter() - started
+        samples.append(measured if isinstance(measured, (int, float)) else elapsed)
+    median = statistics.median(samples)
+    return {"runs": repeat, "min": min(samples), "median": median,
+            "mean": statistics.fmean(samples), "ops": ops, "per_op": median / ops}
+
+
+def compare(results, baseline, threshold, overrides=None):
+    """Rows of (name, median, baseline median, change, regressed) for shared benchmarks."""
+    overrides = overrides or {}
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        change = result["median"] / base["median"] - 1 if base["median"] else 0.0
+        rows.append((name, result["median"], base["median"], change, change > overrides.get(name, threshold)))
+    return rows
+
+
+def _parse_override(text):
+    name, _, fraction = text.partition("=")
+    return name, float(fraction)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the calculator benchmarks.")
+    parser.add_argument("--only", action="append", default=[],
+                        help="run benchmarks whose name starts with this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results to compare against")
+    parser.add_argument("--save-baseline", help="also write the results here as the new baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="allowed slowdown as a fraction of the baseline median")
+    parser.add_argument("--threshold-for", action="append", default=[], type=_parse_override,
+                        metavar="NAME=FRACTION", help="per-benchmark threshold")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        return 0
+
+    # Keep benchmark windows away from the user's real history file
+    history_dir = tempfile.TemporaryDirectory()
+    os.environ["CALCULATOR_HISTORY"] = os.path.join(history_dir.name, "history.jsonl")
+
+    have_qt = importlib.util.find_spec("PyQt6") is not None
+    results = {}
+    for name, (_, needs_qt) in BENCHMARKS.items():
+        if args.only and not any(name.startswith(prefix) for prefix in args.only):
+            continue
+        if needs_qt and not have_qt:
+            print(f"{name:<28} skipped (PyQt6 not installed)")
+            continue
+        results[name] = result = run_benchmark(name, args.repeat)
+        print(f"{name:<28} {result['median'] * 1000:10.3f} ms  ({result['per_op'] * 1e6:.2f} µs/op)")
+
+    document = {"python": platform.python_version(), "platform": platform.platform(),
+                "timestamp": time.time(), "results": results}
+    for path in filter(None, (args.output, args.save_baseline)):
+        with open(path, "w", encoding="utf-8") as out:
+            json.dump(document, out, indent=2)
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as source:
+            baseline = json.load(source)["results"]
+        print()
+        for name, median, base, change, regressed in compare(results, baseline, args.threshold,
+                                                             dict(args.threshold_for)):
+            verdict = "REGRESSION" if regressed else "ok"
+            print(f"{name:<28} {median * 1000:10.3f} ms  baseline {base * 1000:10.3f} ms  {change:+7.1%}  {verdict}")
+            if regressed:
+                status = 1
+    history_dir.cleanup()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
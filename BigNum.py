@@ -0,0 +1,124 @@
+"""
+Huge integer results for the scientific calculator.
+
+``factorial(200000)`` and ``2**10**7`` are exact integers millions of digits
+long. They stay exact here, with three safeguards:
+
+* Sizes are estimated before anything is computed (``lgamma`` for factorials,
+  ``exponent * log2(base)`` for powers), so ``9**9**9`` fails at once with
+  ``ResultTooLarge`` instead of exhausting memory. The limit is
+  ``MAX_BITS``.
+* Large factorials use the prime-swing algorithm: ``n! = ((n//2)!)**2 *
+  swing(n)``, with ``swing(n)`` a balanced product of prime powers. The
+  squarings and the few, evenly sized multiplications beat the C product
+  in ``math.factorial`` once ``n`` reaches a few tens of thousands.
+* ``format_number`` displays an integer too big for a float from its
+  logarithm (exponent and leading digits), never converting the whole value
+  to a decimal string, which is quadratic in CPython.
+"""
+import decimal
+import math
+import operator
+from decimal import Decimal
+
+MAX_BITS = 1 << 24  # About 5 million decimal digits, 2 MiB per value
+_SWING_THRESHOLD = 40_000  # Below this math.factorial is faster
+_FLOAT_BITS = 1000  # Integers up to this size format through float as before
+
+
+class ResultTooLarge(OverflowError):
+    """Raised instead of computing an integer over ``MAX_BITS`` bits."""
+
+
+def _check_bits(bits, what):
+    if bits > MAX_BITS:
+        raise ResultTooLarge(f"{what} would have about {bits * math.log10(2):,.0f} digits; "
+                             f"the limit is {MAX_BITS * math.log10(2):,.0f}")
+
+
+def power(base, exponent, modulus=None):
+    """``base ** exponent``, or ``pow`` with a modulus, refusing integer results over ``MAX_BITS``."""
+    if modulus is not None:
+        return pow(base, exponent, modulus)
+    if type(base) is int and type(exponent) is int and exponent > 1 and abs(base) > 1:
+        _check_bits(exponent * math.log2(abs(base)), "The power")
+    return base ** exponent
+
+
+def _primes(limit):
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[:2] = b"\0\0"
+    for i in range(2, math.isqrt(limit) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytes(len(range(i * i, limit + 1, i)))
+    return [i for i, is_prime in enumerate(sieve) if is_prime]
+
+
+def _product(values, low, high):
+    if high - low <= 16:
+        result = 1
+        for value in values[low:high]:
+            result *= value
+        return result
+    middle = (low + high) // 2
+    return _product(values, low, middle) * _product(values, middle, high)
+
+
+def _swing(n, primes):
+    """n! / ((n//2)!)**2, from the prime factorisation of the swinging factorial."""
+    factors = []
+    root = math.isqrt(n)
+    for p in primes:
+        if p > n:
+            break
+        if p > n // 2:
+            factors.append(p)
+        elif p > root:
+            if (n // p) & 1:
+                factors.append(p)
+        else:
+            q, exponent = n, 0
+            while q:
+                q //= p
+                exponent += q & 1
+            if exponent:
+                factors.append(p ** exponent)
+    return _product(factors, 0, len(factors))
+
+
+def _prime_swing_factorial(n, primes):
+    if n < _SWING_THRESHOLD:
+        return math.factorial(n)
+    return _prime_swing_factorial(n // 2, primes) ** 2 * _swing(n, primes)
+
+
+def factorial(n):
+    """``n!`` for a non-negative integer ``n``, refusing results over ``MAX_BITS``."""
+    n = operator.index(n)
+    if n < 0:
+        raise ValueError("factorial() not defined for negative values")
+    if n < _SWING_THRESHOLD:
+        return math.factorial(n)
+    _check_bits(math.lgamma(n + 1) / math.log(2), f"factorial({n})")
+    return _prime_swing_factorial(n, _primes(n))
+
+
+def format_number(value, digits=10):
+    """``value`` formatted like ``f"{value:.10g}"``.
+
+    Integers too big for a float are shown as ``d.ddde+N`` from their
+    base-10 logarithm, computed from the top bits and the bit length.
+    """
+    if type(value) is not int or value.bit_length() <= _FLOAT_BITS:
+        return f"{value:.{digits}g}"
+    sign = "-" if value < 0 else ""
+    value = abs(value)
+    shift = value.bit_length() - 128
+    context = decimal.Context(prec=digits + 30 + len(str(shift)))
+    log10 = context.add(Decimal(value >> shift).log10(context),
+                        context.multiply(shift, Decimal(2).log10(context)))
+    exponent = int(log10.to_integral_value(rounding=decimal.ROUND_FLOOR))
+    mantissa = decimal.Context(prec=digits).plus(context.power(10, context.subtract(log10, exponent)))
+    if mantissa >= 10:  # Rounded up to the next power of ten
+        mantissa, exponent = Decimal(1), exponent + 1
+    return f"{sign}{mantissa.normalize():f}e+{exponent}"
@@ -0,0 +1,187 @@
+"""
+Bulk bitwise operations over binary files, word by word.
+
+Applies one of the programmer tab's bitwise operations to every word of an
+input file, against a constant or against the matching words of a second file,
+and writes the result to an output file:
+
+    python BulkOps.py XOR firmware.bin masked.bin --value 0xDEADBEEF --width 32
+    python BulkOps.py AND image.bin out.bin --with mask.bin
+    python BulkOps.py NOT image.bin inverted.bin
+
+Inputs are memory-mapped and processed in fixed-size chunks, so memory use
+stays flat for multi-gigabyte images. With NumPy each chunk is viewed in place
+as an array of words (no copy) and the result is computed into a reused buffer
+that is written straight out. Without NumPy, and for 128-bit words, AND/OR/XOR/
+NOT run on whole chunks as single big integers via ``int.from_bytes``; shifts
+then fall back to a per-word loop.
+
+Shifts are per word and logical: bits shifted past the word edge are dropped.
+A trailing partial word is padded with zero bytes for the computation and
+written back at its original length.
+"""
+import argparse
+import mmap
+import operator
+import os
+
+from CalcEngine import WORD_SIZES
+
+BULK_OPS = ("AND", "OR", "XOR", "NOT", "Lsh", "Rsh")
+DEFAULT_CHUNK_SIZE = 16 * 1024 * 1024
+
+_INT_OPS = {"AND": operator.and_, "OR": operator.or_, "XOR": operator.xor}
+
+
+def _numpy_kernel(np, op, width, byteorder, value, chunk_size):
+    if op in ("Lsh", "Rsh"):
+        dtype = np.dtype(f"{'<' if byteorder == 'little' else '>'}u{width // 8}")
+    else:
+        dtype = np.dtype(f"=u{width // 8}")  # Bitwise ops don't care about byte order
+    buffer = np.empty(chunk_size // dtype.itemsize, dtype)
+    ufunc = {"AND": np.bitwise_and, "OR": np.bitwise_or, "XOR": np.bitwise_xor,
+             "Lsh": np.left_shift, "Rsh": np.right_shift}.get(op)
+    if op in ("Lsh", "Rsh"):
+        constant = dtype.type(min(value, width - 1))
+    elif value is not None:
+        pattern = (value & ((1 << width) - 1)).to_bytes(width // 8, byteorder)
+        constant = np.frombuffer(pattern, dtype)[0]
+
+    def kernel(chunk, other):
+        words = np.frombuffer(chunk, dtype)
+        out = buffer[:len(words)]
+        if op == "NOT":
+            return np.invert(words, out=out)
+        if op in ("Lsh", "Rsh") and value >= width:
+            out.fill(0)
+            return out
+        operand = np.frombuffer(other, dtype) if other is not None else constant
+        return ufunc(words, operand, out=out)
+    return kernel
+
+
+def _int_kernel(op, width, byteorder, value):
+    size = width // 8
+    mask = (1 << width) - 1
+    blocks = {}  # chunk length -> the constant repeated over it, as one integer
+
+    def constant_block(length):
+        block = blocks.get(length)
+        if block is None:
+            pattern = (value & mask).to_bytes(size, byteorder) * (length // size)
+            block = blocks[length] = int.from_bytes(pattern, "little")
+        return block
+
+    def kernel(chunk, other):
+        length = len(chunk)
+        if op in ("Lsh", "Rsh"):
+            shift = (lambda word: (word << value) & mask) if op == "Lsh" else (lambda word: word >> value)
+            return b"".join(shift(int.from_bytes(chunk[i:i + size], byteorder)).to_bytes(size, byteorder)
+                            for i in range(0, length, size))
+        words = int.from_bytes(chunk, "little")
+        if op == "NOT":
+            result = words ^ ((1 << (8 * length)) - 1)
+        else:
+            operand = int.from_bytes(other, "little") if other is not None else constant_block(length)
+            result = _INT_OPS[op](words, operand)
+        return result.to_bytes(length, "little")
+    return kernel
+
+
+def _kernel(op, width, byteorder, value, chunk_size):
+    if width <= 64:
+        try:
+            import numpy
+        except ImportError:
+            pass
+        else:
+            return _numpy_kernel(numpy, op, width, byteorder, value, chunk_size)
+    return _int_kernel(op, width, byteorder, value)
+
+
+def _padded(chunk, size):
+    pad = -len(chunk) % size
+    return bytes(chunk) + bytes(pad) if pad else chunk
+
+
+def bulk_apply(op, source, output, value=None, other=None, width=8, byteorder="little",
+               chunk_size=DEFAULT_CHUNK_SIZE):
+    """Apply ``op`` to every ``width``-bit word of ``source``, writing ``output``.
+
+    AND/OR/XOR take either a constant ``value`` or a second file ``other`` at
+    least as long as ``source``; Lsh/Rsh take a shift count ``value``; NOT
+    takes neither. Returns the number of bytes written.
+    """
+    if op not in BULK_OPS:
+        raise ValueError(f"Unsupported bulk operation: {op}")
+    if width not in WORD_SIZES:
+        raise ValueError(f"Unsupported word size: {width}")
+    if op in ("Lsh", "Rsh"):
+        if value is None or value < 0 or other is not None:
+            raise ValueError(f"{op} needs a non-negative shift count")
+    elif op != "NOT" and (value is None) == (other is None):
+        raise ValueError(f"{op} needs exactly one of a constant or a second file")
+    if os.path.abspath(output) in {os.path.abspath(source), other and os.path.abspath(other)}:
+        raise ValueError("Output must be a different file from the inputs")
+    size = width // 8
+    chunk_size = max(size, chunk_size - chunk_size % size)
+
+    with open(source, "rb") as src, open(output, "wb") as out:
+        length = os.fstat(src.fileno()).st_size
+        if length == 0:
+            return 0
+        second = open(other, "rb") if other is not None else None
+        try:
+            if second is not None and os.fstat(second.fileno()).st_size < length:
+                raise ValueError(f"{other} is shorter than {source}")
+            data = mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ)
+            other_data = mmap.mmap(second.fileno(), 0, access=mmap.ACCESS_READ) if second else None
+            kernel = _kernel(op, width, byteorder, value, chunk_size)
+            view = memoryview(data)
+            other_view = memoryview(other_data) if other_data is not None else None
+            try:
+                for start in range(0, length, chunk_size):
+                    end = min(start + chunk_size, length)
+                    with view[start:end] as chunk, (other_view or view)[start:end] as paired:
+                        other_chunk = paired if other_view is not None else None
+                        if len(chunk) % size:  # Trailing partial word
+                            if other_chunk is not None:
+                                other_chunk = _padded(other_chunk, size)
+                            out.write(memoryview(kernel(_padded(chunk, size), other_chunk)).tobytes()[:len(chunk)])
+                        else:
+                            out.write(kernel(chunk, other_chunk))
+            finally:
+                # Views into a mmap must all be released before it can close
+                view.release()
+                data.close()
+                if other_view is not None:
+                    other_view.release()
+                    other_data.close()
+        finally:
+            if second is not None:
+                second.close()
+    return length
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply a bitwise operation to every word of a file.")
+    parser.add_argument("op", choices=BULK_OPS)
+    parser.add_argument("input")
+    parser.add_argument("output")
+    operand = parser.add_mutually_exclusive_group()
+    operand.add_argument("--value", type=lambda text: int(text, 0),
+                         help="constant operand or shift count (0x.., 0b.., 0o.. accepted)")
+    operand.add_argument("--with", dest="other", help="file supplying the second operand word by word")
+    parser.add_argument("--width", type=int, choices=WORD_SIZES, default=8, help="word size in bits")
+    parser.add_argument("--byteorder", choices=["little", "big"], default="little")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="bytes per chunk")
+    args = parser.parse_args(argv)
+    try:
+        bulk_apply(args.op, args.input, args.output, value=args.value, other=args.other,
+                   width=args.width, byteorder=args.byteorder, chunk_size=args.chunk_size)
+    except (OSError, ValueError) as e:
+        parser.exit(1, f"{parser.prog}: error: {e}\n")
+
+
+if __name__ == "__main__":
+    main()
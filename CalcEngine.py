@@ -0,0 +1,640 @@
+"""
+Headless calculation engines behind the calculator tabs.
+
+Each engine holds the arithmetic state of one tab and a ``commands`` registry
+mapping every button/key id (the button text) to an ``Action`` with a direct
+handler. The PyQt6 widgets in Calculator.py bind their buttons and keys to
+those actions and only render ``display_text``; scripts call ``press(key)`` or
+``execute(action)`` without any Qt signal involved. Nothing here imports PyQt6;
+the engines can be driven directly from scripts, services and benchmarks.
+"""
+import logging
+from dataclasses import dataclass
+from functools import partial
+
+from BigNum import ResultTooLarge, format_number
+from BaseConverter import BASE_DIGITS, BASE_RADIX, BaseConverter, format_in_base, format_word
+from Expression import (ANGLE_MODES, RESULT_CACHE, CompiledExpression, ExpressionError, IncrementalParser, cache_key,
+                        compile_expression)
+from History import HistoryStore
+from Metrics import METRICS
+from Numeric import FLOAT, DecimalBackend, make_backend
+from Precision import MAX_DIGITS, evaluate_precise
+from ProgrammerExpression import compile_program, rebase
+
+log = logging.getLogger(__name__)
+
+
+PROGRAMMER_OPS = ['AND', 'OR', 'XOR', 'MOD', 'Lsh', 'Rsh', '+', '-', '*', '/']
+WORD_SIZES = (8, 16, 32, 64, 128)  # None means unbounded integers
+
+
+@dataclass(frozen=True, slots=True)
+class Action:
+    """A command bound to a button or key; ``handler`` runs it with no arguments."""
+    id: str
+    kind: str  # "digit", "operator", "function", "edit" or "evaluate"
+    handler: object
+
+
+class _CommandEngine:
+    def press(self, text):
+        """Run the command for button/key ``text``; unknown keys are ignored."""
+        action = self.commands.get(text)
+        if action is not None:
+            self.execute(action)
+
+    def execute(self, action):
+        action.handler()
+
+
+class BasicEngine(_CommandEngine):
+    """Four-function calculator with a single pending operation."""
+
+    def __init__(self, history=None):
+        self.current_input = ""
+        self.stored_value = None
+        self.current_operation = None
+        self.reset_input_on_next_digit = False
+        self.expression_preview_text = ""
+        self.backend = FLOAT  # Parses, computes and formats numbers; see Numeric
+        self.history = history if history is not None else HistoryStore().view("basic")
+        self.commands = self._build_commands()
+
+    def _build_commands(self):
+        commands = {digit: Action(digit, "digit", partial(self.input_digit, digit)) for digit in "0123456789"}
+        commands['.'] = Action('.', "digit", self.input_point)
+        for op in '+-*/':
+            commands[op] = Action(op, "operator", partial(self.apply_operator, op))
+        commands['='] = Action('=', "evaluate", self.equals)
+        commands['C'] = Action('C', "edit", self.clear)
+        commands['CE'] = Action('CE', "edit", self.clear_entry)
+        commands['⌫'] = Action('⌫', "edit", self.backspace)
+        commands['±'] = Action('±', "edit", self.toggle_sign)
+        return commands
+
+    @property
+    def display_text(self):
+        return self.current_input if self.current_input else "0"
+
+    def set_backend(self, name, **options):
+        """Switch to the ``"float"``, ``"decimal"`` or ``"fraction"`` backend, converting the values held."""
+        backend = make_backend(name, **options)
+        if self.stored_value is not None:
+            try:
+                self.stored_value = backend.convert(self.stored_value)
+            except (ValueError, ArithmeticError):  # inf or nan has no Fraction (or finite Decimal) form
+                self.stored_value = None
+                self.current_operation = None
+                self.expression_preview_text = ""
+        if self.current_input:
+            try:
+                self.current_input = backend.format(backend.convert(self.backend.parse(self.current_input)))
+            except (ValueError, ArithmeticError):
+                pass  # An error message or partial entry stays as typed
+        self.backend = backend
+        if self.stored_value is not None and self.current_operation:
+            self.expression_preview_text = f"{backend.format(self.stored_value)} {self.current_operation} "
+
+    def perform_calculation(self, val1, val2, op):
+        try:
+            return self.backend.calculate(val1, val2, op)
+        except Exception:
+            return "Error"
+
+    def execute(self, action):
+        try:
+            action.handler()
+        except ValueError:
+            self.current_input = "Error: Invalid Input"; self.reset_input_on_next_digit = True
+        except Exception as e:
+            log.warning("BasicCalc error: %s", e); self.current_input = "Error"; self.reset_input_on_next_digit = True
+
+    def input_digit(self, digit):
+        if self.reset_input_on_next_digit: self.current_input = ""; self.reset_input_on_next_digit = False
+        if self.current_input == "0" and digit != "0":
+            self.current_input = digit
+        elif self.current_input == "0" and digit == "0":
+            pass
+        else:
+            self.current_input += digit
+
+    def input_point(self):
+        if self.reset_input_on_next_digit: self.current_input = "0"; self.reset_input_on_next_digit = False
+        if not self.current_input: self.current_input = "0"
+        if '.' not in self.current_input: self.current_input += '.'
+
+    def apply_operator(self, op):
+        if self.current_input:
+            val_current = self.backend.parse(self.current_input)
+            if self.stored_value is not None and self.current_operation:
+                result = self.perform_calculation(self.stored_value, val_current, self.current_operation)
+                if isinstance(result, str) and "Error" in result:
+                    self.expression_preview_text = ""
+                    self.current_input = result
+                    self.stored_value = None
+                    self.current_operation = None
+                    self.reset_input_on_next_digit = True
+                else:
+                    self.history.add(self.current_operation, (self.backend.format(self.stored_value),
+                                                              self.backend.format(val_current)),
+                                     self.backend.format(result))
+                    self.stored_value = result
+            else:
+                self.stored_value = val_current
+            self.current_operation = op
+            self.expression_preview_text = f"{self.backend.format(self.stored_value)} {self.current_operation} "
+            self.current_input = ""
+            self.reset_input_on_next_digit = False
+        elif self.stored_value is not None:
+            self.current_operation = op
+            self.expression_preview_text = f"{self.backend.format(self.stored_value)} {self.current_operation} "
+            self.current_input = ""
+            self.reset_input_on_next_digit = False
+
+    def equals(self):
+        if self.stored_value is not None and self.current_operation and self.current_input:
+            val_current = self.backend.parse(self.current_input)
+            stored_text, current_text = self.backend.format(self.stored_value), self.backend.format(val_current)
+            full_expr = f"{stored_text} {self.current_operation} {current_text}"
+            result = self.perform_calculation(self.stored_value, val_current, self.current_operation)
+            if isinstance(result, str) and "Error" in result:
+                self.current_input = result
+                self.expression_preview_text = f"{full_expr} ="
+                self.stored_value = None
+                self.current_operation = None
+            else:
+                self.current_input = self.backend.format(result)
+                self.history.add(self.current_operation, (stored_text, current_text), self.current_input)
+                self.expression_preview_text = f"{full_expr} ="
+                self.stored_value = result
+                self.current_operation = None
+            self.reset_input_on_next_digit = True
+
+    def clear(self):
+        self.current_input = ""
+        self.stored_value = None
+        self.current_operation = None
+        self.expression_preview_text = ""
+        self.reset_input_on_next_digit = False
+
+    def clear_entry(self):
+        if self.reset_input_on_next_digit and self.current_operation is None:
+            self.clear()
+        else:
+            self.current_input = ""; self.reset_input_on_next_digit = False
+
+    def backspace(self):
+        if self.reset_input_on_next_digit:
+            self.current_input = ""; self.reset_input_on_next_digit = False
+        elif self.current_input:
+            self.current_input = self.current_input[:-1]
+
+    def toggle_sign(self):
+        if self.current_input and self.current_input != "0":
+            if self.current_input.startswith('-'):
+                self.current_input = self.current_input[1:]
+            else:
+                self.current_input = '-' + self.current_input
+        elif self.stored_value is not None and self.current_operation is None:
+            self.stored_value = -self.stored_value
+            self.current_input = self.backend.format(self.stored_value)
+            self.reset_input_on_next_digit = True
+
+
+# Scientific buttons that just append text to the expression
+_SCIENTIFIC_INSERTS = {
+    **{key: ("digit", key) for key in "0123456789.πe"},
+    **{key: ("operator", key) for key in "+-*/%()"},
+    'x²': ("operator", "**2"), 'x³': ("operator", "**3"), 'x^y': ("operator", "**"),
+    'log': ("function", "log10("), 'ln': ("function", "ln("), '√': ("function", "sqrt("),
+    '∛': ("function", "cbrt("), 'asin': ("function", "asin("), 'acos': ("function", "acos("),
+    'atan': ("function", "atan("), 'sin': ("function", "sin("), 'cos': ("function", "cos("),
+    'tan': ("function", "tan("),
+}
+
+
+class ScientificEngine(_CommandEngine):
+    """Free-form expression entry evaluated through the Expression engine."""
+
+    def __init__(self, history=None):
+        self.expression = ""
+        self.angle_mode = "RAD"  # Applied when compiling, so the expression text never changes with it
+        self.precision = None  # Significant digits for precise evaluation, or None for floats
+        self.last_precise = None  # (source, digits, text shown) of the last precise result, for 'More'
+        self.preview_parser = IncrementalParser()  # Reparses only what changed between keystrokes
+        self.history = history if history is not None else HistoryStore().view("scientific")
+        self.commands = self._build_commands()
+
+    def _build_commands(self):
+        commands = {key: Action(key, kind, partial(self.insert, text))
+                    for key, (kind, text) in _SCIENTIFIC_INSERTS.items()}
+        commands['='] = Action('=', "evaluate", self.evaluate)
+        commands['More'] = Action('More', "evaluate", partial(self.evaluate, refine=True))
+        commands['C'] = Action('C', "edit", self.clear)
+        commands['CE'] = Action('CE', "edit", self.clear)  # CE simplified to clear all
+        commands['⌫'] = Action('⌫', "edit", self.backspace)
+        commands['±'] = Action('±', "edit", self.toggle_sign)
+        return commands
+
+    @property
+    def display_text(self):
+        return self.expression if self.expression else "0"
+
+    def execute(self, action):
+        try:
+            action.handler()
+        except Exception as e:
+            self.fail_evaluation(e)
+
+    def insert(self, text):
+        self.expression += text
+
+    def clear(self):
+        self.expression = ""
+
+    def backspace(self):
+        self.expression = self.expression[:-1]
+
+    def set_angle_mode(self, angle_mode):
+        """``"RAD"`` or ``"DEG"``; the next evaluation recompiles the expression for it."""
+        if angle_mode not in ANGLE_MODES:
+            raise ValueError(f"Unknown angle mode: {angle_mode}")
+        self.angle_mode = angle_mode
+
+    def set_precision(self, digits):
+        """Evaluate to ``digits`` significant digits in decimal arithmetic, or with floats for None."""
+        if digits is not None and not 1 <= digits <= MAX_DIGITS:
+            raise ValueError(f"Digits must be between 1 and {MAX_DIGITS}")
+        self.precision = digits
+
+    def evaluate(self, refine=False):
+        compiled, digits, result = self.begin_evaluation(refine)
+        if compiled is not None:
+            if result is None:
+                with METRICS.span("sci.evaluate"):
+                    result = (compiled.evaluate() if digits is None
+                              else evaluate_precise(compiled.source, digits, compiled.angle_mode))
+            self.complete_evaluation(compiled, result, digits)
+
+    def begin_evaluation(self, refine=False):
+        """Compile the expression for '=', or with ``refine`` the last precise result's at twice the digits.
+
+        Returns ``(compiled, digits, cached_result)``; ``digits`` is None for
+        float evaluation, and the result is None on a cache miss, leaving the
+        caller free to evaluate synchronously or off-thread.
+        """
+        if refine:
+            if self.last_precise is None or self.last_precise[2] != self.expression:
+                return None, None, None  # Only the precise result on display can be refined
+            text, digits, _ = self.last_precise
+            digits = min(2 * digits, MAX_DIGITS)
+        else:
+            text, digits = self.expression, self.precision
+        if not text:
+            return None, None, None
+        with METRICS.span("sci.compile"):
+            compiled = compile_expression(text, (), self.angle_mode)
+        log.debug("Evaluating (Sci): %s", compiled.source)
+        return compiled, digits, RESULT_CACHE.get(self._cache_key(compiled, digits))
+
+    @staticmethod
+    def _cache_key(compiled, digits):
+        return cache_key(compiled, digits)
+
+    def complete_evaluation(self, compiled, result, digits=None):
+        RESULT_CACHE.put(self._cache_key(compiled, digits), result)
+        self.expression = self._format_result(result, digits)
+        self.last_precise = (compiled.source, digits, self.expression) if digits is not None else None
+        self.history.add("=", (compiled.source,), self.expression)
+
+    @staticmethod
+    def _format_result(result, digits):
+        return format_number(result) if digits is None else DecimalBackend(precision=digits).format(result)
+
+    def begin_preview(self):
+        """Parse the expression as typed, for the live result preview.
+
+        Returns ``(compiled, digits, text)``. ``text`` is the preview when the
+        result was cached or cheap to compute. Otherwise ``compiled`` is set
+        and the caller evaluates it (once input pauses, off-thread) and hands
+        the result to ``complete_preview``. Nothing is shown for input that
+        does not parse yet or is a bare number.
+        """
+        try:
+            tree = self.preview_parser.update(self.expression)
+            if tree[0] == "num":
+                return None, None, ""
+            compiled = CompiledExpression(self.expression, tree, angle_mode=self.angle_mode)
+            slow = compiled.may_be_slow
+        except Exception:  # Incomplete input, or nested too deeply to compile (SyntaxError, RecursionError)
+            return None, None, ""
+        digits = self.precision
+        cached = RESULT_CACHE.peek(self._cache_key(compiled, digits))  # Keystrokes don't skew the stats
+        if cached is not None:
+            return None, None, self._preview_text(cached, digits)
+        if digits is not None or slow:
+            return compiled, digits, ""
+        try:
+            return None, None, self.complete_preview(compiled, compiled.evaluate())
+        except Exception:
+            return None, None, ""  # e.g. a division by zero part-way through typing
+
+    def complete_preview(self, compiled, result, digits=None):
+        """Cache a preview result (so '=' is instant) and return its preview text."""
+        RESULT_CACHE.put(self._cache_key(compiled, digits), result)
+        return self._preview_text(result, digits)
+
+    def _preview_text(self, result, digits):
+        return f"= {self._format_result(result, digits)}"
+
+    def fail_evaluation(self, error, message="Error"):
+        if isinstance(error, ResultTooLarge):
+            message = "Error: Too large"
+        log.warning("ScientificCalc error: %s (expression was %r)", error, self.expression)
+        self.expression = message
+
+    def toggle_sign(self):
+        if self.expression and self.expression.lstrip('-').replace('.', '', 1).isdigit():
+            if self.expression.startswith('-'):
+                self.expression = self.expression[1:]
+            else:
+                self.expression = '-' + self.expression
+        elif self.expression and not self.expression.startswith("-("):  # Add negation to whole expression
+            self.expression = f"-({self.expression})"
+        elif self.expression.startswith("-("):  # Remove negation
+            self.expression = self.expression[2:-1]
+
+
+class ProgrammerEngine(_CommandEngine):
+    """Integer calculator with base conversion and bitwise operations."""
+
+    def __init__(self, history=None):
+        self.current_value_int = 0
+        self.input_str = "0"
+        self.display_base = "DEC"
+        self.stored_value_int = None
+        self.pending_operation = None
+        self.expression = None  # Text being entered once '(' is pressed; '=' compiles and runs it
+        self.word_size = None  # Bits per word, or None for unbounded integers
+        self.signed = True
+        self.converter = BaseConverter()  # Caches the conversion labels between keystrokes
+        self.history = history if history is not None else HistoryStore().view("programmer")
+        self.commands = self._build_commands()
+
+    def _build_commands(self):
+        commands = {digit: Action(digit, "digit", partial(self.input_digit, digit))
+                    for digit in BASE_DIGITS["HEX"]}
+        for op in PROGRAMMER_OPS:
+            commands[op] = Action(op, "operator", partial(self.apply_operator, op))
+        commands['NOT'] = Action('NOT', "operator", self.bitwise_not)
+        commands['='] = Action('=', "evaluate", self.equals)
+        commands['Clr'] = Action('Clr', "edit", self.clear)
+        commands['CE'] = Action('CE', "edit", self.clear_entry)
+        commands['⌫'] = Action('⌫', "edit", self.backspace)
+        commands['±'] = Action('±', "edit", self.negate)
+        commands['('] = Action('(', "operator", partial(self.insert_paren, '('))
+        commands[')'] = Action(')', "operator", partial(self.insert_paren, ')'))
+        return commands
+
+    @property
+    def display_text(self):
+        if self.expression is not None:
+            return self.expression
+        if not self.input_str and self.pending_operation:  # Show stored value if input is empty during op
+            return self.format_value(self.stored_value_int, self.display_base)
+        return self.input_str if self.input_str else "0"
+
+    def set_word_size(self, bits, signed=True):
+        """Switch to ``bits``-wide two's-complement words (None for unbounded) and rewrap the values."""
+        if bits is not None and bits not in WORD_SIZES:
+            raise ValueError(f"Unsupported word size: {bits}")
+        self.word_size, self.signed = bits, signed
+        self.current_value_int = self.wrap(self.current_value_int)
+        if self.stored_value_int is not None:
+            self.stored_value_int = self.wrap(self.stored_value_int)
+        self.change_base(self.display_base)
+
+    def wrap(self, value):
+        """``value`` reduced to the current word size, as signed or unsigned."""
+        if self.word_size is None:
+            return value
+        value &= (1 << self.word_size) - 1
+        if self.signed and value >> (self.word_size - 1):
+            value -= 1 << self.word_size
+        return value
+
+    def _fits(self, value):
+        # Typed input may use the full unsigned bit pattern outside DEC, e.g. FF for -1 in 8 bits
+        low = -(1 << (self.word_size - 1)) if self.signed else 0
+        unsigned = not self.signed or self.display_base != "DEC"
+        return low <= value < (1 << (self.word_size - (0 if unsigned else 1)))
+
+    def format_value(self, value, base, pad=False):
+        if self.word_size is None:
+            return format_in_base(value, base)
+        return format_word(value, base, self.word_size, pad)
+
+    def conversion_value(self):
+        if self.input_str:  # If there's active input, use that for conversion display
+            try:
+                return self.wrap(self.converter.parse(self.input_str, self.display_base))
+            except ValueError:
+                pass  # Keep last valid current_value_int
+        return self.current_value_int
+
+    def conversions(self):
+        value = self.conversion_value()
+        if self.word_size is not None:  # At most 128 bits: formatting is cheaper than any caching
+            return {base: self.format_value(value, base, pad=True) for base in ("HEX", "DEC", "OCT", "BIN")}
+        return self.converter.convert(value, self.display_base)
+
+    def change_base(self, new_base):
+        if self.expression is not None:  # Literals typed so far are read in the new base from now on
+            self.expression = rebase(self.expression, self.display_base, new_base)
+        self.display_base = new_base
+        if not self.input_str and self.pending_operation:
+            return  # Awaiting the second operand: the display shows stored_value_int in the new base
+        # Convert current_value_int to the new base's string representation for input_str
+        self.input_str = self.format_value(self.current_value_int, new_base)
+
+    def _get_current_input_as_int(self):
+        try:
+            return self.wrap(self.converter.parse(self.input_str if self.input_str else "0", self.display_base))
+        except ValueError:
+            return self.current_value_int
+
+    def execute(self, action):
+        try:
+            action.handler()
+        except Exception as e:
+            self.input_str = "Error"; self.expression = None; log.warning("ProgrammerCalc error: %s", e)
+
+    def input_digit(self, digit):
+        if digit not in BASE_DIGITS[self.display_base]:
+            return  # Digit not valid in the current base
+        if self.expression is not None:
+            self.expression += digit
+            return
+        previous = self.input_str
+        if self.input_str == "0" and digit != "0":
+            self.input_str = digit
+        elif self.input_str == "0" and digit == "0":
+            pass  # Avoid multiple zeros
+        else:
+            self.input_str += digit
+        if self.word_size is not None:
+            try:
+                typed = self.converter.parse(self.input_str, self.display_base)
+            except ValueError:
+                typed = None
+            if typed is not None and not self._fits(typed):
+                self.input_str = previous  # The digit would overflow the word
+                return
+        self.current_value_int = self._get_current_input_as_int()
+
+    def clear(self):
+        self.input_str = "0"
+        self.current_value_int = 0
+        self.stored_value_int = None
+        self.pending_operation = None
+        self.expression = None
+
+    def clear_entry(self):
+        self.input_str = "0"; self.current_value_int = 0; self.expression = None
+
+    def insert_paren(self, paren):
+        """Start or extend an expression; '(' carries over a pending ``A op``."""
+        if self.expression is None:
+            if paren == ')':
+                return  # Nothing open to close
+            self.expression = ""
+            if self.pending_operation and self.stored_value_int is not None:
+                self.expression = f"{self.format_value(self.stored_value_int, self.display_base)} {self.pending_operation} "
+            self.stored_value_int = None
+            self.pending_operation = None
+        self.expression += paren
+
+    def _ends_with_operand(self):
+        word = self.expression.rstrip().rsplit(" ", 1)[-1].lstrip("(")
+        return bool(word) and word not in PROGRAMMER_OPS and word != "NOT"
+
+    def _extend_expression(self, op):
+        self.expression = f"{self.expression.rstrip()} {op} " if op != "NOT" else f"{self.expression}NOT "
+
+    def backspace(self):
+        if self.expression is not None:
+            text = self.expression.rstrip()
+            word = text.rsplit(" ", 1)[-1].lstrip("(")
+            text = text[:-len(word)] if word in PROGRAMMER_OPS or word == "NOT" else text[:-1]
+            self.expression = text if text.strip() else None
+            return
+        self.input_str = self.input_str[:-1] if len(self.input_str) > 1 else "0"
+        self.current_value_int = self._get_current_input_as_int()
+
+    def negate(self):
+        if self.expression is not None:
+            self.expression += "-"
+            return
+        self.current_value_int = self.wrap(-self._get_current_input_as_int())
+        # Unbounded values can only show a sign in DEC; fixed-width words show their bit pattern
+        self.change_base("DEC" if self.word_size is None else self.display_base)
+
+    def bitwise_not(self):
+        if self.expression is not None:
+            if not self._ends_with_operand():  # NOT is prefix-only: "5 NOT" is not an expression
+                self._extend_expression("NOT")
+            return
+        self.current_value_int = self.wrap(~self._get_current_input_as_int())
+        self.history.add("NOT", (self.input_str,), format_in_base(self.current_value_int, "DEC"))
+        self.change_base("DEC" if self.word_size is None else self.display_base)
+
+    def apply_operator(self, op):
+        if self.expression is not None:
+            self._extend_expression(op)
+            return
+        current_op_val = self._get_current_input_as_int()
+        if self.stored_value_int is not None and self.pending_operation:
+            op_result = self.perform_prog_op(self.stored_value_int, current_op_val, self.pending_operation)
+            if isinstance(op_result, str) and "Error" in op_result:  # Error occurred
+                self.input_str = op_result
+                self.current_value_int = 0
+                self.stored_value_int = None
+                self.pending_operation = None
+            else:
+                self._record(self.stored_value_int, current_op_val, op_result)
+                self.stored_value_int = op_result
+                self.current_value_int = op_result
+        else:
+            self.stored_value_int = current_op_val
+        self.pending_operation = op
+        self.input_str = ""  # Ready for next number, display will show stored_value_int in current base
+
+    def equals(self):
+        if self.expression is not None:
+            source = self.expression
+            self.current_value_int = compile_program(source, self.display_base).evaluate(self)
+            self.expression = None
+            self.history.add("=", (source,), format_in_base(self.current_value_int, "DEC"))
+            self.change_base(self.display_base)
+            return
+        if self.pending_operation and self.stored_value_int is not None:
+            second_operand = self._get_current_input_as_int()
+            op_result = self.perform_prog_op(self.stored_value_int, second_operand, self.pending_operation)
+            if isinstance(op_result, str) and "Error" in op_result:
+                self.input_str = op_result
+                self.current_value_int = 0
+            else:
+                self._record(self.stored_value_int, second_operand, op_result)
+                self.current_value_int = op_result
+            self.change_base(self.display_base)  # Updates input_str from current_value_int
+            self.stored_value_int = None  # Reset for next independent calculation
+            self.pending_operation = None
+
+    def _record(self, val1, val2, result):
+        # Formatted here: str() refuses integers over 4300 digits
+        self.history.add(self.pending_operation, (format_in_base(val1, "DEC"), format_in_base(val2, "DEC")),
+                         format_in_base(result, "DEC"))
+
+    def bulk_apply(self, op, source, output, other=None, value=None, byteorder="little"):
+        """Apply AND/OR/XOR/NOT/Lsh/Rsh to every word of the file ``source``.
+
+        Words are ``word_size`` bits (bytes when unbounded). The second operand
+        is the file ``other`` or else ``value``, defaulting to the current input.
+        """
+        from BulkOps import bulk_apply  # Deferred: only bulk mode needs mmap and NumPy
+        if other is None and value is None and op != "NOT":
+            value = self._get_current_input_as_int()
+        return bulk_apply(op, source, output, value=value, other=other,
+                          width=self.word_size or 8, byteorder=byteorder)
+
+    def evaluate_line(self, line):
+        """Evaluate an expression such as ``(A Lsh 4) OR (B AND 0xF)``.
+
+        Operands are read in ``display_base``; see ProgrammerExpression for the
+        syntax and precedence. Leaves the engine state untouched.
+        """
+        return compile_program(line.strip(), self.display_base).evaluate(self)
+
+    def perform_prog_op(self, val1, val2, op):
+        result = self._prog_op(val1, val2, op)
+        return result if isinstance(result, str) else self.wrap(result)
+
+    def _prog_op(self, val1, val2, op):
+        try:
+            if op == 'AND': return val1 & val2
+            if op == 'OR': return val1 | val2
+            if op == 'XOR': return val1 ^ val2
+            if op == 'MOD': return val1 % val2 if val2 != 0 else "Error: Mod by 0"
+            if op == 'Lsh':
+                if self.word_size is not None and val2 >= self.word_size:
+                    return 0  # Every bit shifted out; never build the huge intermediate
+                return val1 << val2
+            if op == 'Rsh': return val1 >> val2
+            if op == '+': return val1 + val2
+            if op == '-': return val1 - val2
+            if op == '*': return val1 * val2
+            if op == '/': return val1 // val2 if val2 != 0 else "Error: Div by 0"
+        except Exception as e:
+            return f"Error: {e}"
+        return "Error: Op?"
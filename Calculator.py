@@ -1,27 +1,109 @@
+import logging
 import sys
-import math
+import time
+
+STARTUP_STARTED = time.perf_counter()  # Before the PyQt6 imports, so first-paint time includes them
+
+from functools import partial
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout,
-    QGridLayout, QPushButton, QLineEdit, QLabel, QComboBox, QTextEdit, QDialog,
-    QSizePolicy
+    QGridLayout, QPushButton, QLineEdit, QLabel, QComboBox, QListView, QDialog,
+    QSizePolicy, QPlainTextEdit, QFileDialog
 )
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QFont, QPalette, QColor, QIcon, QKeyEvent
+from PyQt6.QtCore import Qt, QSize, QTimer, QAbstractListModel, QModelIndex
+from PyQt6.QtGui import QFont, QPalette, QColor, QIcon, QKeyEvent, QKeySequence, QShortcut
+
+from CalcEngine import BASE_DIGITS, WORD_SIZES, BasicEngine, ProgrammerEngine, ScientificEngine
+from History import HistoryStore, default_history_path
+from Metrics import METRICS, metrics_path
+from Themes import stylesheet
+
+log = logging.getLogger(__name__)
+
+
+class HistoryListModel(QAbstractListModel):
+    """Newest-first rows over a HistoryView, fetched in batches as the list scrolls.
+
+    With search results set, the rows are those results instead.
+    """
+    FETCH_BATCH = 256
+
+    def __init__(self, history, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self._loaded = 0
+        self._results = None  # Search results, newest first, while a query is active
+        self.history.store.subscribe(self._on_history_event)
+
+    def _available(self):
+        return len(self.history) if self._results is None else len(self._results)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            if self._results is not None:
+                return self._results[index.row()].text
+            return self.history.newest(index.row()).text
+        return None
+
+    def set_results(self, results):
+        self.beginResetModel()
+        self._results = results
+        self._loaded = 0
+        self.endResetModel()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self._loaded < self._available()
+
+    def fetchMore(self, parent):
+        count = min(self.FETCH_BATCH, self._available() - self._loaded)
+        if parent.isValid() or count <= 0:
+            return
+        with METRICS.span("history.fetch"):
+            self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+            self._loaded += count
+            self.endInsertRows()
+
+    def _on_history_event(self, event, record):
+        if event == "clear":
+            self.set_results(None if self._results is None else [])
+            return
+        if record.tab != self.history.tab or self._results is not None:
+            return
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._loaded += 1
+        self.endInsertRows()
+        excess = self._loaded - len(self.history)  # Oldest rows dropped from the ring buffer
+        if excess > 0:
+            self.beginRemoveRows(QModelIndex(), self._loaded - excess, self._loaded - 1)
+            self._loaded -= excess
+            self.endRemoveRows()
+
+    def detach(self):
+        self.history.store.unsubscribe(self._on_history_event)
 
 
 class HistoryDialog(QDialog):
-    def __init__(self, history_list, parent_calculator_dark_mode_active, parent=None):
+    def __init__(self, history, parent=None):
         super().__init__(parent)
-        self.history_list = history_list
-        self.dark_mode_active = parent_calculator_dark_mode_active
+        self.history = history  # HistoryView of the calling tab
         self.setWindowTitle("Calculation History")
         self.setMinimumSize(300, 400)
 
         layout = QVBoxLayout(self)
 
-        self.history_display = QTextEdit()
-        self.history_display.setReadOnly(True)
-        self.populate_history()
+        self.search_box = QLineEdit()
+        self.search_box.setPlaceholderText("Search: words, =42, >10, <10, since:7d")
+        self.search_box.setClearButtonEnabled(True)
+        self.search_box.textChanged.connect(self.search_history)
+        layout.addWidget(self.search_box)
+
+        self.history_model = HistoryListModel(self.history, self)
+        self.history_display = QListView()
+        self.history_display.setUniformItemSizes(True)  # Lets the view skip measuring every row
+        self.history_display.setModel(self.history_model)
         layout.addWidget(self.history_display)
 
         button_layout = QHBoxLayout()
@@ -29,47 +111,90 @@ class HistoryDialog(QDialog):
         clear_button.clicked.connect(self.clear_history)
         close_button = QPushButton("Close")
         close_button.clicked.connect(self.accept)
+        for button in (clear_button, close_button):
+            button.setProperty("role", "dialog")
 
         button_layout.addWidget(clear_button)
         button_layout.addStretch()
         button_layout.addWidget(close_button)
         layout.addLayout(button_layout)
 
-        self.update_theme(self.dark_mode_active)
-
-    def populate_history(self):
-        self.history_display.setPlainText("\n".join(reversed(self.history_list)))
+    def search_history(self, query):
+        with METRICS.span("history.search"):
+            self.history_model.set_results(self.history.search(query) if query.strip() else None)
 
     def clear_history(self):
-        self.history_list.clear()
-        self.populate_history()
-
-    def update_theme(self, dark_mode):
-        dialog_palette = QPalette()
-        text_edit_palette = QPalette()
-        button_stylesheet = ""
-
-        if dark_mode:
-            dialog_palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
-            dialog_palette.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
-            text_edit_palette.setColor(QPalette.ColorRole.Base, QColor(25, 25, 25))
-            text_edit_palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
-            button_stylesheet = """
-                QPushButton { background-color: #353535; color: white; border: 1px solid #555; padding: 5px; }
-                QPushButton:hover { background-color: #4a4a4a; }
-                QPushButton:pressed { background-color: #2a2a2a; }"""
-        else:
-            text_edit_palette.setColor(QPalette.ColorRole.Base, Qt.GlobalColor.white)
-            text_edit_palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.black)
-            button_stylesheet = "QPushButton { padding: 5px; }"
+        self.history.clear()  # The model resets itself from the store's "clear" event
+
+    def done(self, result):
+        self.history_model.detach()
+        super().done(result)
+
+
+class MetricsPanel(QDialog):
+    """Live p50/p95/p99 table of the instrumented spans; opened with F12."""
+    REFRESH_MS = 1000
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Metrics")
+        self.setMinimumSize(520, 300)
+        layout = QVBoxLayout(self)
+
+        self.table = QPlainTextEdit()
+        self.table.setReadOnly(True)
+        self.table.setFont(QFont("Monospace", 9))
+        layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        reset_button = QPushButton("Reset")
+        reset_button.clicked.connect(self.reset)
+        export_button = QPushButton("Export…")
+        export_button.clicked.connect(self.export)
+        close_button = QPushButton("Close")
+        close_button.clicked.connect(self.accept)
+        for button in (reset_button, export_button, close_button):
+            button.setProperty("role", "dialog")
+            button_layout.addWidget(button)
+        button_layout.insertStretch(2)
+        layout.addLayout(button_layout)
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(self.REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        METRICS.enabled = True  # Opening the panel starts collection if the environment did not
+        self.refresh()
+        self._timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self._timer.stop()
+        super().hideEvent(event)
 
-        self.setPalette(dialog_palette)
-        self.history_display.setPalette(text_edit_palette)
-        for button in self.findChildren(QPushButton):
-            button.setStyleSheet(button_stylesheet)
+    def refresh(self):
+        lines = [f"{'span':<24}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for name, stats in METRICS.snapshot().items():
+            lines.append(f"{name:<24}{stats['count']:>8}{stats['p50'] * 1000:>10.3f}"
+                         f"{stats['p95'] * 1000:>10.3f}{stats['p99'] * 1000:>10.3f}")
+        self.table.setPlainText("\n".join(lines))
+
+    def reset(self):
+        METRICS.reset()
+        self.refresh()
+
+    def export(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Export metrics", "metrics.json",
+                                              "JSON (*.json);;Prometheus text (*.prom)")
+        if path:
+            METRICS.write(path)
 
 
 class CalculatorApp(QMainWindow):
+    TABS = (("Basic", "basic"), ("Scientific", "scientific"), ("Programmer", "programmer"))
+    STARTUP_BUDGET = 0.5  # Seconds from import to the first painted frame
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("Professional Calculator")
@@ -81,17 +206,24 @@ class CalculatorApp(QMainWindow):
 
         self.dark_mode = False
         self.current_theme = "light"
+        self._palettes = {}  # theme -> QPalette, built on first use
 
         self.tabs = QTabWidget()
         main_layout.addWidget(self.tabs)
 
-        self.basic_calc = BasicCalculator(dark_mode_ref=lambda: self.dark_mode)
-        self.scientific_calc = ScientificCalculator(dark_mode_ref=lambda: self.dark_mode)
-        self.programmer_calc = ProgrammerCalculator(dark_mode_ref=lambda: self.dark_mode)
-
-        self.tabs.addTab(self.basic_calc, "Basic")
-        self.tabs.addTab(self.scientific_calc, "Scientific")
-        self.tabs.addTab(self.programmer_calc, "Programmer")
+        try:
+            self.history_store = HistoryStore(default_history_path())
+        except OSError as e:
+            log.warning("History not persisted: %s", e)
+            self.history_store = HistoryStore()
+
+        # Tabs start as empty pages; each calculator is built the first time its tab is shown
+        self.calculators = {}
+        for title, _ in self.TABS:
+            page = QWidget()
+            QVBoxLayout(page).setContentsMargins(0, 0, 0, 0)
+            self.tabs.addTab(page, title)
+        self.tabs.currentChanged.connect(self._activate_tab)
 
         theme_layout = QHBoxLayout()
         theme_label = QLabel("Theme:")
@@ -104,42 +236,93 @@ class CalculatorApp(QMainWindow):
         main_layout.addLayout(theme_layout)
 
         self.change_theme("Light")
+        self._activate_tab(self.tabs.currentIndex())
+        self.metrics_panel = None
+        QShortcut(QKeySequence("F12"), self, self.show_metrics_panel)
+        self.startup_time = None  # Seconds to the first painted frame, once painted
+        self._first_paint_seen = False
         # self.setFocusPolicy(Qt.FocusPolicy.StrongFocus) # Main window can also handle keys if needed
 
+    def calculator(self, key):
+        """The calculator widget for tab ``key``, building it if needed."""
+        widget = self.calculators.get(key)
+        if widget is None:
+            factories = {"basic": BasicCalculator, "scientific": ScientificCalculator,
+                         "programmer": ProgrammerCalculator}
+            widget = self.calculators[key] = factories[key](history=self.history_store.view(key))
+            index = [tab_key for _, tab_key in self.TABS].index(key)
+            self.tabs.widget(index).layout().addWidget(widget)
+        return widget
+
+    def _activate_tab(self, index):
+        if index >= 0:
+            self.calculator(self.TABS[index][1]).setFocus()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_paint_seen:
+            self._first_paint_seen = True
+            QTimer.singleShot(0, self._record_first_paint)  # Runs once the whole frame is painted
+
+    def _record_first_paint(self):
+        self.startup_time = time.perf_counter() - STARTUP_STARTED
+        if self.startup_time > self.STARTUP_BUDGET:
+            log.warning("Startup took %.0f ms (budget %.0f ms)",
+                        self.startup_time * 1000, self.STARTUP_BUDGET * 1000)
+
     def change_theme(self, theme):
         self.current_theme = theme.lower()
         self.dark_mode = (self.current_theme == "dark")
+        app = QApplication.instance()
+        # One palette and one precompiled stylesheet for the whole app: a single polish pass
+        with METRICS.span("theme.apply"):
+            app.setPalette(self._theme_palette(self.current_theme))
+            app.setStyleSheet(stylesheet(self.current_theme))
+
+    def show_metrics_panel(self):
+        if self.metrics_panel is None:
+            self.metrics_panel = MetricsPanel(self)
+        self.metrics_panel.show()
+        self.metrics_panel.raise_()
+
+    def _theme_palette(self, theme):
+        palette = self._palettes.get(theme)
+        if palette is None:
+            palette = self._palettes[theme] = self._build_palette(theme)
+        return palette
+
+    @staticmethod
+    def _build_palette(theme):
+        if theme != "dark":
+            return QApplication.instance().style().standardPalette()
         app_palette = QPalette()
-        combo_stylesheet = ""
-        if self.dark_mode:
-            app_palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
-            app_palette.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
-            app_palette.setColor(QPalette.ColorRole.Base, QColor(25, 25, 25))
-            app_palette.setColor(QPalette.ColorRole.AlternateBase, QColor(53, 53, 53))
-            app_palette.setColor(QPalette.ColorRole.ToolTipBase, Qt.GlobalColor.white)
-            app_palette.setColor(QPalette.ColorRole.ToolTipText, Qt.GlobalColor.white)
-            app_palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
-            app_palette.setColor(QPalette.ColorRole.Button, QColor(53, 53, 53))
-            app_palette.setColor(QPalette.ColorRole.ButtonText, Qt.GlobalColor.white)
-            app_palette.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
-            app_palette.setColor(QPalette.ColorRole.Highlight, QColor(142, 45, 197).lighter())
-            app_palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
-            combo_stylesheet = """
-                QComboBox { background-color: #353535; color: white; border: 1px solid #555; padding: 3px; }
-                QComboBox::drop-down { border: none; }
-                QComboBox QAbstractItemView { background-color: #252525; color: white; selection-background-color: #8e2dc5; }"""
-        else:
-            app = QApplication.instance()
-            if app: app_palette = app.style().standardPalette()
-            combo_stylesheet = ""
-
-        self.setPalette(app_palette)
-        self.tabs.setPalette(app_palette)
-        self.theme_combo.setStyleSheet(combo_stylesheet)
-
-        self.basic_calc.update_theme(self.dark_mode)
-        self.scientific_calc.update_theme(self.dark_mode)
-        self.programmer_calc.update_theme(self.dark_mode)
+        app_palette.setColor(QPalette.ColorRole.Window, QColor(53, 53, 53))
+        app_palette.setColor(QPalette.ColorRole.WindowText, Qt.GlobalColor.white)
+        app_palette.setColor(QPalette.ColorRole.Base, QColor(25, 25, 25))
+        app_palette.setColor(QPalette.ColorRole.AlternateBase, QColor(53, 53, 53))
+        app_palette.setColor(QPalette.ColorRole.ToolTipBase, Qt.GlobalColor.white)
+        app_palette.setColor(QPalette.ColorRole.ToolTipText, Qt.GlobalColor.white)
+        app_palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
+        app_palette.setColor(QPalette.ColorRole.Button, QColor(53, 53, 53))
+        app_palette.setColor(QPalette.ColorRole.ButtonText, Qt.GlobalColor.white)
+        app_palette.setColor(QPalette.ColorRole.BrightText, Qt.GlobalColor.red)
+        app_palette.setColor(QPalette.ColorRole.Highlight, QColor(142, 45, 197).lighter())
+        app_palette.setColor(QPalette.ColorRole.HighlightedText, Qt.GlobalColor.black)
+        return app_palette
+
+    def closeEvent(self, event):
+        scientific = self.calculators.get("scientific")
+        if scientific is not None:
+            scientific.evaluator.shutdown()
+            scientific.preview_evaluator.shutdown()
+        self.history_store.close()
+        path = metrics_path()
+        if path:
+            try:
+                METRICS.write(path)
+            except OSError as e:
+                log.warning("Metrics not written: %s", e)
+        super().closeEvent(event)
 
     # If you want main window to handle some global keys, uncomment and implement
     # def keyPressEvent(self, event: QKeyEvent):
@@ -153,60 +336,12 @@ class CalculatorApp(QMainWindow):
 
 
 class BaseCalculatorMixin:
-    def _setup_common_styles(self, dark_mode):
-        display_palette = QPalette()
-        preview_label_palette = QPalette()  # For basic calc's preview
-        conversion_label_color_css = ""  # For programmer calc's labels
-
-        base_font_style = "padding: 8px; font-size: 15px;"  # Consistent button font
-
-        general_button_style, equals_button_style, clear_button_style, hist_button_style, angle_mode_button_style = "", "", "", "", ""
-
-        if dark_mode:
-            display_palette.setColor(QPalette.ColorRole.Base, QColor(25, 25, 25))
-            display_palette.setColor(QPalette.ColorRole.Text, Qt.GlobalColor.white)
-            preview_label_palette.setColor(QPalette.ColorRole.WindowText, QColor(180, 180, 180))
-            conversion_label_color_css = "color: #b4b4b4;"
-
-            general_button_style = f"QPushButton {{ background-color: #383838; color: white; border: 1px solid #505050; {base_font_style} }} QPushButton:hover {{ background-color: #484848; }} QPushButton:pressed {{ background-color: #282828; }}"
-            equals_button_style = f"QPushButton {{ background-color: #006900; color: white; border: 1px solid #008000; {base_font_style} }} QPushButton:hover {{ background-color: #007f00; }} QPushButton:pressed {{ background-color: #004f00; }}"
-            clear_button_style = f"QPushButton {{ background-color: #aa0000; color: white; border: 1px solid #c30000; {base_font_style} }} QPushButton:hover {{ background-color: #c30000; }} QPushButton:pressed {{ background-color: #880000; }}"
-            hist_button_style = f"QPushButton {{ background-color: #2c3e50; color: white; border: 1px solid #34495e; {base_font_style} }} QPushButton:hover {{ background-color: #34495e; }} QPushButton:pressed {{ background-color: #1a242f; }}"
-            angle_mode_button_style = f"QPushButton {{ background-color: #404040; color: white; border: 1px solid #555555; padding: 5px; font-size: 12px; }} QPushButton:hover {{ background-color: #505050; }} QPushButton:pressed {{ background-color: #303030; }}"
-        else:  # Light Mode
-            # display_palette uses default system palette for light mode base/text
-            preview_label_palette.setColor(QPalette.ColorRole.WindowText, QColor(100, 100, 100))
-            conversion_label_color_css = "color: #646464;"
-
-            general_button_style = f"QPushButton {{ background-color: #f0f0f0; color: black; border: 1px solid #c0c0c0; {base_font_style} }} QPushButton:hover {{ background-color: #e0e0e0; }} QPushButton:pressed {{ background-color: #d0d0d0; }}"
-            equals_button_style = f"QPushButton {{ background-color: #5cb85c; color: white; border: 1px solid #4cae4c; {base_font_style} }} QPushButton:hover {{ background-color: #4cae4c; }} QPushButton:pressed {{ background-color: #449d44; }}"
-            clear_button_style = f"QPushButton {{ background-color: #d9534f; color: white; border: 1px solid #d43f3a; {base_font_style} }} QPushButton:hover {{ background-color: #c9302c; }} QPushButton:pressed {{ background-color: #ac2925; }}"
-            hist_button_style = f"QPushButton {{ background-color: #aec9e0; color: black; border: 1px solid #9ab3c9; {base_font_style} }} QPushButton:hover {{ background-color: #9ab3c9; }} QPushButton:pressed {{ background-color: #869db3; }}"  # Light blue-gray
-            angle_mode_button_style = f"QPushButton {{ background-color: #e0e0e0; color: black; border: 1px solid #bbbbbb; padding: 5px; font-size: 12px; }} QPushButton:hover {{ background-color: #d0d0d0; }} QPushButton:pressed {{ background-color: #c0c0c0; }}"
-
-        if hasattr(self, 'display'): self.display.setPalette(display_palette)
-        if hasattr(self, 'expression_preview_label'): self.expression_preview_label.setPalette(preview_label_palette)
-        if hasattr(self, 'conversion_labels'):
-            for l_widget in self.conversion_labels.values(): l_widget.setStyleSheet(conversion_label_color_css)
-
-        for button in self.findChildren(QPushButton):
-            btn_text = button.text()
-            is_hist_btn = hasattr(button, '_is_hist_btn') and button._is_hist_btn
-            is_angle_mode_btn = hasattr(self, 'angle_mode_button') and button is self.angle_mode_button
-
-            if is_hist_btn:
-                button.setStyleSheet(hist_button_style)
-            elif is_angle_mode_btn:  # Specific for Scientific calc's RAD/DEG
-                button.setStyleSheet(angle_mode_button_style)
-            elif btn_text == '=':
-                button.setStyleSheet(equals_button_style)
-            elif btn_text in ['C', 'CE', 'Clr']:
-                button.setStyleSheet(clear_button_style)
-            else:
-                button.setStyleSheet(general_button_style)
+    # Stylesheet role per action; Themes.stylesheet styles buttons by this property
+    BUTTON_ROLES = {'=': 'equals', 'C': 'clear', 'CE': 'clear', 'Clr': 'clear', 'Hist': 'hist'}
 
     def show_history_dialog(self):
-        dialog = HistoryDialog(self.history, self.dark_mode_ref(), self)
+        with METRICS.span("history.open"):
+            dialog = HistoryDialog(self.engine.history, self)
         dialog.exec()
 
     def _get_history_icon(self):
@@ -214,32 +349,28 @@ class BaseCalculatorMixin:
         # Fallback is handled by button text if icon.isNull()
         return icon
 
-    def _find_and_click_button(self, target_text):
-        for button in self.findChildren(QPushButton):
-            is_hist_btn_target = (target_text == "Hist")  # Keyboard "H" or similar could map to "Hist"
-            actual_btn_is_hist = hasattr(button, '_is_hist_btn') and button._is_hist_btn
+    def _register_action(self, action, button, handler):
+        # action is the button text ("Hist" for history buttons); keys resolve to it in one dict lookup.
+        # Engine buttons' handlers run the engine's Action for that text directly.
+        self.actions[action] = (button, handler)
+        button.setProperty("role", self.BUTTON_ROLES.get(action, "key"))
+        button.clicked.connect(lambda checked=False: handler())
 
-            if is_hist_btn_target and actual_btn_is_hist:
-                if button.isEnabled(): button.click(); return True
-            elif button.text() == target_text:
-                if button.isEnabled(): button.click(); return True
-        return False
+    def _trigger_action(self, action):
+        entry = self.actions.get(action)
+        if entry is None or not entry[0].isEnabled():
+            return False
+        entry[1]()  # Call the handler directly; no synthetic click() or signal emission
+        return True
 
 
 class BasicCalculator(QWidget, BaseCalculatorMixin):
-    def __init__(self, dark_mode_ref):
+    def __init__(self, history=None):
         super().__init__()
-        self.dark_mode_ref = dark_mode_ref
-        self.current_input = ""
-        self.stored_value = None
-        self.current_operation = None
-        self.reset_input_on_next_digit = False
-        self.expression_preview_text = ""
-        self.history = []
+        self.engine = BasicEngine(history)
         self._init_keymap()
         self.init_ui()
         self._update_display()
-        self.update_theme(self.dark_mode_ref())
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def _init_keymap(self):
@@ -269,18 +400,25 @@ class BasicCalculator(QWidget, BaseCalculatorMixin):
         elif char_from_event and char_from_event in ".+-*/":  # Allow direct operator chars
             target_button_text = char_from_event
 
-        if target_button_text:
-            if self._find_and_click_button(target_button_text):
-                event.accept()
-                return
+        if target_button_text and self._trigger_action(target_button_text):
+            event.accept()
+            return
         super().keyPressEvent(event)
 
     def init_ui(self):
         layout = QVBoxLayout(self)
+        self.backend_combo = QComboBox()
+        self.backend_combo.setProperty("role", "mode")
+        for label, name in (("Float", "float"), ("Decimal", "decimal"), ("Fraction", "fraction")):
+            self.backend_combo.addItem(label, name)
+        self.backend_combo.currentIndexChanged.connect(self.change_backend)
+        layout.addWidget(self.backend_combo)
+
         self.expression_preview_label = QLabel()
         self.expression_preview_label.setAlignment(Qt.AlignmentFlag.AlignRight)
         self.expression_preview_label.setFont(QFont("Arial", 14))
         self.expression_preview_label.setMinimumHeight(30)
+        self.expression_preview_label.setProperty("role", "preview")
         layout.addWidget(self.expression_preview_label)
 
         self.display = QLineEdit()
@@ -290,6 +428,7 @@ class BasicCalculator(QWidget, BaseCalculatorMixin):
         self.display.setMinimumHeight(60)
         layout.addWidget(self.display)
 
+        self.actions = {}
         button_layout = QGridLayout()
         buttons_config = [
             ('C', 0, 0), ('CE', 0, 1), ('⌫', 0, 2), ('Hist', 0, 3),
@@ -312,150 +451,58 @@ class BasicCalculator(QWidget, BaseCalculatorMixin):
                     button.setIcon(hist_icon); button.setIconSize(QSize(20, 20))
                 else:
                     button.setText("🕒 Hist")
-                button._is_hist_btn = True
 
             button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-            # Font is set by _setup_common_styles
-            button.clicked.connect(self.on_button_click)
+            # Font and colours come from the app stylesheet via the button's role
+            if text == 'Hist':
+                self._register_action('Hist', button, self.show_history_dialog)
+            else:
+                self._register_action(text, button, partial(self.run_action, self.engine.commands[text]))
             button_layout.addWidget(button, r, c, rs, cs)
         layout.addLayout(button_layout)
 
     def _update_display(self):
-        self.display.setText(self.current_input if self.current_input else "0")
-        self.expression_preview_label.setText(self.expression_preview_text)
+        with METRICS.span("display.basic"):
+            self.display.setText(self.engine.display_text)
+            self.expression_preview_label.setText(self.engine.expression_preview_text)
 
-    def _perform_calculation(self, val1, val2, op):
-        try:
-            if op == '+': return val1 + val2
-            if op == '-': return val1 - val2
-            if op == '*': return val1 * val2
-            if op == '/':
-                if val2 == 0: return "Error: Div by 0"
-                return val1 / val2
-        except Exception:
-            return "Error"
-        return "Error: Unknown op"
-
-    def on_button_click(self):
-        sender = self.sender()
-        text = sender.text()
-        if hasattr(sender, '_is_hist_btn') and sender._is_hist_btn: text = "Hist"
-
-        try:
-            if text.isdigit():
-                if self.reset_input_on_next_digit: self.current_input = ""; self.reset_input_on_next_digit = False
-                if self.current_input == "0" and text != "0":
-                    self.current_input = text
-                elif self.current_input == "0" and text == "0":
-                    pass
-                else:
-                    self.current_input += text
-            elif text == '.':
-                if self.reset_input_on_next_digit: self.current_input = "0"; self.reset_input_on_next_digit = False
-                if not self.current_input: self.current_input = "0"
-                if '.' not in self.current_input: self.current_input += '.'
-            elif text in '+-*/':
-                if self.current_input:
-                    val_current = float(self.current_input)
-                    if self.stored_value is not None and self.current_operation:
-                        result = self._perform_calculation(self.stored_value, val_current, self.current_operation)
-                        if isinstance(result, str) and "Error" in result:
-                            self.expression_preview_text = "";
-                            self.current_input = result
-                            self.stored_value = None;
-                            self.current_operation = None;
-                            self.reset_input_on_next_digit = True
-                        else:
-                            self.history.append(
-                                f"{self.stored_value} {self.current_operation} {val_current} = {result}")
-                            self.stored_value = result
-                    else:
-                        self.stored_value = val_current
-                    self.current_operation = text
-                    self.expression_preview_text = f"{self.stored_value:.10g} {self.current_operation} "
-                    self.current_input = "";
-                    self.reset_input_on_next_digit = False
-                elif self.stored_value is not None:
-                    self.current_operation = text
-                    self.expression_preview_text = f"{self.stored_value:.10g} {self.current_operation} "
-                    self.current_input = "";
-                    self.reset_input_on_next_digit = False
-            elif text == '=':
-                if self.stored_value is not None and self.current_operation and self.current_input:
-                    val_current = float(self.current_input)
-                    full_expr = f"{self.stored_value:.10g} {self.current_operation} {val_current:.10g}"
-                    result = self._perform_calculation(self.stored_value, val_current, self.current_operation)
-                    if isinstance(result, str) and "Error" in result:
-                        self.current_input = result;
-                        self.expression_preview_text = f"{full_expr} ="
-                        self.stored_value = None;
-                        self.current_operation = None
-                    else:
-                        self.history.append(f"{full_expr} = {result:.10g}")
-                        self.current_input = f"{result:.10g}";
-                        self.expression_preview_text = f"{full_expr} ="
-                        self.stored_value = result;
-                        self.current_operation = None
-                    self.reset_input_on_next_digit = True
-            elif text == 'C':
-                self.current_input = "";
-                self.stored_value = None;
-                self.current_operation = None
-                self.expression_preview_text = "";
-                self.reset_input_on_next_digit = False
-            elif text == 'CE':
-                if self.reset_input_on_next_digit and self.current_operation is None:
-                    self.current_input = "";
-                    self.stored_value = None;
-                    self.current_operation = None
-                    self.expression_preview_text = "";
-                    self.reset_input_on_next_digit = False
-                else:
-                    self.current_input = ""; self.reset_input_on_next_digit = False
-            elif text == '⌫':
-                if self.reset_input_on_next_digit:
-                    self.current_input = ""; self.reset_input_on_next_digit = False
-                elif self.current_input:
-                    self.current_input = self.current_input[:-1]
-            elif text == '±':
-                if self.current_input and self.current_input != "0":
-                    if self.current_input.startswith('-'):
-                        self.current_input = self.current_input[1:]
-                    else:
-                        self.current_input = '-' + self.current_input
-                elif self.stored_value is not None and self.current_operation is None:
-                    self.stored_value *= -1;
-                    self.current_input = f"{self.stored_value:.10g}"
-                    self.reset_input_on_next_digit = True
-            elif text == 'Hist':
-                self.show_history_dialog()
-        except ValueError:
-            self.current_input = "Error: Invalid Input"; self.reset_input_on_next_digit = True
-        except Exception as e:
-            print(f"BasicCalc Error: {e}"); self.current_input = "Error"; self.reset_input_on_next_digit = True
+    def change_backend(self, _index=None):
+        self.engine.set_backend(self.backend_combo.currentData())
         self._update_display()
 
-    def update_theme(self, dark_mode):
-        self._setup_common_styles(dark_mode)
+    def run_action(self, action):
+        with METRICS.span("action.basic"):
+            self.engine.execute(action)
+            self._update_display()
 
 
 class ScientificCalculator(QWidget, BaseCalculatorMixin):
-    def __init__(self, dark_mode_ref):
+    EVALUATION_TIMEOUT = 10.0  # Seconds before a running evaluation is abandoned
+    POLL_INTERVAL_MS = 15
+    PRECISION_DIGITS = (30, 50, 100, 1000)
+    PREVIEW_DELAY_MS = 250  # Input pause before a slow preview is evaluated
+    PREVIEW_TIMEOUT = 2.0  # Seconds before a preview evaluation is abandoned
+
+    def __init__(self, history=None):
         super().__init__()
-        self.dark_mode_ref = dark_mode_ref
-        self.expression = ""
-        self.history = []
-        self.angle_mode = "RAD"
-        self.safe_globals = {
-            "math": math, "abs": abs, "pow": pow, "sqrt": math.sqrt,
-            "log10": math.log10, "ln": math.log, "sin": math.sin,
-            "cos": math.cos, "tan": math.tan, "asin": math.asin,
-            "acos": math.acos, "atan": math.atan, "factorial": math.factorial,
-            "pi": math.pi, "e": math.e, "radians": math.radians, "degrees": math.degrees
-        }
+        self.engine = ScientificEngine(history)
+        from ParallelEval import AsyncEvaluator  # Deferred: multiprocessing loads only once this tab opens
+        # Cache misses are evaluated in a worker process so the event loop keeps running
+        self.evaluator = AsyncEvaluator()
+        self.pending_evaluation = None  # (compiled, digits, PendingEvaluation) while '=' is running
+        self._poll_timer = QTimer(self)
+        self._poll_timer.setInterval(self.POLL_INTERVAL_MS)
+        self._poll_timer.timeout.connect(self._poll_evaluation)
+        # Live preview: cheap results show at once; slow ones wait for a pause, then run in their own worker
+        self.preview_evaluator = AsyncEvaluator()
+        self.pending_preview = None  # (compiled, digits, PendingEvaluation) while a preview is running
+        self._deferred_preview = None  # (compiled, digits) waiting for the input to pause
+        self._preview_source = None  # Expression the preview was last computed for
+        self._preview_timer = QTimer(self)
+        self._preview_timer.setSingleShot(True)
+        self._preview_timer.timeout.connect(self._run_preview)
         self._init_keymap()
         self.init_ui()
-        self.update_theme(self.dark_mode_ref())
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def _init_keymap(self):
@@ -498,14 +545,21 @@ class ScientificCalculator(QWidget, BaseCalculatorMixin):
             elif char_from_event in "()+-*/.%":  # General chars that might be button texts
                 target_button_text = char_from_event
 
-        if target_button_text:
-            if self._find_and_click_button(target_button_text):
-                event.accept()
-                return
+        if target_button_text and self._trigger_action(target_button_text):
+            event.accept()
+            return
         super().keyPressEvent(event)
 
     def init_ui(self):
+        self.actions = {}
         layout = QVBoxLayout(self)
+        self.preview_label = QLabel()
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignRight)
+        self.preview_label.setFont(QFont("Arial", 14))
+        self.preview_label.setMinimumHeight(24)
+        self.preview_label.setProperty("role", "preview")
+        layout.addWidget(self.preview_label)
+
         self.display = QLineEdit()
         self.display.setReadOnly(True)
         self.display.setAlignment(Qt.AlignmentFlag.AlignRight)
@@ -514,20 +568,33 @@ class ScientificCalculator(QWidget, BaseCalculatorMixin):
         layout.addWidget(self.display)
 
         top_row_layout = QHBoxLayout()
-        self.angle_mode_button = QPushButton(self.angle_mode)
+        self.angle_mode_button = QPushButton(self.engine.angle_mode)
         self.angle_mode_button.setCheckable(True)  # Checkable for RAD/DEG state
-        self.angle_mode_button.setChecked(self.angle_mode == "RAD")  # Initial check state
+        self.angle_mode_button.setChecked(self.engine.angle_mode == "RAD")  # Initial check state
         self.angle_mode_button.clicked.connect(self.toggle_angle_mode)
+        self.angle_mode_button.setProperty("role", "angle")
         top_row_layout.addWidget(self.angle_mode_button)
 
+        self.precision_combo = QComboBox()
+        self.precision_combo.setProperty("role", "mode")
+        self.precision_combo.addItem("Double", None)
+        for digits in self.PRECISION_DIGITS:
+            self.precision_combo.addItem(f"{digits} digits", digits)
+        self.precision_combo.currentIndexChanged.connect(self.change_precision)
+        top_row_layout.addWidget(self.precision_combo)
+
+        more_button = QPushButton("More")
+        more_button.setToolTip("Show the last precise result to twice as many digits")
+        self._register_action('More', more_button, partial(self.run_action, self.engine.commands['More']))
+        top_row_layout.addWidget(more_button)
+
         hist_button_sci = QPushButton()
         hist_icon_sci = self._get_history_icon()
         if not hist_icon_sci.isNull():
             hist_button_sci.setIcon(hist_icon_sci); hist_button_sci.setIconSize(QSize(20, 20))
         else:
             hist_button_sci.setText("🕒 Hist")
-        hist_button_sci._is_hist_btn = True
-        hist_button_sci.clicked.connect(self.show_history_dialog)
+        self._register_action('Hist', hist_button_sci, self.show_history_dialog)
         top_row_layout.addWidget(hist_button_sci)
         layout.addLayout(top_row_layout)
 
@@ -548,151 +615,123 @@ class ScientificCalculator(QWidget, BaseCalculatorMixin):
             cs = item[4] if len(item) > 4 else 1
             button = QPushButton(text)
             button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-            button.clicked.connect(self.on_button_click)
+            self._register_action(text, button, partial(self.run_action, self.engine.commands[text]))
             button_layout.addWidget(button, r, c, rs, cs)
         layout.addLayout(button_layout)
         self._update_display()
 
     def toggle_angle_mode(self):
-        if self.angle_mode_button.isChecked():  # Is RAD
-            self.angle_mode = "RAD"
-        else:  # Is DEG
-            self.angle_mode = "DEG"
-        self.angle_mode_button.setText(self.angle_mode)
-        # self.update_theme(self.dark_mode_ref()) # Style already applied in _setup_common_styles
+        self.engine.set_angle_mode("RAD" if self.angle_mode_button.isChecked() else "DEG")
+        self.angle_mode_button.setText(self.engine.angle_mode)
+        self._preview_source = None  # The same text now previews in the other mode
+        self._update_preview()
+
+    def change_precision(self, _index=None):
+        self.engine.set_precision(self.precision_combo.currentData())
+        self._preview_source = None  # The same text now previews at the new precision
+        self._update_preview()
 
     def _update_display(self):
-        self.display.setText(self.expression if self.expression else "0")
+        with METRICS.span("display.scientific"):
+            if self.pending_evaluation is not None:
+                self.display.setText(f"{self.engine.display_text} …")
+            else:
+                self.display.setText(self.engine.display_text)
+        self._update_preview()
+
+    def _update_preview(self):
+        if self.engine.expression == self._preview_source:
+            return
+        self._preview_source = self.engine.expression
+        with METRICS.span("sci.preview"):
+            compiled, digits, text = self.engine.begin_preview()
+        self.preview_label.setText(text)
+        self._deferred_preview = (compiled, digits) if compiled is not None else None
+        if compiled is not None:
+            self._preview_timer.start(self.PREVIEW_DELAY_MS)  # Restarted by every keystroke until input pauses
+
+    def _run_preview(self):
+        """Debounce timer: collect a finished preview evaluation and start the deferred one."""
+        if self.pending_preview is not None:
+            compiled, digits, pending = self.pending_preview
+            if pending.ready():
+                self.pending_preview = None
+                try:
+                    text = self.engine.complete_preview(compiled, pending.result(), digits)
+                except Exception:
+                    text = ""
+                if (compiled.source, compiled.angle_mode) == (self.engine.expression, self.engine.angle_mode):
+                    self.preview_label.setText(text)
+            elif pending.elapsed() > self.PREVIEW_TIMEOUT:
+                self.preview_evaluator.cancel()
+                self.pending_preview = None
+            else:
+                self._preview_timer.start(self.POLL_INTERVAL_MS)
+                return
+        if self._deferred_preview is not None:
+            compiled, digits = self._deferred_preview
+            self._deferred_preview = None
+            self.pending_preview = (compiled, digits, self.preview_evaluator.submit(compiled, digits))
+            self._preview_timer.start(self.POLL_INTERVAL_MS)
+
+    def run_action(self, action):
+        if self.pending_evaluation is not None:
+            if action.id in ('C', 'CE'):
+                self._cancel_evaluation()
+            return  # Other input waits for the running evaluation
+        with METRICS.span("action.scientific"):
+            if action.kind == "evaluate":
+                self._start_evaluation(refine=action.id == 'More')
+            else:
+                self.engine.execute(action)
+            self._update_display()
 
-    def _prepare_eval_string(self, expr_str):
-        # Basic replacements
-        replacements = {
-            'π': 'pi', 'e': 'e', '√(': 'sqrt(', '∛(': 'pow(',  # For ∛(x) -> pow(x,1/3)
-            'x²': '**2', 'x³': '**3', 'x^y': '**', 'log(': 'log10(', 'ln(': 'ln('
-        }
-        for old, new in replacements.items():
-            expr_str = expr_str.replace(old, new)
-
-        # Handle trig functions with angle mode
-        # This is a simplified approach. A proper parser would be more robust.
-        # For now, it assumes functions are followed by '('.
-        import re
-        def replace_trig(match):
-            func_name = match.group(1)
-            # Correctly access math module functions via safe_globals
-            if self.angle_mode == "DEG":
-                # Wrap argument in radians() for math functions
-                return f"{func_name}(radians("
-            return f"{func_name}("  # Already in radians
-
-        # Need to be careful if 'radians' or 'degrees' are already in safe_globals for direct use
-        # The eval string needs to call math.radians if we use it this way.
-        # Simplified: expect user to use radians for math functions directly if using eval,
-        # or the buttons handle this. The _prepare_eval_string should make it eval-ready.
-
-        # For eval, ensure math.sin etc. are called.
-        # If button "sin" adds "sin(" to expression, and we want DEG mode:
-        # "sin(30)" should become "math.degrees(math.asin(math.radians(math.sin(math.radians(30)))))"
-        # This is too complex for simple string replacement.
-        # The current design directly puts math functions into safe_globals.
-        # If a user types "sin(pi/2)", it works.
-        # If they click "sin", then "30", then ")", in DEG mode, we need "sin(radians(30))".
-
-        # Let's assume _prepare_eval_string is for text already in a mostly Python-math-compatible form.
-        # The on_button_click for 'sin' etc. should handle adding 'radians()' if in DEG mode.
-
-        # Correcting ∛: if "pow(" was inserted, it might need a second argument for 1/3
-        expr_str = re.sub(r'pow\((\d+)\)', r'pow(\1, 1/3)', expr_str)  # If ∛(number) becomes pow(number)
-
-        return expr_str
-
-    def on_button_click(self):
-        sender = self.sender()
-        text = sender.text()
+    def _start_evaluation(self, refine=False):
         try:
-            if text == '=':
-                if self.expression:
-                    processed_expr = self.expression
-                    # Smartly add closing parentheses for radians if needed
-                    open_rad = processed_expr.count("radians(")
-                    open_paren = processed_expr.count("(")
-                    close_paren = processed_expr.count(")")
-
-                    # Add necessary closing parens for radians wrapper
-                    # and then for the function itself
-                    # This is heuristic and might not be perfect
-                    needed_closing_for_radians = open_rad - processed_expr.count("))")  # Approx
-
-                    # Add general closing parentheses
-                    needed_closing_general = open_paren - close_paren
-
-                    processed_expr += ")" * (needed_closing_general)
-
-                    eval_str = self._prepare_eval_string(processed_expr)
-                    print(f"Evaluating (Sci): {eval_str}")
-                    result = eval(eval_str, {"__builtins__": {}}, self.safe_globals)
-                    self.history.append(f"{self.expression} = {result:.10g}")
-                    self.expression = f"{result:.10g}"
-            elif text == 'C':
-                self.expression = ""
-            elif text == 'CE':
-                self.expression = ""  # Simplified
-            elif text == '⌫':
-                self.expression = self.expression[:-1]
-            elif text == '±':
-                if self.expression and self.expression.lstrip('-').replace('.', '', 1).isdigit():
-                    if self.expression.startswith('-'):
-                        self.expression = self.expression[1:]
-                    else:
-                        self.expression = '-' + self.expression
-                elif self.expression and not self.expression.startswith("-("):  # Add negation to whole expression
-                    self.expression = f"-({self.expression})"
-                elif self.expression.startswith("-("):  # Remove negation
-                    self.expression = self.expression[2:-1]
-
-            elif text in ['sin', 'cos', 'tan']:  # Trig functions
-                self.expression += text + ("(radians(" if self.angle_mode == "DEG" else "(")
-            elif text in ['log', 'ln', '√', '∛', 'asin', 'acos', 'atan']:  # Other functions needing (
-                # For ∛, we'll use 'pow(' and expect a number and ',1/3)' later or handle it in eval.
-                fn_text = text
-                if text == '√':
-                    fn_text = 'sqrt'
-                elif text == '∛':
-                    fn_text = 'pow'  # Will become pow(val, 1/3)
-                elif text == 'log':
-                    fn_text = 'log10'
-                self.expression += fn_text + "("
-                if text == '∛': self.expression += ""  # Expect user to type number, then we add ",1/3)" later or on =
-            elif text == 'x²':
-                self.expression += "**2"
-            elif text == 'x³':
-                self.expression += "**3"
-            elif text == 'x^y':
-                self.expression += "**"
-            else:
-                self.expression += text
+            compiled, digits, result = self.engine.begin_evaluation(refine)
+            if compiled is None:
+                return
+            if result is not None:
+                self.engine.complete_evaluation(compiled, result, digits)
+                return
+            self.pending_evaluation = (compiled, digits, self.evaluator.submit(compiled, digits))
+            self._poll_timer.start()
         except Exception as e:
-            self.expression = "Error"
-            print(f"ScientificCalc Error: {e}\nExpression was: {self.expression}")
+            self.engine.fail_evaluation(e)
+
+    def _poll_evaluation(self):
+        compiled, digits, pending = self.pending_evaluation
+        if pending.ready():
+            METRICS.observe("sci.evaluate_async", pending.elapsed())
+            self._finish_evaluation()
+            try:
+                self.engine.complete_evaluation(compiled, pending.result(), digits)
+            except Exception as e:
+                self.engine.fail_evaluation(e)
+        elif pending.elapsed() > self.EVALUATION_TIMEOUT:
+            self._cancel_evaluation()
+            self.engine.fail_evaluation(TimeoutError(f"exceeded {self.EVALUATION_TIMEOUT}s"), "Error: Timeout")
+        self._update_display()
+
+    def _cancel_evaluation(self):
+        self.evaluator.cancel()
+        self._finish_evaluation()
         self._update_display()
 
-    def update_theme(self, dark_mode):
-        self._setup_common_styles(dark_mode)
+    def _finish_evaluation(self):
+        self._poll_timer.stop()
+        self.pending_evaluation = None
 
 
 class ProgrammerCalculator(QWidget, BaseCalculatorMixin):
-    def __init__(self, dark_mode_ref):
+    # 'C' is a hex digit here; only CE/Clr clear
+    BUTTON_ROLES = {'=': 'equals', 'CE': 'clear', 'Clr': 'clear', 'Hist': 'hist'}
+
+    def __init__(self, history=None):
         super().__init__()
-        self.dark_mode_ref = dark_mode_ref
-        self.current_value_int = 0
-        self.input_str = "0"
-        self.display_base = "DEC"
-        self.history = []
-        self.stored_value_int = None
-        self.pending_operation = None
+        self.engine = ProgrammerEngine(history)
         self._init_keymap()
         self.init_ui()
-        self.update_theme(self.dark_mode_ref())
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
 
     def _init_keymap(self):
@@ -725,20 +764,13 @@ class ProgrammerCalculator(QWidget, BaseCalculatorMixin):
 
         if key in self.key_map:
             # Special handling for 'C' key if it means Clear vs Hex 'C'
-            if key == Qt.Key.Key_C and self.display_base == "HEX":
+            if key == Qt.Key.Key_C and self.engine.display_base == "HEX":
                 target_button_text = "C"  # The Hex digit C
             else:
                 target_button_text = self.key_map[key]
         elif char_from_event:
             # Use char_from_event directly if it's a digit or A-F (for current base)
-            valid_chars = "0123456789ABCDEF"  # Max set
-            if self.display_base == "DEC":
-                valid_chars = "0123456789"
-            elif self.display_base == "OCT":
-                valid_chars = "01234567"
-            elif self.display_base == "BIN":
-                valid_chars = "01"
-
+            valid_chars = BASE_DIGITS[self.engine.display_base]
             if char_from_event.upper() in valid_chars:
                 target_button_text = char_from_event.upper()
             elif char_from_event in self.char_to_button_map:
@@ -746,28 +778,43 @@ class ProgrammerCalculator(QWidget, BaseCalculatorMixin):
             elif char_from_event in "+-*/()":  # General operators
                 target_button_text = char_from_event
 
-        if target_button_text:
-            if self._find_and_click_button(target_button_text):
-                event.accept()
-                return
+        if target_button_text and self._trigger_action(target_button_text):
+            event.accept()
+            return
         super().keyPressEvent(event)
 
     def init_ui(self):
+        self.actions = {}
         layout = QVBoxLayout(self)
         top_bar_layout = QHBoxLayout()
         self.num_system_combo = QComboBox()
+        self.num_system_combo.setProperty("role", "mode")
         self.num_system_combo.addItems(["DEC", "HEX", "BIN", "OCT"])
         self.num_system_combo.currentTextChanged.connect(self.change_base)
         top_bar_layout.addWidget(self.num_system_combo)
 
+        self.word_size_combo = QComboBox()
+        self.word_size_combo.setProperty("role", "mode")
+        self.word_size_combo.addItem("Unbounded", None)
+        for bits in WORD_SIZES:
+            self.word_size_combo.addItem(f"{bits}-bit", bits)
+        self.word_size_combo.currentIndexChanged.connect(self.change_word_size)
+        top_bar_layout.addWidget(self.word_size_combo)
+
+        self.signed_combo = QComboBox()
+        self.signed_combo.setProperty("role", "mode")
+        self.signed_combo.addItems(["Signed", "Unsigned"])
+        self.signed_combo.setEnabled(False)  # Only meaningful with a fixed word size
+        self.signed_combo.currentIndexChanged.connect(self.change_word_size)
+        top_bar_layout.addWidget(self.signed_combo)
+
         hist_button_prog = QPushButton()
         hist_icon_prog = self._get_history_icon()
         if not hist_icon_prog.isNull():
             hist_button_prog.setIcon(hist_icon_prog); hist_button_prog.setIconSize(QSize(20, 20))
         else:
             hist_button_prog.setText("🕒 Hist")
-        hist_button_prog._is_hist_btn = True
-        hist_button_prog.clicked.connect(self.show_history_dialog)
+        self._register_action('Hist', hist_button_prog, self.show_history_dialog)
         top_bar_layout.addWidget(hist_button_prog)
         layout.addLayout(top_bar_layout)
 
@@ -785,6 +832,7 @@ class ProgrammerCalculator(QWidget, BaseCalculatorMixin):
             label_text_widget.setFont(QFont("Arial", 9))  # Smaller font for base names
             val_label = QLabel("0")
             val_label.setFont(QFont("Monospace", 10))  # Monospace for number alignment
+            val_label.setProperty("role", "conversion")
             conversion_layout.addWidget(label_text_widget, i, 0)
             conversion_layout.addWidget(val_label, i, 1, 1, 3)  # Value spans more columns
             self.conversion_labels[base_name] = val_label
@@ -808,175 +856,48 @@ class ProgrammerCalculator(QWidget, BaseCalculatorMixin):
             if text.strip() == "": continue
             button = QPushButton(text)
             button.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
-            button.clicked.connect(self.on_button_click)
+            if text in self.engine.commands:  # Only the disabled '.' placeholder has no command
+                self._register_action(text, button, partial(self.run_action, self.engine.commands[text]))
+            else:
+                button.setProperty("role", "key")
             button_layout.addWidget(button, r, c, rs, cs)
             if text in "ABCDEF": self.hex_buttons[text] = button
             if text == '.': button.setEnabled(False)  # Period not used in integer prog calc
 
         layout.addLayout(button_layout)
-        self.change_base(self.display_base)
+        self.change_base(self.engine.display_base)
         self._update_displays()
 
     def _update_displays(self):
-        base_map_out = {"HEX": hex, "DEC": str, "OCT": oct, "BIN": bin}
-        val_to_display_str = self.input_str
-        if not self.input_str and self.pending_operation:  # Show stored value if input is empty during op
-            val_to_display_str = \
-            base_map_out[self.display_base](self.stored_value_int).upper().split('X')[-1].split('B')[-1].split('O')[-1]
-            if not val_to_display_str: val_to_display_str = "0"
-        elif not self.input_str:
-            val_to_display_str = "0"
-        self.display.setText(val_to_display_str)
-
-        current_val_for_conversion = self.current_value_int
-        if self.input_str:  # If there's active input, use that for conversion display
-            try:
-                current_val_for_conversion = int(self.input_str,
-                                                 {"HEX": 16, "DEC": 10, "OCT": 8, "BIN": 2}[self.display_base])
-            except ValueError:
-                pass  # Keep last valid current_value_int
-
-        for base_name, label_widget in self.conversion_labels.items():
-            raw_val = base_map_out[base_name](current_val_for_conversion).upper()
-            # Strip 0x, 0b, 0o prefixes
-            processed_val = raw_val.split('X')[-1].split('B')[-1].split('O')[-1]
-            label_widget.setText(processed_val if processed_val else "0")
+        with METRICS.span("display.programmer"):
+            self.display.setText(self.engine.display_text)
+            for base_name, text in self.engine.conversions().items():
+                self.conversion_labels[base_name].setText(text)
 
     def change_base(self, new_base):
-        base_map_out = {"HEX": hex, "DEC": str, "OCT": oct, "BIN": bin}
-        self.display_base = new_base
-        # Convert current_value_int to the new base's string representation for input_str
-        raw_new_input_str = base_map_out[new_base](self.current_value_int).upper()
-        self.input_str = raw_new_input_str.split('X')[-1].split('B')[-1].split('O')[-1]
-        if not self.input_str: self.input_str = "0"
-
-        for btn_widget in self.findChildren(QPushButton):
-            txt = btn_widget.text()
-            if txt in "0123456789ABCDEF":  # Hex/Digit buttons
-                is_enabled = False
-                if txt in "01":
-                    is_enabled = True  # Always enable 0, 1
-                elif self.display_base == "OCT" and txt in "234567":
-                    is_enabled = True
-                elif self.display_base == "DEC" and txt in "23456789":
-                    is_enabled = True
-                elif self.display_base == "HEX" and txt in "23456789ABCDEF":
-                    is_enabled = True
-                btn_widget.setEnabled(is_enabled)
-            elif txt == '.':
-                btn_widget.setEnabled(False)  # Disable dot for all prog bases
+        self.engine.change_base(new_base)
+        valid_digits = BASE_DIGITS[new_base]
+        for digit in BASE_DIGITS["HEX"]:  # Hex/Digit buttons
+            self.actions[digit][0].setEnabled(digit in valid_digits)
 
         self._update_displays()
 
-    def _get_current_input_as_int(self):
-        base_map_in = {"HEX": 16, "DEC": 10, "OCT": 8, "BIN": 2}
-        try:
-            return int(self.input_str if self.input_str else "0", base_map_in[self.display_base])
-        except ValueError:
-            return self.current_value_int
-
-    def on_button_click(self):
-        sender = self.sender()
-        text = sender.text()
-        if hasattr(sender, '_is_hist_btn') and sender._is_hist_btn: text = "Hist"
-
-        valid_chars_map = {"HEX": "0123456789ABCDEF", "DEC": "0123456789", "OCT": "01234567", "BIN": "01"}
-        try:
-            if text in valid_chars_map[self.display_base]:
-                if self.input_str == "0" and text != "0":
-                    self.input_str = text
-                elif self.input_str == "0" and text == "0":
-                    pass  # Avoid multiple zeros
-                else:
-                    self.input_str += text
-                self.current_value_int = self._get_current_input_as_int()
-            elif text == 'Clr':
-                self.input_str = "0";
-                self.current_value_int = 0
-                self.stored_value_int = None;
-                self.pending_operation = None
-            elif text == 'CE':
-                self.input_str = "0"; self.current_value_int = 0
-            elif text == '⌫':
-                self.input_str = self.input_str[:-1] if len(self.input_str) > 1 else "0"
-                self.current_value_int = self._get_current_input_as_int()
-            elif text == '±':
-                self.current_value_int = -self._get_current_input_as_int()
-                self.change_base("DEC")  # Switch to DEC to show sign naturally
-                self.num_system_combo.setCurrentText("DEC")  # Update combo box
-            elif text in ['AND', 'OR', 'XOR', 'MOD', 'Lsh', 'Rsh', '+', '-', '*', '/']:
-                current_op_val = self._get_current_input_as_int()
-                if self.stored_value_int is not None and self.pending_operation:
-                    op_result = self.perform_prog_op(self.stored_value_int, current_op_val, self.pending_operation)
-                    if isinstance(op_result, str) and "Error" in op_result:  # Error occurred
-                        self.input_str = op_result;
-                        self.current_value_int = 0;
-                        self.stored_value_int = None;
-                        self.pending_operation = None
-                    else:
-                        self.history.append(
-                            f"{self.stored_value_int} {self.pending_operation} {current_op_val} = {op_result} (DEC)")
-                        self.stored_value_int = op_result;
-                        self.current_value_int = op_result
-                else:
-                    self.stored_value_int = current_op_val
-                self.pending_operation = text
-                self.input_str = ""  # Ready for next number, display will show stored_value_int in current base
-            elif text == 'NOT':
-                self.current_value_int = ~self._get_current_input_as_int()
-                self.history.append(f"NOT {self.input_str} = {self.current_value_int} (DEC)")
-                self.change_base("DEC")  # Result of NOT often shown in DEC
-                self.num_system_combo.setCurrentText("DEC")
-            elif text == '=':
-                if self.pending_operation and self.stored_value_int is not None:
-                    second_operand = self._get_current_input_as_int()
-                    op_result = self.perform_prog_op(self.stored_value_int, second_operand, self.pending_operation)
-                    if isinstance(op_result, str) and "Error" in op_result:
-                        self.input_str = op_result;
-                        self.current_value_int = 0
-                    else:
-                        self.history.append(
-                            f"{self.stored_value_int} {self.pending_operation} {second_operand} = {op_result} (DEC)")
-                        self.current_value_int = op_result
-                    self.change_base(self.display_base)  # Updates input_str from current_value_int
-                    self.stored_value_int = None  # Reset for next independent calculation
-                    self.pending_operation = None
-            elif text == 'Hist':
-                self.show_history_dialog()
-        except Exception as e:
-            self.input_str = "Error"; print(f"ProgrammerCalc Error: {e}")
+    def change_word_size(self, _index=None):
+        bits = self.word_size_combo.currentData()
+        self.signed_combo.setEnabled(bits is not None)
+        self.engine.set_word_size(bits, self.signed_combo.currentIndex() == 0)
         self._update_displays()
 
-    def perform_prog_op(self, val1, val2, op):
-        try:
-            if op == 'AND': return val1 & val2
-            if op == 'OR': return val1 | val2
-            if op == 'XOR': return val1 ^ val2
-            if op == 'MOD': return val1 % val2 if val2 != 0 else "Error: Mod by 0"
-            if op == 'Lsh': return val1 << val2
-            if op == 'Rsh': return val1 >> val2
-            if op == '+': return val1 + val2
-            if op == '-': return val1 - val2
-            if op == '*': return val1 * val2
-            if op == '/': return val1 // val2 if val2 != 0 else "Error: Div by 0"
-        except Exception as e:
-            return f"Error: {e}"
-        return "Error: Op?"
-
-    def update_theme(self, dark_mode):
-        self._setup_common_styles(dark_mode)
-        combo_stylesheet = ""
-        if dark_mode:
-            combo_stylesheet = """
-                QComboBox { background-color: #353535; color: white; border: 1px solid #555; padding: 3px; margin-bottom: 5px;}
-                QComboBox::drop-down { border: none; }
-                QComboBox QAbstractItemView { background-color: #252525; color: white; selection-background-color: #8e2dc5; }"""
-        else:
-            combo_stylesheet = "QComboBox { margin-bottom: 5px; }"  # Add margin for spacing
-        self.num_system_combo.setStyleSheet(combo_stylesheet)
+    def run_action(self, action):
+        with METRICS.span("action.programmer"):
+            self.engine.execute(action)
+            if self.num_system_combo.currentText() != self.engine.display_base:
+                self.num_system_combo.setCurrentText(self.engine.display_base)  # e.g. '±' and NOT switch to DEC
+            self._update_displays()
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
     app = QApplication(sys.argv)
     calculator = CalculatorApp()
     calculator.show()
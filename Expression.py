@@ -0,0 +1,668 @@
+"""
+Expression engine for the scientific calculator.
+
+Input such as ``sin(30) + 2**3`` is tokenized and parsed once into a
+small tuple-based syntax tree, validated against the allowed function table and
+compiled into a plain Python function. Compiled expressions are cached by their
+source text, so evaluating the same input again skips tokenizing and parsing.
+Numeric literals are lifted out into parameters before compiling, so
+structurally similar expressions such as ``sin(30)`` and ``sin(45)`` share a
+single code object.
+
+The angle mode is applied to the syntax tree at compile time: in ``DEG``
+mode every ``sin``/``cos``/``tan`` argument is wrapped in ``radians(...)`` and
+every ``asin``/``acos``/``atan`` result in ``degrees(...)``. The parsed tree is
+kept on the compiled expression, so switching modes recompiles from it
+without tokenizing or parsing again.
+
+The same compiled shape can also be bound to NumPy ufuncs (when NumPy is
+installed) and evaluated over whole arrays in one vectorized pass; see
+``CompiledExpression.evaluate_array``.
+
+Evaluated results are memoized in a bounded LRU ``ResultCache`` keyed by the
+canonical form of the expression, which already spells out any angle
+conversion, so a trig-free expression shares its entry between modes.
+
+``factorial``, ``pow`` and ``**`` go through ``BigNum``, which bounds the size
+of exact integer results before computing them. Only a literal raised to a
+literal exponent up to 4 stays a plain Python power; any computed base, even
+squared, is checked, since repeated squaring grows exponentially.
+"""
+import math
+import re
+import sys
+from collections import OrderedDict
+from decimal import Decimal
+from functools import lru_cache
+
+from BigNum import factorial, power
+
+
+class ExpressionError(ValueError):
+    """Raised for input that cannot be tokenized, parsed or validated."""
+
+
+FUNCTIONS = {
+    "abs": abs, "pow": power, "sqrt": math.sqrt, "cbrt": math.cbrt,
+    "log10": math.log10, "log": math.log10, "ln": math.log,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan,
+    "asin": math.asin, "acos": math.acos, "atan": math.atan,
+    "factorial": factorial, "radians": math.radians, "degrees": math.degrees,
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+# Display glyphs that may appear in the expression text
+_ALIASES = {"π": "pi", "√": "sqrt", "∛": "cbrt"}
+
+_TOKEN_RE = re.compile(r"""
+    \s*(?:
+        (?P<num>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+      | (?P<name>[A-Za-z_]\w*|[π√∛])
+      | (?P<op>\*\*|[-+*/%(),])
+    )""", re.VERBOSE)
+
+_NAMESPACES = {
+    "math": {"__builtins__": {}, **FUNCTIONS, **CONSTANTS, "_pow": power},
+}
+_SLOW_FUNCTIONS = frozenset({"pow", "factorial"})  # Cost grows with the size of the arguments
+_NATIVE_EXPONENTS = range(5)  # Literal exponents small enough for a literal base to use a plain '**'
+
+
+def _numpy():
+    """NumPy, imported on first vectorized use: it is optional and slow to import."""
+    try:
+        import numpy
+    except ImportError:
+        raise ExpressionError("Vectorized evaluation requires NumPy") from None
+    return numpy
+
+
+_FLOAT_FACTORIALS = 171  # 171! is past the float64 range
+
+
+def _array_factorial(np):
+    """Element-wise factorial: inf past 170!, nan for negative or non-integral inputs."""
+    table = np.array([math.factorial(n) for n in range(_FLOAT_FACTORIALS)], dtype=np.float64)
+
+    def factorial(x):
+        x = np.asarray(x, dtype=np.float64)
+        integral = (x >= 0) & (x == np.floor(x))  # False for nan too
+        result = table[np.where(integral, np.minimum(x, _FLOAT_FACTORIALS - 1), 0).astype(np.intp)]
+        result = np.where(x >= _FLOAT_FACTORIALS, np.inf, result)
+        return np.where(integral, result, np.nan)
+    return factorial
+
+
+def _numpy_namespace():
+    """Ufunc equivalents of FUNCTIONS."""
+    np = _numpy()
+    functions = {
+        "abs": np.abs, "pow": np.power, "sqrt": np.sqrt, "cbrt": np.cbrt,
+        "log10": np.log10, "log": np.log10, "ln": np.log,
+        "sin": np.sin, "cos": np.cos, "tan": np.tan,
+        "asin": np.arcsin, "acos": np.arccos, "atan": np.arctan,
+        "factorial": _array_factorial(np),
+        "radians": np.radians, "degrees": np.degrees,
+    }
+    return {"__builtins__": {}, **functions, **CONSTANTS, "_pow": np.power}
+
+
+def tokenize(text, exact=False):
+    """Split ``text`` into ``(kind, value, position)`` tuples.
+
+    Non-integer literals become floats, or with ``exact`` Decimals holding
+    every digit typed.
+    """
+    tokens = []
+    pos = 0
+    end = len(text.rstrip())
+    while pos < end:
+        kind, value, start, pos = _read_token(text, pos, exact)
+        tokens.append((kind, value, start))
+    return tokens
+
+
+def _read_token(text, pos, exact=False):
+    """The token at ``pos`` as ``(kind, value, start, end)``."""
+    match = _TOKEN_RE.match(text, pos)
+    if not match:
+        raise ExpressionError(f"Unexpected character {text[pos]!r} at position {pos}")
+    kind = match.lastgroup
+    value = match.group(kind)
+    if kind == "num":
+        if any(ch in value for ch in ".eE"):
+            value = Decimal(value) if exact else float(value)
+        else:
+            value = int(value)
+    elif kind == "name":
+        value = _ALIASES.get(value, value)
+    return kind, value, match.start(kind), match.end()
+
+
+class _Parser:
+    """Recursive-descent parser following Python's operator precedence.
+
+    Missing closing parentheses at the end of the input are tolerated, matching
+    the calculator's habit of leaving function calls open while typing.
+    """
+
+    def __init__(self, tokens, variables):
+        self.tokens = tokens
+        self.variables = variables
+        self.pos = 0
+
+    def _peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else (None, None, -1)
+
+    def _take(self):
+        token = self._peek()
+        self.pos += 1
+        return token
+
+    def _is_op(self, *ops):
+        kind, value, _ = self._peek()
+        return kind == "op" and value in ops
+
+    def _close_paren(self):
+        kind, value, pos = self._peek()
+        if kind is None:
+            return  # Implicitly closed at end of input
+        if kind == "op" and value == ")":
+            self.pos += 1
+            return
+        raise ExpressionError(f"Expected ')' at position {pos}")
+
+    def parse(self):
+        if not self.tokens:
+            raise ExpressionError("Empty expression")
+        tree = self._expr()
+        kind, value, pos = self._peek()
+        if kind is not None:
+            raise ExpressionError(f"Unexpected {value!r} at position {pos}")
+        return tree
+
+    def _expr(self):
+        node = self._term()
+        while self._is_op("+", "-"):
+            op = self._take()[1]
+            node = ("bin", op, node, self._term())
+        return node
+
+    def _term(self):
+        node = self._factor()
+        while self._is_op("*", "/", "%"):
+            op = self._take()[1]
+            node = ("bin", op, node, self._factor())
+        return node
+
+    def _factor(self):
+        if self._is_op("-"):
+            self.pos += 1
+            return ("neg", self._factor())
+        if self._is_op("+"):
+            self.pos += 1
+            return self._factor()
+        return self._power()
+
+    def _power(self):
+        node = self._atom()
+        if self._is_op("**"):
+            self.pos += 1
+            node = ("bin", "**", node, self._factor())  # Right-associative, like Python
+        return node
+
+    def _atom(self):
+        kind, value, pos = self._take()
+        if kind == "num":
+            return ("num", value)
+        if kind == "name":
+            if self._is_op("("):
+                if value not in FUNCTIONS:
+                    raise ExpressionError(f"Unknown function {value!r}")
+                self.pos += 1
+                args = []
+                if not self._is_op(")") and self._peek()[0] is not None:
+                    args.append(self._expr())
+                    while self._is_op(","):
+                        self.pos += 1
+                        args.append(self._expr())
+                self._close_paren()
+                return ("call", value, tuple(args))
+            if value in CONSTANTS or value in self.variables:
+                return ("name", value)
+            raise ExpressionError(f"Unknown name {value!r}")
+        if kind == "op" and value == "(":
+            node = self._expr()
+            self._close_paren()
+            return node
+        if kind is None:
+            raise ExpressionError("Unexpected end of expression")
+        raise ExpressionError(f"Unexpected {value!r} at position {pos}")
+
+
+def parse(text, variables=(), exact=False):
+    """Parse ``text`` into a syntax tree of nested tuples (see ``tokenize`` for ``exact``)."""
+    return _Parser(tokenize(text, exact), frozenset(variables)).parse()
+
+
+# Incremental parsing. The state after each token is an immutable tuple
+# (operands, operators, expect_operand, pending_name); the two stacks are cons
+# lists, (top, rest) or None, so every snapshot shares structure with the
+# previous one and costs O(1) to keep. Operators are ("bin", op, precedence),
+# ("neg",), ("pos",) (unary plus), ("paren",) or ("call", name, argument count).
+_BINARY_PRECEDENCE = {"+": 1, "-": 1, "*": 2, "/": 2, "%": 2, "**": 4}
+_NEG_PRECEDENCE = 3  # Below '**' (-2**2 is -4) and above '*'
+_INITIAL_STATE = (None, None, True, None)
+
+
+def _precedence(operator):
+    return operator[2] if operator[0] == "bin" else _NEG_PRECEDENCE
+
+
+def _apply(operator, operands):
+    """Pop ``operator``'s operands and push its node."""
+    right, operands = operands
+    if operator[0] == "neg":
+        return ("neg", right), operands
+    if operator[0] == "pos":
+        return right, operands
+    left, operands = operands
+    return ("bin", operator[1], left, right), operands
+
+
+def _reduce(operands, operators, binds_tighter=lambda operator: True):
+    """Apply stacked operators down to the nearest paren or call, while ``binds_tighter``."""
+    while operators is not None and operators[0][0] in ("bin", "neg", "pos") and binds_tighter(operators[0]):
+        operands = _apply(operators[0], operands)
+        operators = operators[1]
+    return operands, operators
+
+
+def _close_call(marker, operands, expect_operand):
+    """The call node for ``marker`` with its arguments popped from ``operands``."""
+    count = marker[2] + (not expect_operand)
+    args = []
+    for _ in range(count):
+        arg, operands = operands
+        args.append(arg)
+    return ("call", marker[1], tuple(reversed(args))), operands
+
+
+def _check_name(name, variables):
+    if name not in CONSTANTS and name not in variables:
+        raise ExpressionError(f"Unknown name {name!r}")
+
+
+def _step(state, token, variables):
+    """The parser state after ``token``."""
+    operands, operators, expect_operand, pending_name = state
+    kind, value, pos = token[:3]
+    if pending_name is not None:
+        if kind == "op" and value == "(":
+            if pending_name not in FUNCTIONS:
+                raise ExpressionError(f"Unknown function {pending_name!r}")
+            return operands[1], (("call", pending_name, 0), operators), True, None
+        _check_name(pending_name, variables)
+    if kind in ("num", "name"):
+        if not expect_operand:
+            raise ExpressionError(f"Unexpected {value!r} at position {pos}")
+        node = ("num", value) if kind == "num" else ("name", value)
+        return (node, operands), operators, False, value if kind == "name" else None
+    if expect_operand:
+        if value in ("-", "+"):
+            return operands, (("neg",) if value == "-" else ("pos",), operators), True, None
+        if value == "(":
+            return operands, (("paren",), operators), True, None
+        if value == ")" and operators is not None and operators[0][0] == "call" and operators[0][2] == 0:
+            node, operands = _close_call(operators[0], operands, True)
+            return (node, operands), operators[1], False, None
+        raise ExpressionError(f"Unexpected {value!r} at position {pos}")
+    if value in _BINARY_PRECEDENCE:
+        precedence = _BINARY_PRECEDENCE[value]
+        if value == "**":  # Right-associative
+            operands, operators = _reduce(operands, operators, lambda top: _precedence(top) > precedence)
+        else:
+            operands, operators = _reduce(operands, operators, lambda top: _precedence(top) >= precedence)
+        return operands, (("bin", value, precedence), operators), True, None
+    operands, operators = _reduce(operands, operators)
+    marker = operators[0] if operators is not None else None
+    if value == "," and marker is not None and marker[0] == "call":
+        return operands, (("call", marker[1], marker[2] + 1), operators[1]), True, None
+    if value == ")" and marker is not None:
+        if marker[0] == "call":
+            node, operands = _close_call(marker, operands, False)
+            operands = (node, operands)
+        return operands, operators[1], False, None
+    raise ExpressionError(f"Unexpected {value!r} at position {pos}")
+
+
+def _finish(state, variables):
+    """The syntax tree for a final state, closing any parentheses left open."""
+    operands, operators, expect_operand, pending_name = state
+    if pending_name is not None:
+        _check_name(pending_name, variables)
+    while True:
+        if expect_operand:
+            if operators is not None and operators[0][0] == "call" and operators[0][2] == 0:
+                node, operands = _close_call(operators[0], operands, True)  # "sin(" reads as sin()
+                operands, operators, expect_operand = (node, operands), operators[1], False
+                continue
+            raise ExpressionError("Unexpected end of expression")
+        operands, operators = _reduce(operands, operators)
+        if operators is None:
+            return operands[0]
+        marker, operators = operators
+        if marker[0] == "call":
+            node, operands = _close_call(marker, operands, False)
+            operands = (node, operands)
+
+
+class IncrementalParser:
+    """Parser for text edited a little at a time, such as the live preview's.
+
+    The tokens of the last text and the parser state after each of them are
+    kept. ``update`` keeps every token before the first changed character,
+    resumes from the state after the last one kept and consumes only what
+    follows, so typing or erasing at the end of a long expression handles one
+    or two tokens instead of reparsing it all. Trees match ``parse``.
+    """
+
+    def __init__(self, variables=()):
+        self.variables = frozenset(variables)
+        self.text = ""
+        self._tokens = []  # (kind, value, start, end)
+        self._states = [_INITIAL_STATE]  # _states[i] is the state after _tokens[:i]
+
+    def _rewind(self, text):
+        """Drop the tokens that ``text`` may have changed."""
+        if text.startswith(self.text) or self.text.startswith(text):  # Typing or erasing at the end
+            common = min(len(text), len(self.text))
+        else:
+            common = 0
+            while text[common] == self.text[common]:
+                common += 1
+        keep = len(self._tokens)
+        # A token ending at the edit may grow ("12" -> "123"), and a number up to
+        # three characters before it may swallow what follows ("1e+" -> "1e+5")
+        while keep and self._tokens[keep - 1][3] >= common - 2:
+            keep -= 1
+        del self._tokens[keep:]
+        del self._states[keep + 1:]
+
+    def update(self, text):
+        """Parse the new ``text``; returns its syntax tree or raises ExpressionError like ``parse``."""
+        self._rewind(text)
+        self.text = text
+        pos = self._tokens[-1][3] if self._tokens else 0
+        state = self._states[-1]
+        end = len(text.rstrip())
+        while pos < end:
+            token = _read_token(text, pos)
+            state = _step(state, token, self.variables)
+            self._tokens.append(token)
+            self._states.append(state)
+            pos = token[3]
+        if not self._tokens:
+            raise ExpressionError("Empty expression")
+        return _finish(state, self.variables)
+
+
+ANGLE_MODES = ("RAD", "DEG")
+_ANGLE_INPUTS = frozenset({"sin", "cos", "tan"})
+_ANGLE_OUTPUTS = frozenset({"asin", "acos", "atan"})
+
+
+def _in_degrees(node):
+    kind = node[0]
+    if kind == "neg":
+        return ("neg", _in_degrees(node[1]))
+    if kind == "bin":
+        return ("bin", node[1], _in_degrees(node[2]), _in_degrees(node[3]))
+    if kind != "call":
+        return node
+    name, args = node[1], tuple(_in_degrees(arg) for arg in node[2])
+    if name in _ANGLE_INPUTS:
+        return ("call", name, (("call", "radians", args),))
+    if name in _ANGLE_OUTPUTS:
+        return ("call", "degrees", (("call", name, args),))
+    return ("call", name, args)
+
+
+def apply_angle_mode(tree, angle_mode="RAD"):
+    """``tree`` with trig inputs and inverse-trig outputs converted for ``angle_mode``."""
+    if angle_mode not in ANGLE_MODES:
+        raise ValueError(f"Unknown angle mode: {angle_mode}")
+    return _in_degrees(tree) if angle_mode == "DEG" else tree
+
+
+def _is_native_power(node):
+    """True for ``literal ** small literal``, whose size the input text already bounds."""
+    base, exponent = node[2], node[3]
+    return base[0] == "num" and exponent[0] == "num" and exponent[1] in _NATIVE_EXPONENTS
+
+
+def _emit(node, constants):
+    """Render ``node`` as Python source, lifting literals into ``constants``."""
+    kind = node[0]
+    if kind == "num":
+        constants.append(node[1])
+        return f"_k{len(constants) - 1}"
+    if kind == "name":
+        return node[1]
+    if kind == "neg":
+        return f"(-{_emit(node[1], constants)})"
+    if kind == "bin":
+        if node[1] == "**" and not _is_native_power(node):
+            return f"_pow({_emit(node[2], constants)}, {_emit(node[3], constants)})"
+        return f"({_emit(node[2], constants)}{node[1]}{_emit(node[3], constants)})"
+    if kind == "call":
+        return f"{node[1]}({', '.join(_emit(arg, constants) for arg in node[2])})"
+    raise ExpressionError(f"Unknown node {kind!r}")
+
+
+def _render(node):
+    """Canonical source for ``node``: literals inline, whitespace normalized."""
+    kind = node[0]
+    if kind == "num":
+        return repr(node[1])
+    if kind == "name":
+        return node[1]
+    if kind == "neg":
+        return f"(-{_render(node[1])})"
+    if kind == "bin":
+        return f"({_render(node[2])}{node[1]}{_render(node[3])})"
+    return f"{node[1]}({', '.join(_render(arg) for arg in node[2])})"
+
+
+def _may_be_slow(node):
+    kind = node[0]
+    if kind == "neg":
+        return _may_be_slow(node[1])
+    if kind == "bin":
+        if node[1] == "**" and not _is_native_power(node):
+            return True
+        return _may_be_slow(node[2]) or _may_be_slow(node[3])
+    if kind == "call":
+        return node[1] in _SLOW_FUNCTIONS or any(_may_be_slow(arg) for arg in node[2])
+    return False
+
+
+def _used_names(node, names):
+    kind = node[0]
+    if kind == "name":
+        names.add(node[1])
+    elif kind == "neg":
+        _used_names(node[1], names)
+    elif kind == "bin":
+        _used_names(node[2], names)
+        _used_names(node[3], names)
+    elif kind == "call":
+        for arg in node[2]:
+            _used_names(arg, names)
+    return names
+
+
+@lru_cache(maxsize=512)
+def _build_function(shape, params, namespace="math"):
+    """Compile a lifted expression shape once per namespace."""
+    if namespace not in _NAMESPACES:
+        _NAMESPACES[namespace] = _numpy_namespace()
+    code = compile(f"lambda {', '.join(params)}: {shape}", "<expression>", "eval")
+    return eval(code, _NAMESPACES[namespace])
+
+
+class CompiledExpression:
+    """A parsed, validated expression ready for repeated evaluation.
+
+    ``tree`` is the tree as parsed; ``shape`` and ``canonical`` are built from
+    it after ``angle_mode`` has been applied.
+    """
+
+    __slots__ = ("source", "tree", "angle_mode", "shape", "canonical", "constants", "variables", "params",
+                 "_function")
+
+    def __init__(self, source, tree, variables=(), angle_mode="RAD"):
+        constants = []
+        converted = apply_angle_mode(tree, angle_mode)
+        self.source = source
+        self.tree = tree
+        self.angle_mode = angle_mode
+        self.shape = _emit(converted, constants)
+        self.canonical = _render(converted)
+        self.constants = tuple(constants)
+        used = _used_names(tree, set())
+        self.variables = tuple(name for name in variables if name in used)
+        self.params = tuple(f"_k{i}" for i in range(len(constants))) + self.variables
+        self._function = _build_function(self.shape, self.params)
+
+    def evaluate(self, **variables):
+        if self.variables:
+            return self._function(*self.constants, *(variables[name] for name in self.variables))
+        return self._function(*self.constants)
+
+    def with_angle_mode(self, angle_mode):
+        """This expression compiled for ``angle_mode``, reusing the parsed tree."""
+        if angle_mode == self.angle_mode:
+            return self
+        return CompiledExpression(self.source, self.tree, self.variables, angle_mode)
+
+    @property
+    def may_be_slow(self):
+        """True when the expression calls factorial or raises a computed value to a power.
+
+        Their cost grows with the arguments: ``((9**4)**4)**4`` or
+        ``factorial(n)**2`` can take seconds even with small exponents.
+        """
+        return _may_be_slow(self.tree)
+
+    def evaluate_array(self, angle_mode=None, **arrays):
+        """Evaluate over NumPy arrays bound to the expression's variables.
+
+        ``angle_mode``, when given, overrides the mode the expression was
+        compiled for. Everything is computed in float64, so integer inputs
+        cannot silently wrap around; where the scalar path would raise (a
+        zero divisor, a domain error) the element is inf or nan instead.
+        """
+        compiled = self.with_angle_mode(angle_mode) if angle_mode is not None else self
+        function = _build_function(compiled.shape, compiled.params, "numpy")
+        np = _numpy()
+        constants = (np.float64(constant) for constant in compiled.constants)
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            return function(*constants, *(np.asarray(arrays[name], dtype=np.float64) for name in compiled.variables))
+
+    def __repr__(self):
+        if self.angle_mode != "RAD":
+            return f"CompiledExpression({self.source!r}, angle_mode={self.angle_mode!r})"
+        return f"CompiledExpression({self.source!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_expression(text, variables=(), angle_mode="RAD"):
+    """Parse and compile ``text``; repeated calls with the same text are free.
+
+    Other angle modes are compiled from the ``RAD`` entry's tree, so the text
+    is parsed once whichever modes it is used in.
+    """
+    if angle_mode != "RAD":
+        return compile_expression(text, variables, "RAD").with_angle_mode(angle_mode)
+    return CompiledExpression(text, parse(text, variables), variables)
+
+
+def evaluate(text, **variables):
+    return compile_expression(text, tuple(sorted(variables))).evaluate(**variables)
+
+
+def evaluate_array(text, angle_mode="RAD", **arrays):
+    """Tabulate ``text`` over arrays in one vectorized pass.
+
+    >>> evaluate_array("sin(x) * 2", x=np.linspace(0, math.pi, 1_000_000))  # doctest: +SKIP
+    """
+    return compile_expression(text, tuple(sorted(arrays)), angle_mode).evaluate_array(**arrays)
+
+
+class ResultCache:
+    """Bounded LRU cache of evaluation results with an approximate memory cap.
+
+    Every function in the evaluation namespace is pure, so a result depends
+    only on the canonical expression (angle conversions included) and any
+    bound variables.
+    """
+
+    def __init__(self, max_entries=4096, max_bytes=32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (result, size in bytes)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, default=None):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def peek(self, key, default=None):
+        """Like ``get``, but left out of the hit/miss counts and the LRU order (e.g. for previews)."""
+        entry = self._entries.get(key)
+        return default if entry is None else entry[0]
+
+    def put(self, key, value):
+        size = sys.getsizeof(value) + sys.getsizeof(key[0])
+        if size > self.max_bytes:
+            return  # Would evict everything else; not worth keeping
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.current_bytes -= old[1]
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def stats(self):
+        return {
+            "entries": len(self._entries), "bytes": self.current_bytes,
+            "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+        }
+
+
+RESULT_CACHE = ResultCache()
+
+
+def cache_key(compiled, variant=None, **variables):
+    """Key for ``compiled``'s result; ``variant`` tells apart other evaluations of it, e.g. a precision."""
+    return compiled.canonical, variant, tuple(sorted(variables.items()))
+
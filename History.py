@@ -0,0 +1,362 @@
+"""
+Shared calculation history for all calculator tabs.
+
+Records are kept in a bounded in-memory ring buffer and, when the store has a
+path, appended to a JSON-lines log on disk so history survives restarts. The
+log is compacted (rewritten from the ring buffer) once it grows past
+``max_file_bytes`` and whenever history is cleared, so neither memory nor disk
+use grows without bound in long-running sessions. A store with a log also
+caps the ring by its serialized size, at half of ``max_file_bytes``, so a
+compaction always leaves room for more appends before the next one, however
+long the individual records are; without a log only ``max_records`` applies.
+
+Each tab's records are also kept in their own deque so a view can count and
+index them without scanning the shared buffer, and listeners registered with
+``subscribe`` are told about every append and clear so viewers can update
+incrementally.
+
+``HistoryIndex`` keeps an inverted index over record tokens and a sorted index
+over numeric results, so ``HistoryStore.search`` answers queries like "every
+calculation that produced 42" or "all XOR operations in the last week" without
+scanning the whole history.
+"""
+import bisect
+import heapq
+import json
+import os
+import re
+import time
+from collections import deque
+from dataclasses import asdict, dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryRecord:
+    seq: int
+    timestamp: float
+    tab: str
+    op: str
+    operands: tuple
+    result: str
+
+    @property
+    def text(self):
+        if self.op == "=":
+            text = f"{self.operands[0]} = {self.result}"
+        elif len(self.operands) == 1:
+            text = f"{self.op} {self.operands[0]} = {self.result}"
+        else:
+            text = f"{self.operands[0]} {self.op} {self.operands[1]} = {self.result}"
+        return f"{text} (DEC)" if self.tab == "programmer" else text
+
+    def to_json(self):
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line):
+        data = json.loads(line)
+        data["operands"] = tuple(data["operands"])
+        return cls(**data)
+
+
+_TOKEN_RE = re.compile(r"[a-z_]+\d*|\d+\.?\d*(?:e[+-]?\d+)?|\*\*|[^\s\w.]")
+_DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def _tokens(text):
+    return set(_TOKEN_RE.findall(text.lower()))
+
+
+def _numeric(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+class HistoryIndex:
+    """Inverted token index plus a sorted numeric-result index over HistoryRecords."""
+
+    def __init__(self):
+        self._records = {}  # seq -> record, for every live record
+        self._postings = {}  # token -> set of seq
+        self._by_result = []  # sorted (result, seq); may hold evicted seqs until rebuilt
+        self._unsorted = []  # (result, seq) added since the last merge
+        self._stale = 0
+
+    def _record_tokens(self, record):
+        return _tokens(f"{record.text} {record.tab}")
+
+    def add(self, record):
+        self._records[record.seq] = record
+        for token in self._record_tokens(record):
+            self._postings.setdefault(token, set()).add(record.seq)
+        value = _numeric(record.result)
+        if value is not None:
+            self._unsorted.append((value, record.seq))
+
+    def remove(self, record):
+        if self._records.pop(record.seq, None) is None:
+            return
+        for token in self._record_tokens(record):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.discard(record.seq)
+                if not postings:
+                    del self._postings[token]
+        if _numeric(record.result) is not None:
+            self._stale += 1
+
+    def clear(self):
+        self.__init__()
+
+    def _sorted_results(self):
+        if self._stale > len(self._records):
+            live = [(value, seq) for value, seq in self._by_result if seq in self._records]
+            self._by_result, self._stale = live, 0
+        if self._unsorted:
+            self._unsorted.sort()
+            self._by_result = list(heapq.merge(self._by_result, self._unsorted))
+            self._unsorted = []
+        return self._by_result
+
+    def search(self, text="", tab=None, result=None, result_min=None, result_max=None,
+               since=None, until=None, limit=None):
+        """Records matching every given criterion, newest first.
+
+        ``text`` matches records containing all of its tokens (operands,
+        operators, function names, results, tab name), case-insensitively.
+        """
+        candidates = None
+        for token in _tokens(text):
+            postings = self._postings.get(token, set())
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                return []
+        if result is not None:
+            result_min = result_max = float(result)
+        if result_min is not None or result_max is not None:
+            ordered = self._sorted_results()
+            lo = 0 if result_min is None else bisect.bisect_left(ordered, (result_min, -1))
+            hi = len(ordered) if result_max is None else bisect.bisect_right(ordered, (result_max, float("inf")))
+            in_range = {seq for _, seq in ordered[lo:hi] if seq in self._records}
+            candidates = in_range if candidates is None else candidates & in_range
+        seqs = self._records if candidates is None else candidates
+        matches = []
+        for seq in sorted(seqs, reverse=True):
+            record = self._records.get(seq)
+            if record is None or (tab is not None and record.tab != tab):
+                continue
+            if since is not None and record.timestamp < since:
+                continue  # Records are seq-ordered in time, but clocks can step backwards
+            if until is not None and record.timestamp > until:
+                continue
+            matches.append(record)
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+
+def parse_query(query, now=None):
+    """Turn a search-box query into ``HistoryIndex.search`` keyword arguments.
+
+    Plain words must all appear; ``=42`` matches a result of 42, ``>10`` /
+    ``<10`` bound the result, ``tab:programmer`` picks a tab and
+    ``since:7d`` (s/m/h/d/w) limits to recent records.
+    """
+    now = time.time() if now is None else now
+    criteria = {}
+    words = []
+    for term in query.split():
+        lowered = term.lower()
+        if lowered.startswith("tab:"):
+            criteria["tab"] = lowered[4:]
+        elif lowered.startswith("since:") and lowered[-1:] in _DURATION_UNITS and _numeric(lowered[6:-1]) is not None:
+            criteria["since"] = now - float(lowered[6:-1]) * _DURATION_UNITS[lowered[-1]]
+        elif term[:1] in "=<>" and _numeric(term[1:]) is not None:
+            value = float(term[1:])
+            key = {"=": "result", ">": "result_min", "<": "result_max"}[term[0]]
+            criteria[key] = value
+        else:
+            words.append(term)
+    criteria["text"] = " ".join(words)
+    return criteria
+
+
+class HistoryStore:
+    """Ring buffer of HistoryRecords with an optional append-only log file."""
+
+    def __init__(self, path=None, max_records=10_000, max_file_bytes=4 * 1024 * 1024):
+        self.path = path
+        self.max_records = max_records
+        self.max_file_bytes = max_file_bytes
+        self.index = HistoryIndex()
+        self._records = deque(maxlen=max_records)
+        self._sizes = {}  # seq -> bytes the record takes in the log
+        self._bytes = 0  # Log size of everything in the ring
+        self._by_tab = {}  # tab -> deque of that tab's records, oldest first
+        self._listeners = []
+        self._next_seq = 0
+        self._log = None
+        if path:
+            self._load()
+            self._log = open(path, "a", encoding="utf-8")
+            if self._log.tell() > max_file_bytes:
+                self.compact()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            return
+        with open(self.path, encoding="utf-8") as log:
+            for line in log:
+                try:
+                    self._append(HistoryRecord.from_json(line), len(line.rstrip("\n")) + 1)
+                except (ValueError, TypeError, KeyError):
+                    continue  # Skip a torn or foreign line rather than losing the whole log
+        if self._records:
+            self._next_seq = self._records[-1].seq + 1
+
+    def _append(self, record, size):
+        if len(self._records) == self.max_records:
+            self._evict_oldest()
+        self._records.append(record)
+        self._by_tab.setdefault(record.tab, deque()).append(record)
+        self._sizes[record.seq] = size
+        self._bytes += size
+        self.index.add(record)
+        while self.path and self._bytes > self.max_file_bytes // 2 and len(self._records) > 1:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        evicted = self._records.popleft()
+        self._by_tab[evicted.tab].popleft()  # Always that tab's oldest record
+        self._bytes -= self._sizes.pop(evicted.seq)
+        self.index.remove(evicted)
+
+    def __len__(self):
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    def add(self, tab, op, operands, result):
+        record = HistoryRecord(self._next_seq, time.time(), tab, op,
+                               tuple(str(operand) for operand in operands), str(result))
+        self._next_seq += 1
+        line = record.to_json() + "\n"
+        self._append(record, len(line))
+        if self._log is not None:
+            self._log.write(line)
+            self._log.flush()
+            if self._log.tell() > self.max_file_bytes:
+                self.compact()
+        self._notify("add", record)
+        return record
+
+    def records(self, tab=None):
+        """Records oldest first, optionally only those from ``tab``."""
+        if tab is None:
+            return list(self._records)
+        return list(self._by_tab.get(tab, ()))
+
+    def count(self, tab=None):
+        if tab is None:
+            return len(self._records)
+        return len(self._by_tab.get(tab, ()))
+
+    def newest(self, index, tab=None):
+        """The ``index``-th most recent record (0 is the latest)."""
+        records = self._records if tab is None else self._by_tab[tab]
+        return records[-1 - index]
+
+    def clear(self, tab=None):
+        if tab is None:
+            self._records.clear()
+            self._by_tab.clear()
+            self._sizes.clear()
+            self._bytes = 0
+            self.index.clear()
+        else:
+            kept = [record for record in self._records if record.tab != tab]
+            self._records.clear()
+            self._records.extend(kept)
+            for record in self._by_tab.pop(tab, ()):
+                self._bytes -= self._sizes.pop(record.seq)
+                self.index.remove(record)
+        self.compact()
+        self._notify("clear", None)
+
+    def search(self, query="", **criteria):
+        """Search with a query string (see ``parse_query``) and/or keyword criteria."""
+        return self.index.search(**{**parse_query(query), **criteria})
+
+    def subscribe(self, listener):
+        """Call ``listener(event, record)`` on every ``"add"`` and ``"clear"``."""
+        self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _notify(self, event, record):
+        for listener in list(self._listeners):
+            listener(event, record)
+
+    def compact(self):
+        """Rewrite the log to hold exactly the records in memory."""
+        if self.path is None:
+            return
+        if self._log is not None:
+            self._log.close()
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as tmp:
+            for record in self._records:
+                tmp.write(record.to_json() + "\n")
+        os.replace(tmp_path, self.path)
+        self._log = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def view(self, tab):
+        return HistoryView(self, tab)
+
+
+class HistoryView:
+    """The slice of a HistoryStore belonging to one calculator tab."""
+
+    def __init__(self, store, tab):
+        self.store = store
+        self.tab = tab
+
+    def add(self, op, operands, result):
+        return self.store.add(self.tab, op, operands, result)
+
+    def records(self):
+        return self.store.records(self.tab)
+
+    def newest(self, index):
+        return self.store.newest(index, self.tab)
+
+    def texts(self):
+        return [record.text for record in self.records()]
+
+    def search(self, query="", **criteria):
+        return self.store.search(query, tab=self.tab, **criteria)
+
+    def clear(self):
+        self.store.clear(self.tab)
+
+    def __len__(self):
+        return self.store.count(self.tab)
+
+    def __iter__(self):
+        return iter(self.records())
+
+
+def default_history_path():
+    return os.environ.get("CALCULATOR_HISTORY",
+                          os.path.join(os.path.expanduser("~"), ".calculator", "history.jsonl"))
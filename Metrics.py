@@ -0,0 +1,126 @@
+"""
+Lightweight timing instrumentation for the calculator's hot paths.
+
+Code under measurement is wrapped in a span:
+
+    with METRICS.span("evaluate"):
+        ...
+
+Each span name keeps a histogram of its most recent durations, summarised as
+count, sum and p50/p95/p99, and the whole set can be exported as JSON or as
+Prometheus text exposition format. Collection is off unless the
+``CALCULATOR_METRICS`` environment variable is set (to ``1``, or to a file
+path the metrics are written to on exit); while off, ``span`` returns a shared
+no-op context manager and ``observe`` returns immediately.
+"""
+import json
+import os
+import time
+from collections import deque
+from contextlib import nullcontext
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_NULL_SPAN = nullcontext()
+
+
+class Histogram:
+    """Duration samples for one span: exact count and sum, percentiles over recent samples."""
+
+    __slots__ = ("count", "total", "_samples")
+
+    def __init__(self, max_samples=4096):
+        self.count = 0
+        self.total = 0.0
+        self._samples = deque(maxlen=max_samples)
+
+    def observe(self, seconds):
+        self.count += 1
+        self.total += seconds
+        self._samples.append(seconds)
+
+    def percentiles(self, quantiles=QUANTILES):
+        ordered = sorted(self._samples)
+        if not ordered:
+            return {q: 0.0 for q in quantiles}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in quantiles}
+
+    def snapshot(self):
+        return {"count": self.count, "sum": self.total,
+                **{f"p{round(q * 100)}": value for q, value in self.percentiles().items()}}
+
+
+class _Span:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._started)
+        return False
+
+
+class Metrics:
+    """Named span histograms; cheap no-ops while ``enabled`` is false."""
+
+    def __init__(self, enabled=False, max_samples=4096):
+        self.enabled = enabled
+        self.max_samples = max_samples
+        self._histograms = {}
+
+    def _histogram(self, name):
+        histogram = self._histograms.get(name)
+        if histogram is None:
+            histogram = self._histograms[name] = Histogram(self.max_samples)
+        return histogram
+
+    def span(self, name):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self._histogram(name))
+
+    def observe(self, name, seconds):
+        """Record a duration measured elsewhere (e.g. across event-loop turns)."""
+        if self.enabled:
+            self._histogram(name).observe(seconds)
+
+    def reset(self):
+        self._histograms.clear()
+
+    def snapshot(self):
+        return {name: histogram.snapshot() for name, histogram in sorted(self._histograms.items())}
+
+    def to_json(self):
+        return json.dumps({"timestamp": time.time(), "spans": self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        lines = ["# HELP calculator_span_seconds Time spent in instrumented calculator code paths.",
+                 "# TYPE calculator_span_seconds summary"]
+        for name, histogram in sorted(self._histograms.items()):
+            for q, value in histogram.percentiles().items():
+                lines.append(f'calculator_span_seconds{{span="{name}",quantile="{q}"}} {value:.9f}')
+            lines.append(f'calculator_span_seconds_sum{{span="{name}"}} {histogram.total:.9f}')
+            lines.append(f'calculator_span_seconds_count{{span="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """Write Prometheus text for ``*.prom`` paths, JSON otherwise."""
+        text = self.to_prometheus() if path.endswith(".prom") else self.to_json()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            out.write(text)
+        os.replace(tmp_path, path)  # Scrapers never see a half-written file
+
+
+def metrics_path():
+    """The file to export metrics to on exit, if ``CALCULATOR_METRICS`` names one."""
+    value = os.environ.get("CALCULATOR_METRICS", "")
+    return value if value not in ("", "0", "1") else None
+
+
+METRICS = Metrics(enabled=os.environ.get("CALCULATOR_METRICS", "0") not in ("", "0"))
@@ -0,0 +1,122 @@
+"""
+Number backends for the basic calculator.
+
+A backend turns display text into numbers, does the four operations and
+formats results back to text; ``convert`` takes a value over from another
+backend when the user switches. ``FLOAT`` is the default and stays on native
+floats with ``:.10g`` display. ``DecimalBackend`` computes in ``decimal``
+with its own context (precision and rounding), so ``0.1 + 0.2`` is exactly
+``0.3`` and long running totals don't drift. ``FRACTION`` keeps exact
+rationals: terminating results display as decimals and the rest as ``p/q``,
+which parses back to the same value when the chain continues.
+"""
+import decimal
+from fractions import Fraction
+
+
+class FloatBackend:
+    name = "float"
+
+    parse = staticmethod(float)
+    convert = staticmethod(float)
+
+    @staticmethod
+    def format(value):
+        return f"{value:.10g}"
+
+    @staticmethod
+    def calculate(val1, val2, op):
+        if op == '+': return val1 + val2
+        if op == '-': return val1 - val2
+        if op == '*': return val1 * val2
+        if op == '/':
+            if val2 == 0: return "Error: Div by 0"
+            return val1 / val2
+        return "Error: Unknown op"
+
+
+class DecimalBackend:
+    name = "decimal"
+
+    def __init__(self, precision=28, rounding=decimal.ROUND_HALF_EVEN):
+        self.context = decimal.Context(prec=precision, rounding=rounding, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+        self._operations = {'+': self.context.add, '-': self.context.subtract,
+                            '*': self.context.multiply, '/': self.context.divide}
+
+    def parse(self, text):
+        try:
+            return self.context.create_decimal(text)
+        except decimal.InvalidOperation:
+            raise ValueError(f"Not a number: {text!r}") from None
+
+    def convert(self, value):
+        """A value from another backend, rounded to this context."""
+        if isinstance(value, Fraction):
+            return self.context.divide(decimal.Decimal(value.numerator), decimal.Decimal(value.denominator))
+        return self.context.create_decimal(repr(value) if isinstance(value, float) else value)
+
+    def format(self, value):
+        value = value.normalize(self.context)
+        if -self.context.prec <= value.adjusted() < self.context.prec:
+            return format(value, "f")  # Plain digits: 10 rather than 1E+1
+        return str(value)
+
+    def calculate(self, val1, val2, op):
+        if op == '/' and val2 == 0:
+            return "Error: Div by 0"
+        operation = self._operations.get(op)
+        if operation is None:
+            return "Error: Unknown op"
+        return operation(val1, val2)
+
+
+class FractionBackend:
+    name = "fraction"
+    MAX_DECIMAL_DIGITS = 30  # Longer terminating expansions are shown as p/q
+
+    @staticmethod
+    def parse(text):
+        try:
+            return Fraction(text)
+        except ZeroDivisionError:
+            raise ValueError(f"Not a number: {text!r}") from None
+
+    @staticmethod
+    def convert(value):
+        # Floats go through their shortest repr, so 0.1 becomes 1/10 rather than its binary expansion
+        return Fraction(repr(value)) if isinstance(value, float) else Fraction(value)
+
+    def format(self, value):
+        if value.denominator == 1:
+            return str(value.numerator)
+        denominator, twos, fives = value.denominator, 0, 0
+        while denominator % 2 == 0:
+            denominator //= 2; twos += 1
+        while denominator % 5 == 0:
+            denominator //= 5; fives += 1
+        places = max(twos, fives)
+        if denominator != 1 or places > self.MAX_DECIMAL_DIGITS:
+            return f"{value.numerator}/{value.denominator}"
+        scaled = abs(value.numerator) * 10 ** places // value.denominator  # Exact: the expansion terminates
+        digits = str(scaled).rjust(places + 1, "0")
+        sign = "-" if value < 0 else ""
+        return f"{sign}{digits[:-places]}.{digits[-places:]}"
+
+    @staticmethod
+    def calculate(val1, val2, op):
+        return FloatBackend.calculate(val1, val2, op)
+
+
+FLOAT = FloatBackend()
+FRACTION = FractionBackend()
+
+
+def make_backend(name, **options):
+    """``"float"``, ``"fraction"`` or ``"decimal"`` (options: ``precision``, ``rounding``)."""
+    if name == "float":
+        return FLOAT
+    if name == "fraction":
+        return FRACTION
+    if name == "decimal":
+        return DecimalBackend(**options)
+    raise ValueError(f"Unknown numeric backend: {name}")
@@ -0,0 +1,195 @@
+"""
+Parallel evaluation of scientific expression batches on a process pool.
+
+Expression text is shipped to the workers in chunks and compiled there, so
+tokenizing and parsing scale with the pool instead of running serially in the
+calling process. Each worker keeps its own compile cache: repeated lines are
+parsed once per worker, and every expression with the same lifted shape (the
+structure with literals taken out) shares one compiled function. Results come
+back in input order; failed entries hold the exception instead of a value.
+
+    with ParallelEvaluator(max_workers=32) as evaluator:
+        results = evaluator.map(lines)
+
+``AsyncEvaluator`` runs single interactive evaluations in a worker process that
+can be killed mid-computation, which a thread cannot be; the GUI uses it to
+keep painting while ``factorial(100000)`` runs and to honour cancel/timeouts.
+Precise (``Precision``) evaluations run there too; the worker outlives each
+call, so asking for more digits reuses the series it has already summed.
+"""
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from Expression import _build_function, compile_expression
+from Precision import evaluate_precise
+
+
+def _evaluate_chunk(forms):
+    results = []
+    for shape, params, constants in forms:
+        try:
+            results.append(_build_function(shape, params)(*constants))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _evaluate_texts(texts):
+    results = []
+    for text in texts:
+        try:
+            results.append(compile_expression(text.strip()).evaluate())
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _apply_texts(evaluator, texts):
+    results = []
+    for text in texts:
+        try:
+            results.append(evaluator(text))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+def _evaluate_precise(source, digits, angle_mode):
+    # Runs in the AsyncEvaluator worker, whose Precision caches persist between calls
+    try:
+        return [evaluate_precise(source, digits, angle_mode)]
+    except Exception as e:
+        return [e]
+
+
+def _form(compiled):
+    return compiled.shape, compiled.params, compiled.constants
+
+
+class BatchJob:
+    """Handle for a submitted batch; iterate it for results in input order.
+
+    Iterating a cancelled batch raises ``concurrent.futures.CancelledError``.
+    """
+
+    def __init__(self, futures):
+        self._futures = futures
+
+    def __iter__(self):
+        for future in self._futures:
+            yield from future.result()
+
+    def results(self):
+        return list(self)
+
+    def done(self):
+        return all(future.done() for future in self._futures)
+
+    def cancel(self):
+        """Cancel every chunk that has not started yet; returns how many were cancelled."""
+        return sum(future.cancel() for future in self._futures)
+
+    @property
+    def cancelled(self):
+        return any(future.cancelled() for future in self._futures)
+
+
+class ParallelEvaluator:
+    """Evaluate batches of expressions across ``max_workers`` processes."""
+
+    def __init__(self, max_workers=None, chunksize=256):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = chunksize
+        self._executor = None
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, expressions, chunksize=None, evaluator=None):
+        """Queue ``expressions`` in chunks for the workers to compile and evaluate; returns a BatchJob.
+
+        ``evaluator`` replaces the default compile-and-evaluate with a picklable
+        per-line function, e.g. one that formats results for output.
+        """
+        chunksize = chunksize or self.chunksize
+        executor = self._get_executor()
+
+        def queue(chunk):
+            if evaluator is None:
+                return executor.submit(_evaluate_texts, chunk)
+            return executor.submit(_apply_texts, evaluator, chunk)
+
+        futures = []
+        chunk = []
+        for text in expressions:
+            chunk.append(text)
+            if len(chunk) >= chunksize:
+                futures.append(queue(chunk))
+                chunk = []
+        if chunk:
+            futures.append(queue(chunk))
+        return BatchJob(futures)
+
+    def map(self, expressions, chunksize=None):
+        """Evaluate ``expressions`` and return the results as an ordered list."""
+        return self.submit(expressions, chunksize).results()
+
+    def shutdown(self, cancel_pending=True):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=cancel_pending)
+            self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.shutdown()
+
+
+class PendingEvaluation:
+    """An evaluation running in an AsyncEvaluator worker."""
+
+    def __init__(self, async_result):
+        self._async_result = async_result
+        self.started = time.monotonic()
+
+    def ready(self):
+        return self._async_result.ready()
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def result(self):
+        """The value, or the evaluation's exception re-raised."""
+        value = self._async_result.get()[0]
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+class AsyncEvaluator:
+    """Evaluate one compiled expression at a time in a killable worker process."""
+
+    def __init__(self):
+        self._pool = None
+
+    def submit(self, compiled, digits=None):
+        """Evaluate ``compiled`` with floats, or to ``digits`` significant digits with Precision."""
+        if self._pool is None:
+            # spawn, not fork: forking a process that is running a Qt event loop is unsafe
+            self._pool = multiprocessing.get_context("spawn").Pool(1)
+        if digits is not None:
+            return PendingEvaluation(self._pool.apply_async(_evaluate_precise, (compiled.source, digits, compiled.angle_mode)))
+        return PendingEvaluation(self._pool.apply_async(_evaluate_chunk, ([_form(compiled)],)))
+
+    def cancel(self):
+        """Kill the worker and anything it is computing; the next submit starts a fresh one."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
+
+    shutdown = cancel
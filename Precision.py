@@ -0,0 +1,354 @@
+"""
+Arbitrary-precision evaluation for the scientific calculator.
+
+The ``math`` functions behind ``Expression`` stop at double precision. Here
+the same syntax tree is evaluated in ``decimal`` arithmetic at any working
+precision:
+
+    >>> evaluate_precise("sin(1) + ln(2)", 40)  # doctest: +SKIP
+    Decimal('1.534618165367841816069734443088475567698')
+
+``sqrt`` and integer powers are ``decimal``'s own. ``exp``, ``ln``/``log10``,
+fractional powers, ``sin``/``cos``/``tan``, their inverses and ``pi`` are
+power series summed in exact rationals (``decimal``'s exp and ln are
+correctly rounded but slow down steeply past a thousand digits). Each series
+is kept per exact argument with its running partial sum, so asking for more
+digits continues from the last term added instead of starting over. The
+arguments are made exact before summing: exp and sin/cos halve theirs until
+it is small and square (or double-angle) back up, ln scales by a power of
+two, and atan reflects through exact rationals.
+
+Results are precision-on-demand. ``PreciseResult.digits(n)`` evaluates on a
+ladder of working precisions (32, 64, 128, ... digits) and accepts the first
+``n`` significant digits once two consecutive rungs agree on them, climbing
+further if they do not, for at most ``_MAX_RUNGS`` doublings; a value that
+keeps changing (``tan(pi/2)``) is then reported as undeterminable. Every rung's value is kept, so a later request for
+more digits (a refinement) reuses the rungs already computed.
+"""
+import decimal
+import math
+from decimal import Decimal
+from fractions import Fraction
+from functools import lru_cache
+
+from BigNum import factorial
+from Expression import ExpressionError, apply_angle_mode, parse
+
+MAX_DIGITS = 10_000
+_FIRST_RUNG = 32  # Working digits of the lowest precision on the ladder
+_GUARD_DIGITS = 10  # Working digits kept beyond those requested
+_MAX_RUNGS = 4  # Doublings past the first rung before a result counts as undeterminable
+_NEWTON_STEPS = 100  # Far more than quadratic convergence from a float guess needs
+_HALF = Fraction(1, 2)
+_SIN_COS_BOUND = Fraction(1, 256)  # sin/cos arguments are halved to at most this, then doubled back up
+_EXACT_SERIES_BITS = 512  # Longer arguments are summed in rounded decimal arithmetic instead
+_BITS_PER_DIGIT = math.log2(10)
+
+
+def _context(precision):
+    return decimal.Context(prec=precision, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+
+
+class _Series:
+    """Partial sums of a power series at one exact rational argument.
+
+    Consecutive terms have the ratio ``ratio(k) = (num, den)``, a pair of
+    integers. The running sum is kept over the current term's denominator,
+    unreduced, so extending it costs a few big-integer multiplications per
+    term and no gcds.
+    """
+
+    __slots__ = ("ratio", "k", "numerator", "denominator", "total")
+
+    def __init__(self, first, ratio):
+        self.ratio = ratio
+        self.k = 0
+        self.numerator, self.denominator = first.numerator, first.denominator  # The last term added
+        self.total = first.numerator
+
+    def value(self, context):
+        """The sum to ``context``'s precision (plus a digit), rounded to it."""
+        bits = math.ceil((context.prec + 1) * _BITS_PER_DIGIT) + 1  # |term| < 10**-(prec + 1), by bit length
+        while self.numerator and self.denominator.bit_length() - self.numerator.bit_length() <= bits:
+            num, den = self.ratio(self.k)
+            self.numerator *= num
+            self.denominator *= den
+            self.total = self.total * den + self.numerator
+            self.k += 1
+        return context.divide(Decimal(self.total), Decimal(self.denominator))
+
+
+@lru_cache(maxsize=512)
+def _series(kind, x):
+    """The cached ``exp``, ``sin``, ``cos``, ``atan`` or ``atanh`` series at the exact rational ``x``."""
+    if kind == "exp":
+        return _Series(Fraction(1), lambda k: (x.numerator, x.denominator * (k + 1)))
+    p2, q2 = x.numerator ** 2, x.denominator ** 2
+    if kind == "atanh":
+        return _Series(x, lambda k: (p2 * (2 * k + 1), q2 * (2 * k + 3)))
+    if kind == "sin":
+        return _Series(x, lambda k: (-p2, q2 * (2 * k + 2) * (2 * k + 3)))
+    if kind == "cos":
+        return _Series(Fraction(1), lambda k: (-p2, q2 * (2 * k + 1) * (2 * k + 2)))
+    return _Series(x, lambda k: (-p2 * (2 * k + 1), q2 * (2 * k + 3)))
+
+
+def _pi(context):
+    # Machin: pi = 16 atan(1/5) - 4 atan(1/239)
+    working = _context(context.prec + 3)
+    return context.subtract(working.multiply(16, _series("atan", Fraction(1, 5)).value(working)),
+                            working.multiply(4, _series("atan", Fraction(1, 239)).value(working)))
+
+
+def _atan_exact(x, context):
+    """atan of the exact rational ``x``."""
+    if x < 0:
+        return context.minus(_atan_exact(-x, context))
+    working = _context(context.prec + 3)
+    if x > 1:  # atan(x) = pi/2 - atan(1/x)
+        return context.subtract(working.divide(_pi(working), 2), _atan_exact(1 / x, working))
+    if x > _HALF:  # atan(x) = pi/4 + atan((x - 1) / (x + 1)), with |(x - 1) / (x + 1)| <= 1/3
+        return context.add(working.divide(_pi(working), 4), _series("atan", (x - 1) / (x + 1)).value(working))
+    return context.plus(_series("atan", x).value(working))
+
+
+def _halved(x, bound=_HALF):
+    """``(x / 2**halvings, halvings)`` for the exact rational ``x``, with the result at most ``bound``."""
+    halvings = 0
+    while abs(x) > bound:
+        x /= 2
+        halvings += 1
+    return x, halvings
+
+
+def _exp(context, x):
+    argument, halvings = _halved(Fraction(x))
+    # Each squaring doubles the relative error: about 0.3 digits
+    working = _context(context.prec + (31 * halvings + 99) // 100 + 2)
+    result = _series("exp", argument).value(working)
+    for _ in range(halvings):
+        result = working.multiply(result, result)
+    return context.plus(result)
+
+
+def _ln_exact(x, context):
+    """ln of the positive exact rational ``x``: ``k ln 2 + 2 atanh((y - 1) / (y + 1))`` for ``x = 2**k y``."""
+    k = x.numerator.bit_length() - x.denominator.bit_length()
+    y = x / 2 ** k if k >= 0 else x * 2 ** -k
+    if y > Fraction(4, 3):
+        y, k = y / 2, k + 1
+    elif y < Fraction(2, 3):
+        y, k = y * 2, k - 1
+    working = _context(context.prec + len(str(abs(k))) + 3)
+    result = working.multiply(2, _series("atanh", (y - 1) / (y + 1)).value(working))
+    if k:
+        ln2 = working.multiply(2, _series("atanh", Fraction(1, 3)).value(working))
+        result = working.add(result, working.multiply(k, ln2))
+    return context.plus(result)
+
+
+def _ln(context, x):
+    if x <= 0:
+        raise ValueError("math domain error")
+    return _ln_exact(Fraction(x), context)
+
+
+def _log10(context, x):
+    if x <= 0:
+        raise ValueError("math domain error")
+    if x == Decimal(1).scaleb(x.adjusted()):
+        return Decimal(x.adjusted())  # Exact for powers of ten
+    working = _context(context.prec + 3)
+    return context.divide(_ln_exact(Fraction(x), working), _ln_exact(Fraction(10), working))
+
+
+def _power(context, x, y):
+    if not y:
+        return Decimal(1)
+    if not x and y < 0:
+        raise ZeroDivisionError("0 cannot be raised to a negative power")
+    if y == y.to_integral_value():
+        return context.power(x, y)  # Exact repeated squaring, then rounded
+    if x < 0:
+        raise ValueError("math domain error")
+    if not x:
+        return x
+    # x**y = exp(y ln x); an error e in y ln x becomes a relative error e in the result
+    exponent = _context(context.prec + 2).multiply(y, _ln(_context(context.prec + 2), x))
+    working = _context(context.prec + max(0, exponent.adjusted()) + 3)
+    return context.plus(_exp(working, working.multiply(y, _ln(working, x))))
+
+
+def _sin_cos_rounded(x, context):
+    """``(sin x, cos x)`` for a small Decimal ``x``, summed in ``context``'s rounded arithmetic."""
+    sin, cos, term, n = x, Decimal(1), x, 1
+    tolerance = x.copy_abs().scaleb(-context.prec - 1)
+    while term.copy_abs() > tolerance:  # term = x**n / n!, alternating between sin and cos
+        n += 1
+        term = context.divide(context.multiply(term, x), n)
+        if n % 4 == 0:
+            cos = context.add(cos, term)
+        elif n % 4 == 1:
+            sin = context.add(sin, term)
+        elif n % 4 == 2:
+            cos = context.subtract(cos, term)
+        else:
+            sin = context.subtract(sin, term)
+    return sin, cos
+
+
+def _sin_cos(x, context):
+    """``(sin x, cos x)`` for the Decimal ``x``."""
+    argument, halvings = _halved(Fraction(x), _SIN_COS_BOUND)
+    # Each doubling step can multiply the error by up to 4, about 0.6 digits
+    working = _context(context.prec + (61 * halvings + 99) // 100 + 2)
+    if working.prec > MAX_DIGITS + context.prec:
+        raise ExpressionError("Angle too large for precise evaluation")
+    if argument and argument.denominator.bit_length() > _EXACT_SERIES_BITS:
+        # A long argument such as pi/2 would make every exact term huge; it is never asked for again anyway
+        sin, cos = _sin_cos_rounded(working.divide(x, 2 ** halvings), working)
+    else:
+        sin, cos = _series("sin", argument).value(working), _series("cos", argument).value(working)
+    for _ in range(halvings):
+        sin, cos = working.multiply(2, working.multiply(sin, cos)), working.subtract(
+            working.multiply(cos, cos), working.multiply(sin, sin))
+    return context.plus(sin), context.plus(cos)
+
+
+def _atan(context, x):
+    return _atan_exact(Fraction(x), context)
+
+
+def _asin(context, x):
+    if abs(x) > 1:
+        raise ValueError("math domain error")
+    if abs(x) == 1:
+        return context.multiply(x, context.divide(_pi(context), 2))
+    working = _context(context.prec + 5)
+    return _atan(context, working.divide(x, working.sqrt(working.subtract(1, working.multiply(x, x)))))
+
+
+def _acos(context, x):
+    return context.subtract(context.divide(_pi(context), 2), _asin(context, x))
+
+
+def _cbrt(context, x):
+    if not x:
+        return x
+    working = _context(context.prec + 3)
+    magnitude = abs(x)
+    guess = math.cbrt(float(magnitude))
+    root = Decimal(guess) if 0 < guess < math.inf else _power(working, magnitude, working.divide(1, 3))
+    for _ in range(_NEWTON_STEPS):  # Newton: root <- (2 root + x / root**2) / 3
+        refined = working.divide(working.add(working.multiply(2, root),
+                                             working.divide(magnitude, working.multiply(root, root))), 3)
+        # Rounding can leave the iterates alternating between neighbours, so stop within an ulp
+        converged = working.subtract(refined, root).copy_abs() <= refined.scaleb(-working.prec).copy_abs()
+        root = refined
+        if converged:
+            break
+    return context.copy_sign(context.plus(root), x)
+
+
+def _factorial(context, x):
+    if x != x.to_integral_value() or x < 0:
+        raise ValueError("factorial() only accepts non-negative integral values")
+    value = factorial(int(x))
+    # Only the leading bits are converted: Decimal(int) is quadratic in the number of digits
+    shift = max(0, value.bit_length() - math.ceil(context.prec * _BITS_PER_DIGIT) - 64)
+    if not shift:
+        return context.plus(Decimal(value))
+    return context.multiply(Decimal(value >> shift), context.power(2, shift))
+
+
+_FUNCTIONS = {
+    "abs": lambda context, x: context.abs(x),
+    "pow": _power,
+    "sqrt": lambda context, x: context.sqrt(x),
+    "cbrt": _cbrt,
+    "log10": _log10, "log": _log10, "ln": _ln,
+    "sin": lambda context, x: _sin_cos(x, context)[0],
+    "cos": lambda context, x: _sin_cos(x, context)[1],
+    "tan": lambda context, x: context.divide(*_sin_cos(x, _context(context.prec + 2))),
+    "asin": _asin, "acos": _acos, "atan": _atan,
+    "factorial": _factorial,
+    "radians": lambda context, x: context.divide(context.multiply(x, _pi(_context(context.prec + 2))), 180),
+    "degrees": lambda context, x: context.divide(context.multiply(x, 180), _pi(_context(context.prec + 2))),
+}
+_CONSTANTS = {"pi": _pi, "e": lambda context: _exp(context, Decimal(1))}
+_BINARY = {"+": "add", "-": "subtract", "*": "multiply", "/": "divide"}
+
+
+def _evaluate(node, context):
+    kind = node[0]
+    if kind == "num":
+        return Decimal(node[1])
+    if kind == "name":
+        return _CONSTANTS[node[1]](context)
+    if kind == "neg":
+        return context.minus(_evaluate(node[1], context))
+    if kind == "bin":
+        left, right = _evaluate(node[2], context), _evaluate(node[3], context)
+        if node[1] == "%":  # Python's sign convention: the result takes the divisor's sign
+            remainder = context.remainder(left, right)
+            return context.add(remainder, right) if remainder and (remainder < 0) != (right < 0) else remainder
+        if node[1] == "**":
+            return _power(context, left, right)
+        return getattr(context, _BINARY[node[1]])(left, right)
+    return _FUNCTIONS[node[1]](context, *(_evaluate(arg, context) for arg in node[2]))
+
+
+class PreciseResult:
+    """The value of one expression, computed to as many digits as are asked for."""
+
+    __slots__ = ("tree", "_rungs")
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._rungs = {}  # working precision -> value at that precision
+
+    def _at(self, precision):
+        value = self._rungs.get(precision)
+        if value is None:
+            try:
+                value = self._rungs[precision] = _evaluate(self.tree, _context(precision))
+            except decimal.InvalidOperation:
+                raise ValueError("math domain error") from None
+        return value
+
+    def digits(self, n):
+        """The value rounded to ``n`` significant digits (at most ``MAX_DIGITS``)."""
+        if not 1 <= n <= MAX_DIGITS:
+            raise ValueError(f"Digits must be between 1 and {MAX_DIGITS}")
+        rounding = decimal.Context(prec=n, Emax=decimal.MAX_EMAX, Emin=decimal.MIN_EMIN)
+        precision = _FIRST_RUNG
+        while precision < n + _GUARD_DIGITS:
+            precision *= 2
+        limit = min(precision << _MAX_RUNGS, 2 * (MAX_DIGITS + _GUARD_DIGITS))
+        lower = self._at(precision)
+        while True:
+            upper = self._at(2 * precision)
+            if rounding.plus(lower) == rounding.plus(upper):
+                return rounding.plus(upper)
+            if abs(upper) < Decimal(10) ** -precision:
+                return Decimal(0)  # Cancels to zero as far as the lower rung can see, e.g. sin(pi)
+            if 2 * precision >= limit:  # e.g. tan(pi/2), which grows with every rung
+                raise ExpressionError(f"Result could not be determined to {n} digits")
+            precision, lower = 2 * precision, upper
+
+
+@lru_cache(maxsize=256)
+def precise(text, angle_mode="RAD"):
+    """The PreciseResult for ``text``; repeated calls share one object and its work."""
+    return PreciseResult(apply_angle_mode(parse(text, exact=True), angle_mode))
+
+
+def evaluate_precise(text, digits, angle_mode="RAD"):
+    """``text`` evaluated to ``digits`` significant digits, as a Decimal."""
+    return precise(text, angle_mode).digits(digits)
+
+
+def clear_caches():
+    """Forget every kept result and series, e.g. to time evaluation from cold."""
+    precise.cache_clear()
+    _series.cache_clear()
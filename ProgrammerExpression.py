@@ -0,0 +1,187 @@
+"""
+Integer expressions for the programmer calculator.
+
+Input such as ``(A Lsh 4) OR (B AND 0xF)`` or ``(a << 4) | (b & 0xF)`` is
+tokenized once, converted with the shunting-yard algorithm into a postfix
+program and cached, so evaluating the same text again (or the same program
+over many variable bindings) runs only the small stack machine.
+
+Precedence, loosest first, follows C and Python: ``OR |``, ``XOR ^``,
+``AND &``, ``Lsh Rsh << >>``, ``+ -``, ``* / MOD %``, then the prefix
+operators ``NOT ~`` and unary ``-``. Binary operators associate to the left.
+Bare numbers are read in the calculator's display base; ``0x`` literals work
+in any base, and ``0o`` and ``0b`` in every base but HEX, where ``0B1`` is
+the hex number B1. A missing ``)`` at the end is implied.
+
+Programs run against a ``ProgrammerEngine``, whose ``perform_prog_op`` and
+``wrap`` supply the arithmetic, so word size and error handling match the
+keypad exactly.
+"""
+import re
+from functools import lru_cache
+
+from BaseConverter import format_in_base, parse_in_base
+from Expression import ExpressionError
+
+_TOKEN_PATTERN = r"""
+    \s*(?:
+        (?P<prefixed>{prefixes})
+      | (?P<word>\w+)
+      | (?P<op><<|>>|[-+*/%&|^~()])
+    )"""
+_TOKEN_RE = re.compile(_TOKEN_PATTERN.format(prefixes="0[xX][0-9A-Fa-f]+|0[oO][0-7]+|0[bB][01]+"), re.VERBOSE)
+_HEX_TOKEN_RE = re.compile(_TOKEN_PATTERN.format(prefixes="0[xX][0-9A-Fa-f]+"), re.VERBOSE)
+
+_WORD_OPS = {"AND": "AND", "OR": "OR", "XOR": "XOR", "NOT": "NOT", "MOD": "MOD", "LSH": "Lsh", "RSH": "Rsh"}
+_SYMBOL_OPS = {"&": "AND", "|": "OR", "^": "XOR", "~": "NOT", "%": "MOD", "<<": "Lsh", ">>": "Rsh",
+               "+": "+", "-": "-", "*": "*", "/": "/"}
+_PRECEDENCE = {"OR": 1, "XOR": 2, "AND": 3, "Lsh": 4, "Rsh": 4, "+": 5, "-": 5, "*": 6, "/": 6, "MOD": 6}
+_UNARY_PRECEDENCE = 7
+
+# Postfix instructions: (PUSH, literal), (LOAD, name), (BINARY, op), (UNARY, "NOT" | "NEG")
+PUSH, LOAD, BINARY, UNARY = range(4)
+
+
+def tokenize(text, base="DEC", variables=()):
+    """``(kind, value)`` pairs: ``num``, ``name``, ``op`` (canonical op names) and ``paren``."""
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    token_re = _HEX_TOKEN_RE if base == "HEX" else _TOKEN_RE
+    while pos < len(text):
+        match = token_re.match(text, pos)
+        if match is None:
+            raise ExpressionError(f"Unexpected character {text[pos:].lstrip()[:1]!r} at {pos}")
+        pos = match.end()
+        if match.group("prefixed"):
+            tokens.append(("num", int(match.group("prefixed"), 0)))
+        elif match.group("word"):
+            word = match.group("word")
+            if word.upper() in _WORD_OPS:
+                tokens.append(("op", _WORD_OPS[word.upper()]))
+            elif word in variables:
+                tokens.append(("name", word))
+            else:
+                try:
+                    tokens.append(("num", parse_in_base(word, base)))
+                except ValueError:
+                    raise ExpressionError(f"Not a {base} number or known name: {word!r}") from None
+        else:
+            symbol = match.group("op")
+            tokens.append(("paren", symbol) if symbol in "()" else ("op", _SYMBOL_OPS[symbol]))
+    return tokens
+
+
+def rebase(text, base, new_base):
+    """``text`` with its bare numbers rewritten from ``base`` into ``new_base``.
+
+    Operators, prefixed literals, spacing and anything unparsable are kept as
+    they are, so partly typed input converts too.
+    """
+    token_re = _HEX_TOKEN_RE if base == "HEX" else _TOKEN_RE
+    pieces = []
+    pos = 0
+    for match in token_re.finditer(text):
+        word = match.group("word")
+        if word is None or word.upper() in _WORD_OPS:
+            continue
+        try:
+            value = parse_in_base(word, base)
+        except ValueError:
+            continue
+        pieces.append(text[pos:match.start("word")])
+        pieces.append(format_in_base(value, new_base))
+        pos = match.end("word")
+    pieces.append(text[pos:])
+    return "".join(pieces)
+
+
+def _to_postfix(tokens):
+    """Shunting-yard: infix tokens to a tuple of postfix instructions."""
+    code = []
+    stack = []  # Pending operators: (kind, op, precedence) or ("paren", "(", 0)
+    expect_operand = True
+    for kind, value in tokens:
+        if kind in ("num", "name"):
+            if not expect_operand:
+                raise ExpressionError(f"Missing operator before {value!r}")
+            code.append((PUSH, value) if kind == "num" else (LOAD, value))
+            expect_operand = False
+        elif kind == "paren" and value == "(":
+            if not expect_operand:
+                raise ExpressionError("Missing operator before '('")
+            stack.append(("paren", "(", 0))
+        elif kind == "paren":
+            if expect_operand:
+                raise ExpressionError("Missing operand before ')'")
+            while stack and stack[-1][0] != "paren":
+                code.append(stack.pop()[:2])
+            if not stack:
+                raise ExpressionError("Unbalanced ')'")
+            stack.pop()
+        elif expect_operand:
+            if value not in ("NOT", "-", "+"):
+                raise ExpressionError(f"Missing operand before {value!r}")
+            if value != "+":  # Unary plus is a no-op
+                stack.append((UNARY, "NEG" if value == "-" else "NOT", _UNARY_PRECEDENCE))
+        else:
+            if value == "NOT":
+                raise ExpressionError("Missing operator before NOT")
+            precedence = _PRECEDENCE[value]
+            while stack and stack[-1][0] != "paren" and stack[-1][2] >= precedence:
+                code.append(stack.pop()[:2])
+            stack.append((BINARY, value, precedence))
+            expect_operand = True
+    if expect_operand:
+        raise ExpressionError("Incomplete expression")
+    while stack:
+        entry = stack.pop()
+        if entry[0] != "paren":  # Unclosed '(' at the end is implied closed
+            code.append(entry[:2])
+    return tuple(code)
+
+
+class ProgrammerProgram:
+    """A compiled postfix program for one programmer-mode expression."""
+
+    __slots__ = ("source", "base", "variables", "code")
+
+    def __init__(self, source, base, variables, code):
+        self.source = source
+        self.base = base
+        self.variables = variables
+        self.code = code
+
+    def evaluate(self, engine, **variables):
+        """Run the program with ``engine``'s word size and operator semantics."""
+        wrap = engine.wrap
+        stack = []
+        push = stack.append
+        for opcode, arg in self.code:
+            if opcode == PUSH:
+                push(wrap(arg))
+            elif opcode == LOAD:
+                push(wrap(variables[arg]))
+            elif opcode == BINARY:
+                right = stack.pop()
+                result = engine.perform_prog_op(stack.pop(), right, arg)
+                if isinstance(result, str):
+                    raise ExpressionError(result)
+                push(result)
+            else:
+                operand = stack.pop()
+                push(wrap(~operand if arg == "NOT" else -operand))
+        return stack[0]
+
+    def evaluate_batch(self, engine, rows):
+        """Evaluate once per mapping of variable values in ``rows``."""
+        return [self.evaluate(engine, **row) for row in rows]
+
+    def __repr__(self):
+        return f"ProgrammerProgram({self.source!r}, base={self.base!r})"
+
+
+@lru_cache(maxsize=1024)
+def compile_program(text, base="DEC", variables=()):
+    """Tokenize and compile ``text``; repeated calls with the same arguments are free."""
+    return ProgrammerProgram(text, base, variables, _to_postfix(tokenize(text, base, variables)))
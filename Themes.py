@@ -0,0 +1,75 @@
+"""
+Application-wide stylesheets for the calculator themes.
+
+Each theme is compiled into a single stylesheet string once and applied to the
+QApplication, so switching themes is one style polish pass instead of a
+``setStyleSheet`` call (and a CSS parse) per widget. Widgets pick their look
+through a ``role`` dynamic property set when they are created:
+
+    button.setProperty("role", "equals")
+
+Roles: ``key`` (ordinary calculator buttons), ``equals``, ``clear``, ``hist``,
+``angle`` (the RAD/DEG toggle), ``dialog`` (HistoryDialog buttons), and for
+labels ``preview`` and ``conversion``, and ``mode`` for the number-mode
+selectors (the basic tab's backend, the scientific tab's precision, the
+programmer tab's base and word size).
+"""
+from functools import lru_cache
+
+THEME_NAMES = ("light", "dark")
+
+_KEY_FONT = "padding: 8px; font-size: 15px;"
+_SMALL_FONT = "padding: 5px; font-size: 12px;"
+
+# role -> (background, text, border, hover, pressed, font rules)
+_BUTTON_COLORS = {
+    "dark": {
+        "key": ("#383838", "white", "#505050", "#484848", "#282828", _KEY_FONT),
+        "equals": ("#006900", "white", "#008000", "#007f00", "#004f00", _KEY_FONT),
+        "clear": ("#aa0000", "white", "#c30000", "#c30000", "#880000", _KEY_FONT),
+        "hist": ("#2c3e50", "white", "#34495e", "#34495e", "#1a242f", _KEY_FONT),
+        "angle": ("#404040", "white", "#555555", "#505050", "#303030", _SMALL_FONT),
+        "dialog": ("#353535", "white", "#555555", "#4a4a4a", "#2a2a2a", "padding: 5px;"),
+    },
+    "light": {
+        "key": ("#f0f0f0", "black", "#c0c0c0", "#e0e0e0", "#d0d0d0", _KEY_FONT),
+        "equals": ("#5cb85c", "white", "#4cae4c", "#4cae4c", "#449d44", _KEY_FONT),
+        "clear": ("#d9534f", "white", "#d43f3a", "#c9302c", "#ac2925", _KEY_FONT),
+        "hist": ("#aec9e0", "black", "#9ab3c9", "#9ab3c9", "#869db3", _KEY_FONT),
+        "angle": ("#e0e0e0", "black", "#bbbbbb", "#d0d0d0", "#c0c0c0", _SMALL_FONT),
+        "dialog": None,  # Native look, only padded
+    },
+}
+
+_LABEL_COLORS = {"dark": "#b4b4b4", "light": "#646464"}
+
+_DARK_COMBO = """
+QComboBox { background-color: #353535; color: white; border: 1px solid #555; padding: 3px; }
+QComboBox::drop-down { border: none; }
+QComboBox QAbstractItemView { background-color: #252525; color: white; selection-background-color: #8e2dc5; }
+"""
+
+
+def _button_rules(role, colors):
+    selector = f'QPushButton[role="{role}"]'
+    if colors is None:
+        return f"{selector} {{ padding: 5px; }}\n"
+    background, text, border, hover, pressed, font = colors
+    return (f"{selector} {{ background-color: {background}; color: {text}; border: 1px solid {border}; {font} }}\n"
+            f"{selector}:hover {{ background-color: {hover}; }}\n"
+            f"{selector}:pressed {{ background-color: {pressed}; }}\n")
+
+
+@lru_cache(maxsize=None)
+def stylesheet(theme):
+    """The complete application stylesheet for ``theme`` ("light" or "dark")."""
+    theme = theme.lower()
+    if theme not in THEME_NAMES:
+        raise ValueError(f"Unknown theme: {theme}")
+    parts = [_button_rules(role, colors) for role, colors in _BUTTON_COLORS[theme].items()]
+    label_color = _LABEL_COLORS[theme]
+    parts.append(f'QLabel[role="preview"], QLabel[role="conversion"] {{ color: {label_color}; }}\n')
+    if theme == "dark":
+        parts.append(_DARK_COMBO)
+    parts.append('QComboBox[role="mode"] { margin-bottom: 5px; }\n')
+    return "".join(parts)
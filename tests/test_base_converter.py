@@ -0,0 +1,75 @@
+import sys
+
+import pytest
+
+import BaseConverter
+from BaseConverter import BaseConverter as Converter
+from BaseConverter import format_in_base, format_word, parse_in_base
+
+
+@pytest.mark.parametrize("value", [0, 1, -31, 2 ** 64 + 5, -(3 ** 20_000), 10 ** 5000 - 1],
+                         ids=["zero", "one", "negative", "word", "huge-negative", "nines"])
+@pytest.mark.parametrize("base", ["HEX", "DEC", "OCT", "BIN"])
+def test_round_trip(value, base):
+    assert parse_in_base(format_in_base(value, base), base) == value
+
+
+@pytest.fixture
+def unlimited_int_strings():
+    limit = sys.get_int_max_str_digits()
+    sys.set_int_max_str_digits(0)
+    yield
+    sys.set_int_max_str_digits(limit)
+
+
+def test_large_decimal_matches_builtin(unlimited_int_strings):
+    value = 7 ** 30_000
+    assert format_in_base(value, "DEC") == str(value)
+    assert parse_in_base("12345678901234567890" * 300, "DEC") == int("12345678901234567890" * 300)
+
+
+def test_format_word():
+    assert format_word(-1, "HEX", 16) == "FFFF"
+    assert format_word(5, "BIN", 8) == "00000101"
+    assert format_word(-5, "DEC", 8) == "-5"
+
+
+def test_invalid_digits():
+    with pytest.raises(ValueError):
+        parse_in_base("12G", "HEX")
+    with pytest.raises(ValueError):
+        parse_in_base("1" * 2000 + "x", "DEC")
+    with pytest.raises(ValueError):
+        Converter().parse("8", "OCT")
+
+
+def test_typing_updates_conversions_incrementally():
+    converter = Converter()
+    text = ""
+    for digit in "1F3A09":
+        text += digit
+        assert converter.convert(int(text, 16), "HEX") == {
+            base: format_in_base(int(text, 16), base) for base in ("HEX", "DEC", "OCT", "BIN")}
+    for _ in range(3):
+        text = text[:-1]
+        assert converter.convert(int(text, 16), "HEX")["BIN"] == format(int(text, 16), "b")
+
+
+def test_parse_follows_typing_and_backspace():
+    converter = Converter()
+    for text in ["-", "-4", "-42", "-421", "-42", "-4", "-", "7"]:
+        expected = None if text == "-" else int(text)
+        if expected is None:
+            with pytest.raises(ValueError):
+                converter.parse(text, "DEC")
+        else:
+            assert converter.parse(text, "DEC") == expected
+
+
+def test_unchanged_text_is_not_parsed_again(monkeypatch):
+    converter = Converter()
+    digits = "9" * 5000
+    value = converter.parse(digits, "DEC")
+    monkeypatch.setattr(BaseConverter, "parse_in_base", pytest.fail)
+    assert converter.parse(digits, "DEC") == value
+    assert converter.parse(digits + "1", "DEC") == value * 10 + 1
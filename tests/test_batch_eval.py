@@ -0,0 +1,41 @@
+import pytest
+
+from BatchEval import main
+
+SCIENTIFIC = [f"{i} * 3 + 1" for i in range(40)] + ["1/0", "", "2 +", "sqrt(16)"]
+PROGRAMMER = [f"{i:X} << 1" for i in range(40)] + ["FF AND 0F", "", "1 +", "0x10 XOR 3"]
+
+
+def _run(tmp_path, capsys, lines, *options):
+    source = tmp_path / "input.txt"
+    source.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    main([str(source), *options])
+    return capsys.readouterr().out.splitlines()
+
+
+@pytest.mark.parametrize("lines, options", [
+    (SCIENTIFIC, ()),
+    (PROGRAMMER, ("--mode", "prog", "--base", "HEX", "--bits", "16")),
+])
+def test_jobs_match_serial_output(tmp_path, capsys, lines, options):
+    serial = _run(tmp_path, capsys, lines, *options)
+    # A small chunksize spreads the input over several windows and workers
+    parallel = _run(tmp_path, capsys, lines, *options, "--jobs", "2", "--chunksize", "3")
+    assert parallel == serial
+    assert len(serial) == len(lines)
+
+
+def test_results_and_errors_keep_their_lines(tmp_path, capsys):
+    out = _run(tmp_path, capsys, SCIENTIFIC, "--jobs", "2", "--chunksize", "3")
+    assert out[:40] == _run(tmp_path, capsys, [str(i * 3 + 1) for i in range(40)])
+    assert out[40].startswith("Error:")
+    assert out[41] == ""
+    assert out[42].startswith("Error:")
+    assert out[43] == "4"
+
+    out = _run(tmp_path, capsys, PROGRAMMER, "--mode", "prog", "--base", "HEX", "--jobs", "2", "--chunksize", "3")
+    assert out[:3] == ["0", "2", "4"]
+    assert out[40] == "F"
+    assert out[41] == ""
+    assert out[42].startswith("Error:")
+    assert out[43] == "13"
@@ -0,0 +1,55 @@
+import math
+
+import pytest
+
+import BigNum
+from BigNum import ResultTooLarge, factorial, format_number, power
+from Expression import compile_expression
+
+
+@pytest.fixture
+def small_limit(monkeypatch):
+    monkeypatch.setattr(BigNum, "MAX_BITS", 1000)
+
+
+def test_power_is_exact():
+    assert power(3, 100) == 3 ** 100
+    assert power(2.5, 2) == 6.25
+    assert power(3, 100, 7) == pow(3, 100, 7)
+
+
+def test_power_refuses_before_computing():
+    with pytest.raises(ResultTooLarge):
+        power(9, 9 ** 9)
+
+
+@pytest.mark.parametrize("n", [0, 1, 20, 39_999, 40_000, 50_001])
+def test_factorial_matches_math(n):
+    assert factorial(n) == math.factorial(n)
+
+
+def test_factorial_rejects_negative_and_huge():
+    with pytest.raises(ValueError):
+        factorial(-1)
+    with pytest.raises(ResultTooLarge):
+        factorial(10 ** 7)
+
+
+@pytest.mark.parametrize("text", [
+    "((((9**4)**4)**4)**4)**4",
+    "factorial(200)**2",
+])
+def test_small_literal_exponents_are_bounded(small_limit, text):
+    with pytest.raises(ResultTooLarge):
+        compile_expression(text).evaluate()
+
+
+def test_literal_powers_stay_native():
+    assert "_pow" not in compile_expression("3**2 + 2**4").shape
+    assert "_pow" in compile_expression("(1+2)**2").shape
+
+
+def test_format_huge_integer():
+    assert format_number(2 ** 10_000) == "1.995063117e+3010"
+    assert format_number(-(10 ** 5000)) == "-1e+5000"
+    assert format_number(12345) == "12345"
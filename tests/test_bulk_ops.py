@@ -0,0 +1,105 @@
+import random
+
+import pytest
+
+import BulkOps
+from BulkOps import bulk_apply
+from CalcEngine import ProgrammerEngine
+
+WIDTHS = (8, 16, 32, 64, 128)
+
+
+@pytest.fixture(params=["numpy", "int"])
+def kernel_path(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:  # Force the pure-int fallback at every width
+        monkeypatch.setattr(BulkOps, "_kernel", lambda op, width, byteorder, value, chunk_size:
+                            BulkOps._int_kernel(op, width, byteorder, value))
+    return request.param
+
+
+def _expected(data, op, width, byteorder, value=None, other=None):
+    """Word by word through ProgrammerEngine, the scalar reference."""
+    engine = ProgrammerEngine()
+    engine.set_word_size(width, signed=False)
+    size = width // 8
+    pad = -len(data) % size
+    data, other = data + bytes(pad), other and other[:len(data)] + bytes(pad)
+    out = bytearray()
+    for start in range(0, len(data), size):
+        word = int.from_bytes(data[start:start + size], byteorder)
+        if op == "NOT":
+            result = engine.wrap(~word)
+        else:
+            operand = value if other is None else int.from_bytes(other[start:start + size], byteorder)
+            result = engine.perform_prog_op(word, operand, op)
+        out += result.to_bytes(size, byteorder)
+    return bytes(out[:len(out) - pad])
+
+
+def _run(tmp_path, data, op, width, byteorder="little", value=None, other=None):
+    source, output = tmp_path / "in.bin", tmp_path / "out.bin"
+    source.write_bytes(data)
+    other_path = None
+    if other is not None:
+        other_path = tmp_path / "other.bin"
+        other_path.write_bytes(other)
+    written = bulk_apply(op, str(source), str(output), value=value, other=other_path and str(other_path),
+                         width=width, byteorder=byteorder, chunk_size=48)  # Many chunks, some partial
+    assert written == len(data)
+    return output.read_bytes()
+
+
+def _data(length, seed=0):
+    return random.Random(seed).randbytes(length)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("op", ["AND", "OR", "XOR"])
+def test_constant_operand_wraps_to_the_word(tmp_path, kernel_path, width, op):
+    data = _data(500)  # Not a multiple of 16: the last word is partial at the wider widths
+    value = (1 << (width + 3)) - 0x1234567  # Wider than the word; only its low bits apply
+    expected = _expected(data, op, width, "little", value=value & ((1 << width) - 1))
+    assert _run(tmp_path, data, op, width, value=value) == expected
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("byteorder", ["little", "big"])
+def test_second_file_and_not(tmp_path, kernel_path, width, byteorder):
+    data, other = _data(333, 1), _data(400, 2)
+    assert _run(tmp_path, data, "XOR", width, byteorder, other=other) == _expected(
+        data, "XOR", width, byteorder, other=other)
+    assert _run(tmp_path, data, "NOT", width, byteorder) == _expected(data, "NOT", width, byteorder)
+
+
+@pytest.mark.parametrize("width", WIDTHS)
+@pytest.mark.parametrize("byteorder", ["little", "big"])
+@pytest.mark.parametrize("op", ["Lsh", "Rsh"])
+def test_shifts_are_logical_per_word(tmp_path, kernel_path, width, byteorder, op):
+    data = _data(256, 3)
+    for shift in (0, 1, 7, width - 1, width, width + 5):
+        assert _run(tmp_path, data, op, width, byteorder, value=shift) == _expected(
+            data, op, width, byteorder, value=shift), shift
+
+
+def test_empty_input(tmp_path, kernel_path):
+    assert _run(tmp_path, b"", "NOT", 32) == b""
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"op": "ROL", "value": 1},
+    {"op": "AND"},
+    {"op": "Lsh", "value": -1},
+    {"op": "XOR", "value": 1, "width": 24},
+])
+def test_invalid_arguments(tmp_path, kwargs):
+    source = tmp_path / "in.bin"
+    source.write_bytes(bytes(8))
+    with pytest.raises(ValueError):
+        bulk_apply(source=str(source), output=str(tmp_path / "out.bin"), **kwargs)
+
+
+def test_short_second_file(tmp_path):
+    with pytest.raises(ValueError):
+        _run(tmp_path, _data(64), "AND", 8, other=_data(32))
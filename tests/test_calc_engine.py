@@ -0,0 +1,131 @@
+import pytest
+
+from CalcEngine import ProgrammerEngine, ScientificEngine
+from Expression import RESULT_CACHE
+from History import HistoryStore
+
+
+def _engine(expression=""):
+    engine = ScientificEngine(HistoryStore().view("scientific"))
+    engine.expression = expression
+    return engine
+
+
+def test_cheap_preview_is_computed_at_once():
+    compiled, _, text = _engine("1 + 2 * 3").begin_preview()
+    assert compiled is None and text == "= 7"
+
+
+def test_repeated_squaring_preview_is_deferred():
+    compiled, _, text = _engine("((9**4)**4)**4").begin_preview()
+    assert compiled is not None and text == ""
+
+
+def test_degree_mode_applies_to_inverse_trig():
+    engine = _engine("asin(1)")
+    engine.set_angle_mode("DEG")
+    engine.evaluate()
+    assert engine.expression == "90"
+
+
+def test_preview_lookups_are_not_counted():
+    engine = _engine()
+    before = RESULT_CACHE.stats()
+    for key in "12+34*5":
+        engine.press(key)
+        engine.begin_preview()
+    after = RESULT_CACHE.stats()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+    engine.evaluate()
+    assert RESULT_CACHE.stats()["hits"] == before["hits"] + 1  # '=' reuses the preview's result
+
+
+def test_preview_of_deeply_nested_input_shows_nothing():
+    for depth in (300, 2000):
+        engine = _engine()
+        for key in "-" * depth + "1+1":
+            engine.press(key)
+        assert engine.begin_preview() == (None, None, "")
+        engine.press("=")  # '=' reports the same input as an error
+        assert engine.expression.startswith("Error")
+
+
+def _programmer(keys, base="DEC", bits=None, signed=True):
+    engine = ProgrammerEngine(HistoryStore().view("programmer"))
+    engine.set_word_size(bits, signed)
+    engine.change_base(base)
+    for key in keys:
+        engine.press(key)
+    return engine
+
+
+def _shown(engine):
+    shown = {}
+    for base in ("HEX", "DEC", "OCT", "BIN"):
+        engine.change_base(base)
+        shown[base] = engine.display_text
+    return shown
+
+
+def test_narrowing_truncates_the_held_value():
+    engine = _programmer("300")  # 0x12C
+    engine.set_word_size(8)
+    assert engine.current_value_int == 0x2C
+    assert _shown(engine) == {"HEX": "2C", "DEC": "44", "OCT": "54", "BIN": "101100"}
+    assert engine.conversions() == {"HEX": "2C", "DEC": "44", "OCT": "054", "BIN": "00101100"}
+    engine.set_word_size(64)  # Widening cannot bring the dropped bits back
+    assert engine.current_value_int == 0x2C
+
+
+@pytest.mark.parametrize("bits", [8, 16, 32, 64, 128])
+def test_sign_reinterpretation(bits):
+    top = 1 << (bits - 1)
+    engine = _programmer(format(top, "X"), "HEX", bits, signed=False)
+    assert engine.current_value_int == top
+    engine.set_word_size(bits, signed=True)
+    assert engine.current_value_int == -top
+    shown = _shown(engine)
+    assert shown["DEC"] == str(-top)
+    assert shown["HEX"] == format(top, "X")  # The bit pattern is unchanged
+    assert shown["BIN"] == "1" + "0" * (bits - 1)
+    assert int(shown["OCT"], 8) == top
+    engine.set_word_size(bits, signed=False)
+    assert engine.current_value_int == top
+    assert _shown(engine)["DEC"] == str(top)
+
+
+def test_all_ones_across_word_sizes():
+    engine = _programmer("FF", "HEX", 8, signed=True)
+    assert engine.current_value_int == -1
+    engine.set_word_size(16, signed=True)  # Sign-extends
+    assert engine.current_value_int == -1
+    assert _shown(engine) == {"HEX": "FFFF", "DEC": "-1", "OCT": "177777", "BIN": "1" * 16}
+    engine.set_word_size(16, signed=False)
+    assert engine.current_value_int == 0xFFFF
+    engine.set_word_size(8, signed=True)
+    assert _shown(engine) == {"HEX": "FF", "DEC": "-1", "OCT": "377", "BIN": "1" * 8}
+    engine.set_word_size(None)  # Unbounded keeps the signed value
+    assert _shown(engine)["DEC"] == "-1"
+
+
+def test_word_size_change_with_an_operation_pending():
+    engine = _programmer(["2", "0", "0", "AND"])
+    engine.set_word_size(8)
+    assert engine.stored_value_int == -56
+    assert engine.display_text == "-56"
+    engine.change_base("HEX")
+    assert engine.display_text == "C8"
+    for key in "F=":  # The next digit starts the second operand
+        engine.press(key)
+    assert engine.current_value_int == 8
+    assert engine.display_text == "8"
+
+
+def test_typed_digits_stop_at_the_word_size():
+    engine = _programmer("1234", "DEC", 8, signed=True)
+    assert engine.display_text == "123"
+    engine.set_word_size(8, signed=False)
+    engine.press("CE")
+    for key in "2565":  # 256 does not fit; 255 does
+        engine.press(key)
+    assert engine.display_text == "255"
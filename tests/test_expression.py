@@ -0,0 +1,115 @@
+import math
+import os
+import random
+import subprocess
+import sys
+
+import pytest
+
+import Expression
+from Expression import ExpressionError, IncrementalParser, ResultCache, compile_expression, evaluate_array, parse
+
+
+@pytest.mark.parametrize("text, value", [
+    ("2 + 3 * 4", 14),
+    ("-2**2", -4),
+    ("2**3**2", 512),
+    ("7 % -3", -2),
+    ("sqrt(16) + abs(-3)", 7.0),
+    ("π - pi", 0.0),
+    ("√(9", 3.0),
+    ("pow(2, 10, 1000)", 24),
+    ("1.5e3 / 3", 500.0),
+])
+def test_evaluate(text, value):
+    assert compile_expression(text).evaluate() == value
+
+
+@pytest.mark.parametrize("text", ["", "1 +", "2 3", "(1))", "foo(1)", "x + 1", "1 $ 2", "import(1)"])
+def test_invalid_expressions(text):
+    with pytest.raises(ExpressionError):
+        compile_expression(text)
+
+
+def test_literals_are_lifted_into_one_shape():
+    first, second = compile_expression("sin(30) + 1"), compile_expression("sin(45) + 2")
+    assert first.shape == second.shape and first.constants != second.constants
+    assert compile_expression("sin(30) + 1") is first
+
+
+def test_variables():
+    compiled = compile_expression("x * 2 + y", ("x", "y"))
+    assert compiled.evaluate(x=3, y=1) == 7
+
+
+def test_degree_mode_rewrites_the_tree_once():
+    radians = compile_expression("sin(30) + asin(1)", (), "RAD")
+    degrees = compile_expression("sin(30) + asin(1)", (), "DEG")
+    assert degrees.tree is radians.tree
+    assert degrees.evaluate() == pytest.approx(90.5)
+    assert radians.canonical != degrees.canonical
+    assert compile_expression("1 + 2", (), "DEG").canonical == compile_expression("1 + 2").canonical
+
+
+@pytest.mark.parametrize("text, slow", [
+    ("sin(1) + 2**2", False),
+    ("abs(-(3**4))", False),
+    ("(1+2)**2", True),
+    ("x**4", True),
+    ("-((9**4)**4)", True),
+    ("sqrt(factorial(3))", True),
+    ("pow(2, 3)", True),
+])
+def test_may_be_slow(text, slow):
+    assert compile_expression(text, ("x",)).may_be_slow is slow
+
+
+def _parse_or_error(parser, text):
+    try:
+        return parser(text)
+    except ExpressionError:
+        return ExpressionError
+
+
+def test_incremental_parser_matches_full_parse():
+    rng = random.Random(7)
+    pieces = ["1", "2.5", "3e", "+", "-", "*", "/", "**", "%", "(", ")", ",", "sin(", "pow(", "pi", " ", "e", "1e+"]
+    parser = IncrementalParser()
+    for _ in range(200):
+        text = ""
+        for _ in range(40):
+            if text and rng.random() < 0.3:
+                text = text[:-rng.randint(1, min(4, len(text)))]  # Backspacing or editing the end
+            else:
+                text += rng.choice(pieces)
+            assert _parse_or_error(parser.update, text) == _parse_or_error(parse, text), text
+
+
+def test_numpy_is_not_imported_with_the_module():
+    code = "import sys, Expression; sys.exit('numpy' in sys.modules)"
+    assert subprocess.run([sys.executable, "-c", code], cwd=os.path.dirname(Expression.__file__)).returncode == 0
+
+
+def test_array_evaluation_uses_float64():
+    np = pytest.importorskip("numpy")
+    assert evaluate_array("2**x", x=[2, 70]).tolist() == [4.0, 2.0 ** 70]
+    assert np.isnan(evaluate_array("x % 0", x=[1, 2])).all()
+    assert evaluate_array("sin(x)", "DEG", x=[0, 90]).tolist() == [0.0, 1.0]
+
+
+def test_result_cache_counts_and_evicts():
+    cache = ResultCache(max_entries=2)
+    cache.put(("a",), 1)
+    cache.put(("b",), 2)
+    assert cache.get(("a",)) == 1 and cache.get(("c",)) is None
+    cache.put(("c",), 3)  # Evicts "b", the least recently used
+    assert cache.peek(("b",)) is None and cache.peek(("a",)) == 1
+    assert cache.stats() == {"entries": 2, "bytes": cache.current_bytes, "hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_array_factorial_marks_out_of_range_elements():
+    np = pytest.importorskip("numpy")
+    result = evaluate_array("factorial(x)", x=[0, 3, 170, 171, 200, -1, 2.5, float("nan")])
+    assert result[:3].tolist() == [1.0, 6.0, float(math.factorial(170))]
+    assert np.isinf(result[3:5]).all() and np.isnan(result[5:]).all()
+    assert evaluate_array("factorial(3)").tolist() == 6.0
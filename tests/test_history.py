@@ -0,0 +1,58 @@
+import os
+
+from History import HistoryStore, parse_query
+
+
+def test_ring_is_bounded_by_count():
+    store = HistoryStore(max_records=3)
+    for i in range(5):
+        store.add("basic", "+", (i, 1), i + 1)
+    assert [record.result for record in store] == ["3", "4", "5"]
+    assert store.count("basic") == 3
+
+
+def test_long_records_keep_the_log_under_its_limit(tmp_path):
+    path = os.fspath(tmp_path / "history.jsonl")
+    store = HistoryStore(path, max_file_bytes=1_000_000)
+    compactions = []
+    compact = store.compact
+    store.compact = lambda: (compactions.append(1), compact())
+    digits = "7" * 60_000
+    for _ in range(200):
+        store.add("programmer", "+", (digits, digits), digits)
+        assert os.path.getsize(path) <= store.max_file_bytes
+    assert len(compactions) < 100  # Not one per add
+    store.close()
+    reloaded = HistoryStore(path, max_file_bytes=1_000_000)
+    assert len(reloaded) == len(store) > 0
+    reloaded.close()
+
+
+def test_search_by_token_result_and_tab():
+    store = HistoryStore()
+    store.add("programmer", "XOR", ("5", "3"), "6")
+    store.add("basic", "+", ("40", "2"), "42")
+    store.add("scientific", "=", ("sqrt(1764)",), "42")
+    assert [record.tab for record in store.search("=42")] == ["scientific", "basic"]
+    assert [record.op for record in store.search("xor")] == ["XOR"]
+    assert store.search("=42 tab:basic")[0].operands == ("40", "2")
+
+
+def test_clear_one_tab():
+    store = HistoryStore()
+    store.add("basic", "+", ("1", "1"), "2")
+    store.add("scientific", "=", ("1+1",), "2")
+    store.clear("basic")
+    assert store.count() == 1 and store.search("=2")[0].tab == "scientific"
+
+
+def test_parse_query():
+    criteria = parse_query("sin >1 since:2h", now=10_000)
+    assert criteria == {"text": "sin", "result_min": 1.0, "since": 10_000 - 7200}
+
+
+def test_store_without_log_keeps_max_records():
+    store = HistoryStore(max_records=100_000)
+    for i in range(100_000):
+        store.add("basic", "+", (i, i), 2 * i)
+    assert len(store) == 100_000
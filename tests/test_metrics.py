@@ -0,0 +1,81 @@
+import json
+
+import Metrics
+from CalcEngine import ScientificEngine
+from Metrics import Histogram, Metrics as MetricsRegistry
+
+
+def test_disabled_records_nothing():
+    metrics = MetricsRegistry()
+    with metrics.span("evaluate"):
+        pass
+    metrics.observe("paint", 0.5)
+    assert metrics.snapshot() == {}
+
+
+def test_counts_sums_and_percentiles():
+    metrics = MetricsRegistry(enabled=True)
+    for ms in range(1, 101):
+        metrics.observe("paint", ms / 1000)
+    for _ in range(3):
+        with metrics.span("evaluate"):
+            pass
+
+    snapshot = metrics.snapshot()
+    assert list(snapshot) == ["evaluate", "paint"]
+    assert snapshot["evaluate"]["count"] == 3
+    assert snapshot["evaluate"]["sum"] >= 0
+    paint = snapshot["paint"]
+    assert paint["count"] == 100
+    assert abs(paint["sum"] - 5.05) < 1e-9
+    assert (paint["p50"], paint["p95"], paint["p99"]) == (0.051, 0.096, 0.1)
+
+    metrics.reset()
+    assert metrics.snapshot() == {}
+
+
+def test_percentiles_cover_recent_samples_only():
+    histogram = Histogram(max_samples=10)
+    for seconds in [100.0] * 5 + [1.0] * 10:
+        histogram.observe(seconds)
+    assert histogram.count == 15
+    assert histogram.total == 510.0
+    assert histogram.percentiles() == {0.5: 1.0, 0.95: 1.0, 0.99: 1.0}
+
+
+def test_exports(tmp_path):
+    metrics = MetricsRegistry(enabled=True)
+    metrics.observe("sci.evaluate", 0.25)
+    metrics.observe("sci.evaluate", 0.75)
+
+    exported = json.loads(metrics.to_json())
+    assert exported["spans"] == {"sci.evaluate": {"count": 2, "sum": 1.0, "p50": 0.75, "p95": 0.75, "p99": 0.75}}
+
+    text = metrics.to_prometheus()
+    assert "# TYPE calculator_span_seconds summary" in text
+    assert 'calculator_span_seconds{span="sci.evaluate",quantile="0.5"} 0.750000000' in text
+    assert 'calculator_span_seconds_sum{span="sci.evaluate"} 1.000000000' in text
+    assert 'calculator_span_seconds_count{span="sci.evaluate"} 2' in text
+
+    metrics.write(str(tmp_path / "metrics.prom"))
+    metrics.write(str(tmp_path / "metrics.json"))
+    assert (tmp_path / "metrics.prom").read_text(encoding="utf-8") == text
+    assert json.loads((tmp_path / "metrics.json").read_text(encoding="utf-8"))["spans"] == exported["spans"]
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["metrics.json", "metrics.prom"]
+
+
+def test_metrics_path(monkeypatch):
+    for value, expected in [("", None), ("0", None), ("1", None), ("/tmp/calc.prom", "/tmp/calc.prom")]:
+        monkeypatch.setenv("CALCULATOR_METRICS", value)
+        assert Metrics.metrics_path() == expected
+
+
+def test_engine_spans(monkeypatch):
+    metrics = MetricsRegistry(enabled=True)
+    monkeypatch.setattr("CalcEngine.METRICS", metrics)
+    engine = ScientificEngine()
+    for key in "2+3=":
+        engine.press(key)
+    snapshot = metrics.snapshot()
+    assert snapshot["sci.compile"]["count"] >= 1
+    assert snapshot["sci.evaluate"]["count"] == 1
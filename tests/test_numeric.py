@@ -0,0 +1,101 @@
+import math
+from decimal import Decimal
+from fractions import Fraction
+
+import pytest
+
+from CalcEngine import BasicEngine
+from History import HistoryStore
+from Numeric import FLOAT, FRACTION, DecimalBackend, make_backend
+
+
+def _engine(backend="float", **options):
+    engine = BasicEngine(HistoryStore().view("basic"))
+    engine.set_backend(backend, **options)
+    return engine
+
+
+def _press(engine, keys):
+    for key in keys.split():
+        engine.press(key)
+    return engine.display_text
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.1, Fraction(1, 10)),
+    (Decimal("2.5"), Fraction(5, 2)),
+    (Fraction(1, 3), Fraction(1, 3)),
+    (7, Fraction(7)),
+])
+def test_fraction_convert(value, expected):
+    assert FRACTION.convert(value) == expected
+
+
+def test_decimal_convert_rounds_to_its_context():
+    backend = DecimalBackend(precision=5)
+    assert backend.convert(Fraction(1, 3)) == Decimal("0.33333")
+    assert backend.convert(0.1) == Decimal("0.1")
+    assert backend.convert(math.inf) == Decimal("Infinity")
+    assert backend.convert(math.nan).is_nan()
+
+
+@pytest.mark.parametrize("value", [math.inf, -math.inf, math.nan])
+def test_fraction_refuses_non_finite(value):
+    with pytest.raises((ValueError, ArithmeticError)):
+        FRACTION.convert(value)
+
+
+def test_float_convert():
+    assert FLOAT.convert(Fraction(1, 4)) == 0.25
+    assert math.isnan(FLOAT.convert(Decimal("NaN")))
+
+
+def test_formatting():
+    assert FRACTION.format(Fraction(1, 3)) == "1/3"
+    assert FRACTION.format(Fraction(-5, 8)) == "-0.625"
+    assert DecimalBackend().format(Decimal("1E+1")) == "10"
+    assert FLOAT.format(1 / 3) == "0.3333333333"
+    with pytest.raises(ValueError):
+        make_backend("complex")
+
+
+def test_decimal_arithmetic():
+    assert _press(_engine("decimal"), "0 . 1 + 0 . 2 =") == "0.3"
+    assert _press(_engine("decimal", precision=5), "2 / 3 =") == "0.66667"
+    assert _press(_engine("decimal"), "1 / 0 =") == "Error: Div by 0"
+
+
+def test_fraction_arithmetic():
+    engine = _engine("fraction")
+    assert _press(engine, "1 / 3 =") == "1/3"
+    assert _press(engine, "* 3 =") == "1"
+    assert _press(_engine("fraction"), "1 / 8 - 1 =") == "-0.875"
+
+
+def test_switching_converts_held_values():
+    engine = _engine()
+    _press(engine, "1 / 4 =")
+    engine.set_backend("fraction")
+    assert _press(engine, "+ 1 =") == "1.25"
+    engine.set_backend("decimal")
+    assert _press(engine, "* 2 =") == "2.5"
+
+
+def test_switching_with_overflowed_result_held():
+    engine = _engine()
+    digits = " ".join("9" * 200)
+    assert _press(engine, f"{digits} * {digits} =") == "inf"
+    engine.set_backend("fraction")  # inf has no Fraction form: the result is dropped
+    assert engine.stored_value is None
+    assert _press(engine, "C 1 / 2 =") == "0.5"
+
+
+@pytest.mark.parametrize("backend", ["fraction", "decimal"])
+def test_switching_with_nan_operand_pending(backend):
+    engine = _engine()
+    _press(engine, "1 +")
+    engine.stored_value = math.nan
+    engine.set_backend(backend)
+    if engine.stored_value is None:
+        assert engine.current_operation is None and engine.expression_preview_text == ""
+    assert _press(engine, "C 2 * 3 =") == "6"
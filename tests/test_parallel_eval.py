@@ -0,0 +1,11 @@
+from ParallelEval import ParallelEvaluator
+
+
+def test_results_in_input_order_with_errors_in_place():
+    lines = [f"{i} * 2 + sqrt(4)" for i in range(50)] + ["1/0", "1 +", "2**10"]
+    with ParallelEvaluator(max_workers=2, chunksize=8) as evaluator:
+        results = evaluator.map(lines)
+    assert results[:50] == [i * 2 + 2.0 for i in range(50)]
+    assert isinstance(results[50], ZeroDivisionError)
+    assert isinstance(results[51], ValueError)
+    assert results[52] == 1024
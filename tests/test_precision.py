@@ -0,0 +1,58 @@
+import time
+from decimal import Decimal
+
+import pytest
+
+from Expression import ExpressionError
+from Precision import clear_caches, evaluate_precise
+
+
+@pytest.fixture(autouse=True)
+def cold_caches():
+    clear_caches()
+
+
+def test_matches_known_digits():
+    assert evaluate_precise("sin(1) + ln(2)", 40) == Decimal("1.534618165367841816069734443088475567698")
+    assert str(evaluate_precise("pi", 30)) == "3.14159265358979323846264338328"
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("cbrt(2)", "1.2599210498948731647672106072782283505702514647015"),
+    ("cbrt(0.0001)", "0.046415888336127788924100763509194465765513491250112"),
+    ("cbrt(-27)", "-3"),
+])
+def test_cbrt_converges(text, expected):
+    assert evaluate_precise(text, 50) == Decimal(expected)
+
+
+def test_cbrt_many_inputs():
+    for mantissa in range(1, 400, 7):
+        for exponent in (-30, -4, 0, 5, 40):
+            x = Decimal(mantissa).scaleb(exponent) / 3
+            root = evaluate_precise(f"cbrt({x})", 50)
+            assert abs(root ** 3 - x) <= abs(x) * Decimal("1e-27")  # Default context: 28 digits
+
+
+def test_undeterminable_result_gives_up_quickly():
+    start = time.monotonic()
+    with pytest.raises(ExpressionError):
+        evaluate_precise("tan(pi/2)", 30)
+    assert time.monotonic() - start < 5
+
+
+def test_cancellation_to_zero():
+    assert evaluate_precise("sin(pi)", 50) == 0
+
+
+def test_refinement_agrees_with_fresh_evaluation():
+    short = evaluate_precise("e * atan(3)", 50)
+    longer = evaluate_precise("e * atan(3)", 200)
+    clear_caches()
+    assert longer == evaluate_precise("e * atan(3)", 200)
+    assert str(longer).startswith(str(short)[:-1])
+
+
+def test_digits_out_of_range():
+    with pytest.raises(ValueError):
+        evaluate_precise("1", 0)
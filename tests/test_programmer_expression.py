@@ -0,0 +1,85 @@
+import pytest
+
+from CalcEngine import ProgrammerEngine
+from Expression import ExpressionError
+from ProgrammerExpression import compile_program, rebase, tokenize
+
+
+def _engine(base="DEC", word_size=None):
+    engine = ProgrammerEngine()
+    engine.change_base(base)
+    if word_size is not None:
+        engine.set_word_size(word_size)
+    return engine
+
+
+@pytest.mark.parametrize("text, value", [
+    ("1 + 2 * 3", 7),
+    ("(1 + 2) * 3", 9),
+    ("1 OR 6 AND 3", 3),
+    ("1 << 4 + 1", 32),
+    ("NOT 0", -1),
+    ("-(2 - 5)", 3),
+    ("0xF & 0b1010", 10),
+    ("0o17 XOR 1", 14),
+    ("7 MOD 4 * 2", 6),
+    ("(5 + 1", 6),
+])
+def test_precedence_matches_c(text, value):
+    assert compile_program(text).evaluate(_engine()) == value
+
+
+def test_hex_base_reads_0b_as_hex_digits():
+    assert compile_program("0B1", "HEX").evaluate(_engine("HEX")) == 0xB1
+    assert compile_program("0x10 + A", "HEX").evaluate(_engine("HEX")) == 26
+    assert compile_program("0b11", "BIN").evaluate(_engine("BIN")) == 3
+    assert tokenize("0B1", "DEC") == [("num", 1)]
+
+
+def test_word_size_wraps_every_step():
+    assert compile_program("127 + 1").evaluate(_engine(word_size=8)) == -128
+
+
+@pytest.mark.parametrize("text", ["1 +", "(1 + 2))", "1 2", "NOT", "5 NOT 3", "G", "1 $ 2"])
+def test_invalid_input(text):
+    with pytest.raises(ExpressionError):
+        compile_program(text).evaluate(_engine())
+
+
+def test_division_by_zero_is_an_error():
+    with pytest.raises(ExpressionError):
+        compile_program("1 / 0").evaluate(_engine())
+
+
+def test_keypad_expression():
+    engine = _engine("HEX")
+    for key in ["(", "0", "B", "1", ")", "="]:
+        engine.press(key)
+    assert engine.current_value_int == 0xB1
+
+
+def test_keypad_rejects_not_after_an_operand():
+    engine = _engine()
+    for key in ["(", "5", "NOT"]:
+        engine.press(key)
+    assert engine.expression == "(5"
+    for key in ["AND", "NOT", "3", ")", "="]:
+        engine.press(key)
+    assert engine.current_value_int == 5 & ~3
+
+
+def test_rebase_rewrites_bare_numbers_only():
+    assert rebase("(FF AND 0x10) Lsh 2", "HEX", "DEC") == "(255 AND 0x10) Lsh 2"
+    assert rebase("(0b11 + 7 ", "DEC", "BIN") == "(0b11 + 111 "
+    assert rebase("", "HEX", "OCT") == ""
+
+
+def test_switching_base_mid_expression():
+    engine = _engine("HEX")
+    for key in ["(", "F", "F"]:
+        engine.press(key)
+    engine.change_base("DEC")
+    assert engine.expression == "(255"
+    for key in ["+", "1", ")", "="]:
+        engine.press(key)
+    assert engine.current_value_int == 256